@@ -0,0 +1 @@
+# benchmarks are run from the repository root, e.g. python -m benchmarks.rooms
@@ -0,0 +1,115 @@
+"""IO loop latency benchmark for bot seats.
+
+   Plays a number of rooms, each with one scripted player and one bot that
+   spends a fixed amount of CPU time on every move, while a probe measures how
+   late the IO loop wakes up from a short sleep. The bots think once in the
+   worker pool of seats.BotSeats and once on the IO loop itself, and a run
+   where both seats are scripted players gives the latency without bots.
+
+   Usage: python -m benchmarks.botseats [seconds] [rooms] [think ms]"""
+
+import sys
+import time
+import concurrent.futures
+from tornado import gen, ioloop
+import bots
+import main
+import seats
+from benchmarks.rooms import BenchSession, big_money_input
+
+# how often the probe wakes up, in seconds
+PROBE = 0.005
+
+class SlowBigMoney(bots.BigMoney):
+	"""Plays Big Money after keeping the CPU busy for think seconds."""
+
+	think = 0.05
+
+	def choose(self, env, observation, actions):
+		end = time.perf_counter() + self.think
+		while time.perf_counter() < end:
+			pass
+		return bots.BigMoney.choose(self, env, observation, actions)
+
+class InlineExecutor(concurrent.futures.Executor):
+	"""Runs every job as soon as it is submitted, on the IO loop."""
+
+	def submit(self, fn, *args):
+		future = concurrent.futures.Future()
+		future.set_result(fn(*args))
+		return future
+
+@gen.coroutine
+def probe(lags, running):
+	# records how late the IO loop wakes up from every sleep
+	while running:
+		start = time.perf_counter()
+		yield gen.sleep(PROBE)
+		lags.append(time.perf_counter() - start - PROBE)
+
+@gen.coroutine
+def play(conns, running, played):
+	# sends the scripted players' moves whenever it is their turn, starting a new game when one ends
+	# played counts the turns of every game
+	turns = 0
+	while running:
+		room = conns[0].room
+		if not room.in_progress():
+			played[0] += turns
+			conns[0].on_message('Start: (blank)')
+		else:
+			turns = room.game.turns
+			name = room.names[room.game.turn]
+			if name in [conn.name for conn in conns]:
+				conns[[conn.name for conn in conns].index(name)].on_message(big_money_input(room.game, name))
+		yield gen.sleep(0.001)
+
+def run(mode, seconds, room_count, think):
+	# mode is 'players', 'pool' or 'inline'
+	SlowBigMoney.think = think
+	bots.STRATEGIES['slow_big_money'] = SlowBigMoney
+	main.GameConnection.rooms = main.rooms.RoomRegistry()
+	executor = InlineExecutor() if mode == 'inline' else None
+	main.GameConnection.seats = seats.BotSeats(['slow_big_money'], budget=1.0, executor=executor)
+	main.options.bot_seats = 2
+
+	rooms = []
+	for num in range(room_count):
+		conns = []
+		for seat in range(2 if mode == 'players' else 1):
+			conn = main.GameConnection(BenchSession())
+			conn.on_open(None)
+			conn.on_message('Open:player{}:bench{}:batch'.format(seat, num))
+			conns.append(conn)
+		rooms.append(conns)
+
+	lags, running, played = [], [True], [0]
+	@gen.coroutine
+	def session():
+		for conns in rooms:
+			play(conns, running, played)
+		probe(lags, running)
+		yield gen.sleep(seconds)
+		running.pop()
+		yield gen.sleep(0.1)
+	ioloop.IOLoop.current().run_sync(session)
+	main.GameConnection.seats.executor().shutdown()
+
+	turns = played[0] + sum(conns[0].room.game.turns for conns in rooms if conns[0].room.in_progress())
+	lags.sort()
+	def pct(p): return lags[min(len(lags) - 1, int(p * len(lags)))] * 1000
+	return {'mode':    mode,
+			'turns':   turns,
+			'p50_ms':  round(pct(0.50), 2),
+			'p99_ms':  round(pct(0.99), 2),
+			'max_ms':  round(lags[-1] * 1000, 2)}
+
+if __name__ == '__main__':
+	seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+	room_count = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+	think = float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 0.05
+	print('{} rooms, bots think {:.0f} ms per move'.format(room_count, think * 1000))
+	print('{:>8} {:>8} {:>10} {:>10} {:>10}'.format('mode', 'turns', 'p50 ms', 'p99 ms', 'max ms'))
+	for mode in ('players', 'pool', 'inline'):
+		r = run(mode, seconds, room_count, think)
+		print('{mode:>8} {turns:>8} {p50_ms:>10} {p99_ms:>10} {max_ms:>10}'.format(**r))
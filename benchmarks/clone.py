@@ -0,0 +1,92 @@
+"""Game cloning benchmark.
+
+   Plays random games up to the middle of the game and copies them over and
+   over, with copy.deepcopy, with a snapshot and restore, with Dominion.clone()
+   and with a clone determinized for the player to move. Reports copies per
+   second, the memory each copy keeps alive, and the copies per second when
+   every copy is also played on for one step, the way a lookahead search uses
+   them.
+
+   Usage: python -m benchmarks.clone [seconds]"""
+
+import sys
+import copy
+import time
+import random
+import tracemalloc
+import dominion
+import headless
+
+# the turns the positions are taken at, and the games they are taken from
+TURNS = 20
+GAMES = 8
+# copies kept alive at once to measure their memory
+KEEP  = 500
+
+def positions():
+	# returns games stopped at turn TURNS after random legal moves
+	rng  = random.Random(0)
+	envs = []
+	for seed in range(GAMES):
+		env = headless.Environment(['p0', 'p1', 'p2'][:2 + seed % 2])
+		env.reset(seed)
+		while env.game.turns < TURNS:
+			env.step(rng.choice(env.legal_actions()))
+		envs.append(env)
+	return envs
+
+def copiers():
+	# returns a function copying an environment's game for each method
+	def deep(env): return copy.deepcopy(env.game)
+	def restore(env): return dominion.restore(env.game.snapshot())[0]
+	def clone(env): return env.game.clone()
+	def determinized(env): return env.game.clone(env.to_move(), rng)
+	rng = random.Random(0)
+	return [('deepcopy', deep), ('restore', restore), ('clone', clone), ('determinized', determinized)]
+
+def rate(envs, copier, seconds):
+	# returns the copies made per second
+	count = 0
+	start = time.perf_counter()
+	while time.perf_counter() - start < seconds:
+		for env in envs:
+			copier(env)
+		count += len(envs)
+	return count / (time.perf_counter() - start)
+
+def memory(envs, copier):
+	# returns the bytes allocated by a copy that is kept alive
+	tracemalloc.start()
+	before = tracemalloc.get_traced_memory()[0]
+	kept = [copier(envs[num % len(envs)]) for num in range(KEEP)]
+	used = tracemalloc.get_traced_memory()[0] - before
+	tracemalloc.stop()
+	return used / len(kept)
+
+def search_rate(envs, seconds):
+	# returns the environments cloned and played on for one random step per second
+	rng = random.Random(0)
+	count = 0
+	start = time.perf_counter()
+	while time.perf_counter() - start < seconds:
+		for env in envs:
+			child = env.clone()
+			child.step(rng.choice(child.legal_actions()))
+		count += len(envs)
+	return count / (time.perf_counter() - start)
+
+def run(seconds=2):
+	envs = positions()
+	results = []
+	for name, copier in copiers():
+		results.append({'method':      name,
+						'copies_per_s': round(rate(envs, copier, seconds)),
+						'bytes':        round(memory(envs, copier))})
+	results.append({'method': 'clone+step', 'copies_per_s': round(search_rate(envs, seconds)), 'bytes': ''})
+	return results
+
+if __name__ == '__main__':
+	seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 2
+	print('{:>14} {:>12} {:>10}'.format('method', 'copies/s', 'bytes'))
+	for r in run(seconds):
+		print('{method:>14} {copies_per_s:>12} {bytes:>10}'.format(**r))
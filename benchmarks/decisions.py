@@ -0,0 +1,54 @@
+"""Decision benchmark.
+
+   Deals the first player a hand of Throne Rooms and a Feast, plays the first
+   Throne Room and chooses the next one until the Feast is played under a
+   chain of the given depth, then times inputs sent to the pending Feast. The
+   inputs ask to gain a Province, which is refused, so every input reaches the
+   card waiting on top of the chain without changing the game.
+
+   Usage: python -m benchmarks.decisions [inputs]"""
+
+import sys
+import time
+import cards
+import dominion
+import protocol
+
+DEPTHS = (0, 1, 2, 4, 8, 16, 32)
+
+def chained_game(depth):
+	# returns a game and its game loop, waiting for the first player to gain a card with a Feast
+	# played by a chain of depth Throne Rooms
+	kingdom = [cards.CARDS[name].id for name in ('Throne Room', 'Feast', 'Village', 'Smithy', 'Market',
+												  'Festival', 'Laboratory', 'Cellar', 'Chapel', 'Moat')]
+	game  = dominion.Dominion(['p0', 'p1'], 0, kingdom)
+	state = game.state()
+	state['players'][0]['hand'] = [cards.CARDS['Throne Room'].id] * depth + [cards.CARDS['Feast'].id]
+	game.load_state(state)
+
+	coro = game.game_loop()
+	name = next(coro)
+	coro.send(protocol.Input('Play Card', name, (0,)))
+	for step in range(depth):
+		coro.send(protocol.Input('Play Card', name, (0,)))
+	game.events.clear()
+	return game, coro
+
+def run(inputs=20000):
+	results = []
+	for depth in DEPTHS:
+		game, coro = chained_game(depth)
+		refused = protocol.Input('Play Card', game[0].name, (game._supply.index(cards.CARDS['Province']),))
+		start = time.perf_counter()
+		for num in range(inputs):
+			coro.send(refused)
+			game.events.clear()
+		elapsed = time.perf_counter() - start
+		results.append({'depth': depth, 'inputs': inputs, 'input_us': round(elapsed / inputs * 1e6, 2)})
+	return results
+
+if __name__ == '__main__':
+	inputs = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+	print('{:>8} {:>10} {:>10}'.format('depth', 'inputs', 'input us'))
+	for r in run(inputs):
+		print('{depth:>8} {inputs:>10} {input_us:>10}'.format(**r))
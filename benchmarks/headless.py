@@ -0,0 +1,47 @@
+"""Headless throughput benchmark.
+
+   Plays whole games through headless.Environment with every seat choosing
+   uniformly among the legal actions, and reports games and steps per second
+   for each player count. Games that have not ended after a generous number of
+   steps are cut short and counted apart.
+
+   Usage: python -m benchmarks.headless [games]"""
+
+import sys
+import time
+import random
+import headless
+
+MAX_STEPS = 20000
+
+def run(games=200):
+	results = []
+	for player_count in (2, 3, 4):
+		rng   = random.Random(player_count)
+		env   = headless.Environment(['p{}'.format(num) for num in range(player_count)])
+		steps = 0
+		cut   = 0
+		start = time.perf_counter()
+		for seed in range(games):
+			env.reset(seed)
+			for num in range(MAX_STEPS):
+				observation, game_events, done = env.step(rng.choice(env.legal_actions()))
+				if done: break
+			else:
+				cut += 1
+			steps += num + 1
+		elapsed = time.perf_counter() - start
+		results.append({'players':      player_count,
+						'games':        games,
+						'cut':          cut,
+						'games_per_s':  round(games / elapsed, 1),
+						'steps_per_s':  round(steps / elapsed),
+						'steps_per_game': steps // games})
+	return results
+
+if __name__ == '__main__':
+	games = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+	print('{:>8} {:>8} {:>6} {:>10} {:>10} {:>12}'.format(
+		'players', 'games', 'cut', 'games/s', 'steps/s', 'steps/game'))
+	for r in run(games):
+		print('{players:>8} {games:>8} {cut:>6} {games_per_s:>10} {steps_per_s:>10} {steps_per_game:>12}'.format(**r))
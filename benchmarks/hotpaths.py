@@ -0,0 +1,228 @@
+"""Microbenchmarks of the operations that run on every turn.
+
+   Times the card lists, the player's draws and transfers, buying, gaining
+   and describing the supply and hands, and whole turns of scripted Big Money
+   games sent through Dominion.game_loop. Every case builds its inputs from a
+   fixed seed outside the timed loop and is run several times with the
+   garbage collector off, the best and the median time per operation are
+   reported. The noop case is the cost of
+   the timing loop itself, which every other case includes.
+
+   Results can be written as JSON and compared against the JSON of an earlier
+   run, cases more than --threshold slower than the baseline are marked and
+   make the run exit with status 1.
+
+   Usage: python -m benchmarks.hotpaths [--repeat 7] [--scale 1] [--only name]
+		  [--json results.json] [--baseline baseline.json] [--threshold 0.1]"""
+
+import gc
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+from random import Random
+import cards
+import player
+import dominion
+from benchmarks.rooms import big_money_move
+
+COPPER = cards.CARDS['Copper']
+ESTATE = cards.CARDS['Estate']
+
+# turns played in each game of the game_loop case, before the games can end
+TURNS_PER_GAME = 20
+
+def timed(op, n):
+	# returns the seconds taken to call op n times
+	start = time.perf_counter()
+	for num in range(n):
+		op()
+	return time.perf_counter() - start
+
+def mixed_cards(rng):
+	# returns a list of 17 cards like a deck in the middle of a game
+	names = ['Copper'] * 7 + ['Silver'] * 3 + ['Gold', 'Estate', 'Estate', 'Duchy', 'Smithy', 'Village', 'Market']
+	rng.shuffle(names)
+	return [cards.CARDS[name] for name in names]
+
+def started_player(seed):
+	# returns a player with the starting deck, shuffled with its own seeded generator
+	return player.Player('p0', Random(seed))
+
+def started_game(seed, player_count=2):
+	# returns a game with a seeded kingdom and shuffles whose first turn is waiting for input
+	game = dominion.Dominion(['p{}'.format(num) for num in range(player_count)], seed)
+	coro = game.game_loop()
+	next(coro)
+	return game, coro
+
+# every case takes the number of operations and a seed, sets up its inputs and returns the seconds taken
+
+def case_noop(n, seed):
+	return timed(lambda: None, n)
+
+def case_cards_add_cards(n, seed):
+	card_list = cards.Cards()
+	return timed(lambda: card_list.add_cards(COPPER), n)
+
+def case_cards_remove_card(n, seed):
+	card_list = cards.Cards()
+	card_list.add_cards([COPPER] * n)
+	return timed(card_list.remove_card, n)
+
+def case_cards_shuffle(n, seed):
+	rng = Random(seed)
+	card_list = cards.Cards(rng)
+	card_list.add_cards(mixed_cards(rng))
+	return timed(card_list.shuffle, n)
+
+def case_cards_card_count(n, seed):
+	card_list = cards.Cards()
+	card_list.add_cards(mixed_cards(Random(seed)))
+	return timed(lambda: card_list.card_count(ESTATE), n)
+
+def case_player_draw_card(n, seed):
+	p = started_player(seed)
+	p.add_cards('deck', [COPPER] * n)
+	return timed(p.draw_card, n)
+
+def case_player_draw_hand(n, seed):
+	p = started_player(seed)
+	p.add_cards('deck', [COPPER] * (5 * n))
+	return timed(p.draw_hand, n)
+
+def case_player_end_turn(n, seed):
+	# the starting deck is shuffled again every other turn
+	p = started_player(seed)
+	return timed(p.end_turn, n)
+
+def case_player_transfer_cards(n, seed):
+	# moves the hand to the discard pile and back, each move is one operation
+	p = started_player(seed)
+	def there_and_back():
+		p.transfer_cards('hand', 'discard')
+		p.transfer_cards('discard', 'hand')
+	return timed(there_and_back, n // 2)
+
+def case_dominion_buy_card(n, seed):
+	game, coro = started_game(seed)
+	game._supply.load_counts((n,) + game.supply_counts()[1:])
+	p = game[0]
+	p.buys = n
+	return timed(lambda: game.buy_card(p, 0), n)
+
+def case_dominion_gain_card(n, seed):
+	game, coro = started_game(seed)
+	game._supply.load_counts((n,) + game.supply_counts()[1:])
+	p = game[0]
+	treasure = {'Treasure'}
+	return timed(lambda: game.gain_card(p, 0, 0, treasure), n)
+
+def case_dominion_supply_piles(n, seed):
+	game, coro = started_game(seed)
+	return timed(game.supply_piles, n)
+
+def case_dominion_hand(n, seed):
+	game, coro = started_game(seed)
+	return timed(lambda: game.hand(0), n)
+
+def case_dominion_changed_zones(n, seed):
+	game, coro = started_game(seed)
+	game.changed_zones()
+	return timed(game.changed_zones, n)
+
+def case_game_loop_turn(n, seed):
+	# every operation is a whole turn of a scripted Big Money game, 2 to 4 players
+	games = [started_game(seed * 1000 + num, 2 + num % 3) for num in range(max(1, n // TURNS_PER_GAME))]
+	start = time.perf_counter()
+	for game, coro in games:
+		name = game[game.turn].name
+		while game.turns < TURNS_PER_GAME:
+			name = coro.send(big_money_move(game, name)) or name
+	return time.perf_counter() - start
+
+# the cases and the number of operations each is timed over
+CASES = (('noop',                      case_noop,                   200000),
+		 ('cards.add_cards',           case_cards_add_cards,        100000),
+		 ('cards.remove_card',         case_cards_remove_card,      100000),
+		 ('cards.shuffle',             case_cards_shuffle,          20000),
+		 ('cards.card_count',          case_cards_card_count,       100000),
+		 ('player.draw_card',          case_player_draw_card,       50000),
+		 ('player.draw_hand',          case_player_draw_hand,       20000),
+		 ('player.end_turn',           case_player_end_turn,        20000),
+		 ('player.transfer_cards',     case_player_transfer_cards,  50000),
+		 ('dominion.buy_card',         case_dominion_buy_card,      50000),
+		 ('dominion.gain_card',        case_dominion_gain_card,     50000),
+		 ('dominion.supply_piles',     case_dominion_supply_piles,  20000),
+		 ('dominion.hand',             case_dominion_hand,          100000),
+		 ('dominion.changed_zones',    case_dominion_changed_zones, 20000),
+		 ('game_loop.turn',            case_game_loop_turn,         2000))
+
+def run(repeat=7, scale=1.0, only=None):
+	# returns the best and median nanoseconds per operation of every case
+	results = []
+	for name, case, ops in CASES:
+		if only != None and only not in name:
+			continue
+		n = max(1, int(ops * scale))
+		if name == 'game_loop.turn':
+			n = max(1, n // TURNS_PER_GAME) * TURNS_PER_GAME
+		times = []
+		for seed in range(repeat):
+			gc.collect()
+			gc.disable()
+			try:
+				times.append(case(n, seed) / n * 1e9)
+			finally:
+				gc.enable()
+		results.append({'name': name, 'ops': n, 'best_ns': round(min(times), 1), 'median_ns': round(statistics.median(times), 1)})
+	return results
+
+def compare(results, baseline, threshold):
+	# adds the change from the baseline to every result and returns the names of the cases that got slower
+	# the noop case only times the timing loop, so it is never counted as slower
+	previous = {result['name']: result for result in baseline['results']}
+	slower = []
+	for result in results:
+		if result['name'] not in previous:
+			result['change'] = None
+			continue
+		result['change'] = round(result['best_ns'] / previous[result['name']]['best_ns'] - 1, 3)
+		if result['change'] > threshold and result['name'] != 'noop':
+			slower.append(result['name'])
+	return slower
+
+def main(argv):
+	parser = argparse.ArgumentParser(description='Times the operations that run on every turn.')
+	parser.add_argument('--repeat', type=int, default=7, help='times each case is run')
+	parser.add_argument('--scale', type=float, default=1.0, help='multiplies the number of operations of every case')
+	parser.add_argument('--only', help='only run the cases whose name contains this')
+	parser.add_argument('--json', help='write the results to this file')
+	parser.add_argument('--baseline', help='compare with the results written by an earlier run')
+	parser.add_argument('--threshold', type=float, default=0.1, help='slowdown from the baseline reported as a regression')
+	args = parser.parse_args(argv)
+
+	results = run(args.repeat, args.scale, args.only)
+	slower  = []
+	if args.baseline:
+		with open(args.baseline) as f:
+			slower = compare(results, json.load(f), args.threshold)
+
+	print('{:>24} {:>8} {:>10} {:>10} {:>8}'.format('case', 'ops', 'best ns', 'median ns', 'change'))
+	for result in results:
+		change = result.get('change')
+		mark = '' if change == None else '{:+.1%}{}'.format(change, ' !' if result['name'] in slower else '')
+		print('{name:>24} {ops:>8} {best_ns:>10} {median_ns:>10} '.format(**result) + '{:>8}'.format(mark))
+
+	if args.json:
+		with open(args.json, 'w') as f:
+			json.dump({'python': platform.python_version(), 'repeat': args.repeat, 'results': results}, f, indent=1)
+	if slower:
+		print('{} slower than the baseline by more than {:.0%}: {}'.format(
+			len(slower), args.threshold, ', '.join(slower)))
+		sys.exit(1)
+
+if __name__ == '__main__':
+	main(sys.argv[1:])
@@ -0,0 +1,315 @@
+"""End to end load generator.
+
+   Starts main.py on a local port and connects simulated browsers to it over
+   the SockJS websocket transport. Each one speaks the compact protocol like
+   static/js/dominion.js and plays Big Money, buying one Smithy when the
+   kingdom has one. Clients play cards one at a time and all treasures at
+   once, buy, end their turns, and now and then chat or look at the trash.
+   The rooms play their games at the same time until every room has played
+   its share.
+
+   Every client waits for the frame that answers its input before sending the
+   next one, and the time between the two is its latency. Reports latency
+   percentiles, inputs and server messages per second, and the CPU time the
+   server used while the games were played. The clients run in this process,
+   so on a machine with few cores they compete with the server for CPU.
+
+   Usage: python -m benchmarks.load [--rooms 10] [--players 2] [--games 20]
+		  [--think 0] [--port 8200] [--connect host:port] [--json results.json]"""
+
+import os
+import sys
+import json
+import time
+import socket
+import random
+import argparse
+import subprocess
+from tornado import gen, ioloop, websocket
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# opcodes of the compact protocol, see CLIENT_SCHEMA and SERVER_SCHEMA in protocol.py
+PROTOCOL_VERSION = 2
+CLIENT_OPCODES   = {'Open': 1, 'Start': 2, 'Chat': 3, 'Trash': 4, 'Sync': 5,
+					'Play Card': 6, 'Buy Card': 7, 'Play All Treasures': 8, 'End Turn': 9}
+SERVER_COMMANDS  = ['Hello', 'Names', 'Start', 'Turn', 'Supply', 'Pile', 'Curses', 'Trash',
+					'Hand', 'Stats', 'Deck', 'Discard', 'Chat', 'Leave', 'Public', 'End Game',
+					'Select', 'Gain', 'Discard Prompt', 'Decision', 'Suspend', 'Resume', 'Error', 'Stand In']
+
+# the cards the clients buy, most wanted first, with the gold they need
+BUYS = (('Province', 8), ('Gold', 6), ('Smithy', 4), ('Silver', 3))
+
+class Stats:
+	"""Everything measured across all clients."""
+
+	def __init__(self):
+		self.latencies = {}
+		self.inputs    = 0
+		self.frames    = 0
+		self.messages  = 0
+		self.games     = 0
+
+	def add_latency(self, command, seconds):
+		self.latencies.setdefault(command, []).append(seconds)
+
+class LoadClient:
+	"""One simulated browser. Keeps track of what the server tells it and
+	   plays its turns, sending an input only once the previous one has been
+	   answered."""
+
+	def __init__(self, url, name, room, room_size, stats, rng, think=0.0):
+		# the first client of a room starts every game once room_size clients are in the room
+		# think is the number of seconds waited before each input
+		self.url        = url
+		self.name       = name
+		self.room       = room
+		self.room_size  = room_size
+		self.stats      = stats
+		self.rng        = rng
+		self.think      = think
+		self.ws         = None
+		self.players    = []
+		self.card_names = []
+		self.ended      = False
+		self.reset()
+
+	def reset(self):
+		# forgets the state of the last game
+		self.supply     = []
+		self.hand       = []
+		self.actions, self.gold, self.buys = 0, 0, 0
+		self.my_turn    = False
+		self.played     = False
+		self.smithies   = 0
+		self.sent       = None
+
+	@gen.coroutine
+	def connect(self):
+		# opens a SockJS websocket session and sends the Open message
+		session = ''.join(self.rng.choice('abcdefghijklmnopqrstuvwxyz') for num in range(8))
+		self.ws = yield websocket.websocket_connect('{}/{}/{}/websocket'.format(self.url, self.rng.randrange(1000), session))
+		opened = yield self.ws.read_message()
+		assert opened == 'o', opened
+		self.send('Open', PROTOCOL_VERSION, self.name, self.room)
+
+	def send(self, command, *fields):
+		# sends an input in a SockJS frame and notes when it was sent
+		self.ws.write_message(json.dumps([json.dumps([CLIENT_OPCODES[command]] + list(fields))]))
+		self.sent = (command, time.perf_counter())
+		self.stats.inputs += 1
+
+	@gen.coroutine
+	def read_frame(self):
+		# returns the messages of the next frame from the server, or None once the connection is closed
+		while True:
+			data = yield self.ws.read_message()
+			if data == None:
+				return None
+			if data.startswith('a'):
+				messages = []
+				for frame in json.loads(data[1:]):
+					messages.extend(json.loads(frame))
+				return messages
+
+	@gen.coroutine
+	def play(self, games):
+		# plays the given number of games and closes the connection
+		while True:
+			messages = yield self.read_frame()
+			if messages == None:
+				return
+			now = time.perf_counter()
+			if self.sent != None:
+				self.stats.add_latency(self.sent[0], now - self.sent[1])
+				self.sent = None
+			self.stats.frames   += 1
+			self.stats.messages += len(messages)
+			for message in messages:
+				self.handle(SERVER_COMMANDS[message[0] - 1], message[1:])
+			if self.ended:
+				self.ended = False
+				games -= 1
+				if self.is_host:
+					self.stats.games += 1
+				if games == 0:
+					self.ws.close()
+					return
+				if self.is_host:
+					self.send('Start')
+			elif self.my_turn and self.sent == None:
+				if self.think:
+					yield gen.sleep(self.think)
+				self.move()
+
+	@property
+	def is_host(self):
+		return self.players != [] and self.players[0] == self.name
+
+	def handle(self, command, args):
+		# updates what the client knows from a message of the server
+		if command == 'Hello':
+			self.card_names = args[1]
+		elif command == 'Names':
+			self.players = args[0]
+			if self.is_host and len(self.players) == self.room_size and self.supply == []:
+				self.send('Start')
+		elif command == 'Start':
+			self.reset()
+		elif command == 'Turn':
+			self.my_turn = args[0] == self.name
+			self.played  = False
+		elif command == 'Supply':
+			self.supply = [[self.card_names[card_id], count] for card_id, count in zip(args[0::2], args[1::2])]
+		elif command == 'Pile':
+			idx, card_id, count = args
+			if idx < len(self.supply):
+				self.supply[idx] = [self.supply[idx][0], count]
+		elif command == 'Hand':
+			self.hand = [self.card_names[card_id] for card_id in args[0]]
+		elif command == 'Stats':
+			self.actions, self.gold, self.buys = args
+		elif command == 'End Game':
+			self.my_turn = False
+			self.ended   = True
+
+	def move(self):
+		# sends the next input of the client's turn
+		if self.rng.random() < 0.02:
+			self.send('Chat', 'gl hf')
+			return
+		if self.rng.random() < 0.02:
+			self.send('Trash')
+			return
+		if 'Smithy' in self.hand and self.actions > 0:
+			self.send('Play Card', self.hand.index('Smithy'))
+			return
+		treasures = [position for position, card in enumerate(self.hand) if card in ('Copper', 'Silver', 'Gold')]
+		if treasures and not self.played:
+			self.played = True
+			self.send('Play Card', treasures[0])
+			return
+		if treasures:
+			self.send('Play All Treasures')
+			return
+		names = [name for name, count in self.supply]
+		for card, cost in BUYS:
+			if (card in names and self.supply[names.index(card)][1] > 0 and self.gold >= cost and
+					(card != 'Smithy' or self.smithies == 0)):
+				if card == 'Smithy':
+					self.smithies += 1
+				self.send('Buy Card', names.index(card))
+				return
+		self.send('End Turn')
+
+def wait_for_port(port, timeout=10):
+	# waits until something listens on the port
+	deadline = time.time() + timeout
+	while time.time() < deadline:
+		try:
+			socket.create_connection(('127.0.0.1', port), 0.2).close()
+			return
+		except OSError:
+			time.sleep(0.1)
+	raise RuntimeError('the server did not start listening on port {}'.format(port))
+
+def cpu_seconds(pid):
+	# returns the user and system CPU time a process has used, or None where /proc is not available
+	try:
+		with open('/proc/{}/stat'.format(pid)) as f:
+			fields = f.read().rsplit(')', 1)[1].split()
+	except OSError:
+		return None
+	return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+def percentile(values, fraction):
+	return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def run(rooms=10, players=2, games=20, think=0.0, port=8200, connect=None, seed=0):
+	# plays games games in every room and returns the measurements
+	server = None
+	if connect == None:
+		server = subprocess.Popen([sys.executable, os.path.join(ROOT, 'main.py')], cwd=ROOT,
+								  env=dict(os.environ, PORT=str(port)), stdout=subprocess.DEVNULL)
+		host = '127.0.0.1:{}'.format(port)
+		wait_for_port(port)
+	else:
+		host = connect
+	url   = 'ws://{}/router'.format(host)
+	stats = Stats()
+	rng   = random.Random(seed)
+	try:
+		cpu_before = cpu_seconds(server.pid) if server != None else None
+		start = time.perf_counter()
+
+		@gen.coroutine
+		def load():
+			clients = []
+			for room in range(rooms):
+				room_id = 'load{}x{}'.format(seed, room)
+				for seat in range(players):
+					client = LoadClient(url, 'p{}'.format(seat), room_id, players, stats, random.Random(rng.random()), think)
+					yield client.connect()
+					clients.append(client)
+			yield [client.play(games) for client in clients]
+		ioloop.IOLoop.current().run_sync(load)
+
+		elapsed = time.perf_counter() - start
+		cpu_after = cpu_seconds(server.pid) if server != None else None
+	finally:
+		if server != None:
+			server.terminate()
+			server.wait()
+
+	every = sorted(latency for latencies in stats.latencies.values() for latency in latencies)
+	result = {'rooms':          rooms,
+			  'players':        players,
+			  'games':          stats.games,
+			  'seconds':        round(elapsed, 2),
+			  'inputs_per_s':   round(stats.inputs / elapsed, 1),
+			  'messages_per_s': round(stats.messages / elapsed, 1),
+			  'frames_per_s':   round(stats.frames / elapsed, 1),
+			  'server_cpu_s':   round(cpu_after - cpu_before, 2) if cpu_before != None else None,
+			  'latency_ms':     {},
+			  'commands':       {}}
+	for name, fraction in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99), ('max', 1.0)):
+		result['latency_ms'][name] = round(percentile(every, fraction) * 1000, 2)
+	for command, latencies in sorted(stats.latencies.items()):
+		latencies.sort()
+		result['commands'][command] = {'count': len(latencies),
+									   'p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+									   'p99_ms': round(percentile(latencies, 0.99) * 1000, 2)}
+	return result
+
+def report(result):
+	print('{games} games in {seconds}s, {rooms} rooms of {players} players'.format(**result))
+	print('{inputs_per_s} inputs/s, {frames_per_s} frames/s, {messages_per_s} server messages/s'.format(**result))
+	if result['server_cpu_s'] != None:
+		print('server CPU {}s, {:.0%} of one core'.format(result['server_cpu_s'], result['server_cpu_s'] / result['seconds']))
+	print('latency ms  p50 {p50}  p95 {p95}  p99 {p99}  max {max}'.format(**result['latency_ms']))
+	print('{:>20} {:>8} {:>10} {:>10}'.format('input', 'count', 'p50 ms', 'p99 ms'))
+	for command, figures in result['commands'].items():
+		print('{:>20} {count:>8} {p50_ms:>10} {p99_ms:>10}'.format(command, **figures))
+
+def main(argv):
+	parser = argparse.ArgumentParser(description='Plays games against a local server and reports its latency and load.')
+	parser.add_argument('--rooms', type=int, default=10, help='rooms playing at the same time')
+	parser.add_argument('--players', type=int, default=2, help='clients in every room, empty seats are filled with bots')
+	parser.add_argument('--games', type=int, default=20, help='games played in every room')
+	parser.add_argument('--think', type=float, default=0.0, help='seconds a client waits before each input')
+	parser.add_argument('--port', type=int, default=8200, help='port the server is started on')
+	parser.add_argument('--connect', help='host:port of a server that is already running, instead of starting one')
+	parser.add_argument('--seed', type=int, default=0)
+	parser.add_argument('--json', help='write the results to this file')
+	args = parser.parse_args(argv)
+
+	if not 1 <= args.players <= 4:
+		parser.error('rooms hold 1 to 4 players')
+	result = run(args.rooms, args.players, args.games, args.think, args.port, args.connect, args.seed)
+	report(result)
+	if args.json:
+		with open(args.json, 'w') as f:
+			json.dump(result, f, indent=1)
+
+if __name__ == '__main__':
+	main(sys.argv[1:])
@@ -0,0 +1,97 @@
+"""Wire protocol benchmark.
+
+   Records every input and every server message of scripted Big Money games
+   played through GameConnection, then replays the recording through each
+   protocol and reports decode and encode cost per message and the bytes a
+   client receives.
+
+   Usage: python -m benchmarks.protocol [games]"""
+
+import sys
+import json
+import time
+import random
+import main
+import protocol
+from benchmarks.rooms import BenchSession, big_money_input
+
+PROTOCOLS = (('text',         protocol.LegacyProtocol()),
+			 ('text batched', protocol.LegacyProtocol(batched=True)),
+			 ('compact',      protocol.CompactProtocol()))
+
+def compact_input(message):
+	# returns the compact form of a text protocol input
+	user_input = protocol.LegacyProtocol().decode(message)
+	opcode = [op for op, command in protocol.CLIENT_COMMANDS.items() if command == user_input.command][0]
+	if user_input.command == 'Open':
+		return json.dumps([opcode, protocol.COMPACT_VERSION] + list(user_input.args))
+	if user_input.command == 'Chat':
+		return json.dumps([opcode, user_input.args[0]])
+	return json.dumps([opcode] + list(user_input.args))
+
+def record(games, seed=0):
+	# plays scripted games and returns the inputs sent and the (recipient count, message) pairs posted
+	rng = random.Random(seed)
+	random.seed(seed)
+	main.GameConnection.rooms = main.rooms.RoomRegistry()
+	inputs, posted = [], []
+	post = main.GameConnection.post
+	def recording_post(self, participants, message):
+		posted.append((len(participants), message))
+		post(self, participants, message)
+	main.GameConnection.post = recording_post
+
+	def send(conn, message):
+		inputs.append(message)
+		conn.on_message(message)
+
+	try:
+		for num in range(games):
+			conns = []
+			for seat in range(rng.randint(2, 4)):
+				conn = main.GameConnection(BenchSession())
+				conn.on_open(None)
+				send(conn, 'Open:player{}:bench{}:batch'.format(seat, num))
+				conns.append(conn)
+			send(conns[0], 'Start: (blank)')
+			room = conns[0].room
+			while room.in_progress():
+				name = conns[0].session.turn
+				send(conns[room.names.index(name)], big_money_input(room.game, name))
+	finally:
+		main.GameConnection.post = post
+	return inputs, posted
+
+def run(games=20):
+	inputs, posted = record(games)
+	compact_inputs = [compact_input(message) for message in inputs]
+	results = []
+	for label, proto in PROTOCOLS:
+		messages = compact_inputs if proto.version == protocol.COMPACT_VERSION else inputs
+
+		start = time.perf_counter()
+		for message in messages:
+			proto.decode(message)
+		decode = time.perf_counter() - start
+
+		# messages are encoded from scratch so the per-protocol cache does not hide the cost
+		start = time.perf_counter()
+		encoded = [(count, proto.encode(protocol.Message(message.command, message.payload))) for count, message in posted]
+		encode = time.perf_counter() - start
+
+		# every message is counted once per recipient, leaving out the few bytes of each frame
+		sent = sum(count * len(message) for count, message in encoded)
+		results.append({'protocol':  label,
+						'inputs':    len(messages),
+						'messages':  len(posted),
+						'decode_us': round(decode / len(messages) * 1e6, 2),
+						'encode_us': round(encode / len(posted) * 1e6, 2),
+						'bytes':     sent})
+	return results
+
+if __name__ == '__main__':
+	games = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+	print('{:>14} {:>8} {:>10} {:>10} {:>10} {:>12}'.format(
+		'protocol', 'inputs', 'messages', 'decode us', 'encode us', 'bytes sent'))
+	for r in run(games):
+		print('{protocol:>14} {inputs:>8} {messages:>10} {decode_us:>10} {encode_us:>10} {bytes:>12}'.format(**r))
@@ -0,0 +1,127 @@
+"""Capacity benchmark for the multi-room server.
+
+   Creates an increasing number of rooms, each with 2 to 4 connections playing
+   a Big Money game through GameConnection.on_message, and reports memory per
+   room and per-message handler latency as the room count grows.
+
+   Usage: python -m benchmarks.rooms [room counts...]"""
+
+import sys
+import json
+import time
+import random
+import tracemalloc
+import main
+import protocol
+
+class BenchSession:
+	"""Stands in for a sockjs session so on_message can be driven without sockets.
+	   Only counts the frames and bytes that would have been written, and
+	   remembers whose turn it is."""
+
+	is_closed         = False
+	send_expects_json = False
+
+	def __init__(self):
+		self.frames = 0
+		self.bytes  = 0
+		self.turn   = None
+
+	def send_message(self, message, stats=True, binary=False):
+		self.frames += 1
+		self.bytes  += len(message)
+		messages = json.loads(message[6:]) if message.startswith('Frame:') else [message]
+		for msg in messages:
+			if msg.startswith('Turn:'):
+				self.turn = msg[5:]
+
+	def broadcast(self, clients, message):
+		for client in clients:
+			client.session.send_message(message)
+
+class RecordingSession(BenchSession):
+	"""Keeps every message sent to the client, for the tests."""
+
+	def __init__(self):
+		BenchSession.__init__(self)
+		self.messages = []
+
+	def send_message(self, message, stats=True, binary=False):
+		BenchSession.send_message(self, message, stats, binary)
+		self.messages.extend(json.loads(message[6:]) if message.startswith('Frame:') else [message])
+
+def big_money_move(game, name):
+	# returns the next scripted protocol.Input for the player whose turn it is
+	p = game[[q.name for q in game._players].index(name)]
+	if any(card.type == 'Treasure' for card in p):
+		return protocol.Input('Play All Treasures', name, ())
+	if p.buys > 0 and p.gold >= 8:
+		return protocol.Input('Buy Card', name, (5,))
+	if p.buys > 0 and p.gold >= 6:
+		return protocol.Input('Buy Card', name, (2,))
+	if p.buys > 0 and p.gold >= 3:
+		return protocol.Input('Buy Card', name, (1,))
+	return protocol.Input('End Turn', name, ())
+
+def big_money_input(game, name):
+	# returns the next scripted input for the player whose turn it is as a text protocol message
+	move = big_money_move(game, name)
+	return ':'.join((name, move.command) + tuple(str(idx) for idx in move.args))
+
+def open_rooms(room_count, rng):
+	# connects 2 to 4 players to each room and starts every game
+	rooms = []
+	for num in range(room_count):
+		conns = []
+		for seat in range(rng.randint(2, 4)):
+			conn = main.GameConnection(BenchSession())
+			conn.on_open(None)
+			conn.on_message('Open:player{}:bench{}:batch'.format(seat, num))
+			conns.append(conn)
+		conns[0].on_message('Start: (blank)')
+		rooms.append(conns)
+	return rooms
+
+def run(room_count, messages_per_room=200, seed=0):
+	rng = random.Random(seed)
+	random.seed(seed)
+	main.GameConnection.rooms = main.rooms.RoomRegistry()
+
+	tracemalloc.start()
+	before = tracemalloc.get_traced_memory()[0]
+	rooms = open_rooms(room_count, rng)
+	per_room = (tracemalloc.get_traced_memory()[0] - before) / room_count
+	tracemalloc.stop()
+
+	latencies = []
+	for step in range(messages_per_room):
+		# interleave inputs across rooms the way the IO loop would see them
+		for conns in rooms:
+			room = conns[0].room
+			if not room.in_progress():
+				conns[0].on_message('Start: (blank)')
+				continue
+			name = conns[0].session.turn
+			message = big_money_input(room.game, name)
+			conn = conns[room.names.index(name)]
+			start = time.perf_counter()
+			conn.on_message(message)
+			latencies.append(time.perf_counter() - start)
+
+	latencies.sort()
+	def pct(p): return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1e6
+	frames = sum(conn.session.frames for conns in rooms for conn in conns)
+	return {'rooms':             room_count,
+			'bytes_per_room':    int(per_room),
+			'messages':          len(latencies),
+			'p50_us':            round(pct(0.50), 1),
+			'p99_us':            round(pct(0.99), 1),
+			'frames_per_input':  round(frames / len(latencies), 1)}
+
+if __name__ == '__main__':
+	counts = [int(arg) for arg in sys.argv[1:]] or [1, 10, 100, 500]
+	print('{:>6} {:>14} {:>10} {:>10} {:>10} {:>16}'.format(
+		'rooms', 'bytes/room', 'messages', 'p50 us', 'p99 us', 'frames/input'))
+	for count in counts:
+		r = run(count)
+		print('{rooms:>6} {bytes_per_room:>14} {messages:>10} {p50_us:>10} {p99_us:>10} {frames_per_input:>16}'.format(**r))
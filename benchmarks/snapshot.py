@@ -0,0 +1,52 @@
+"""Snapshot benchmark.
+
+   Plays seeded Big Money games directly against Dominion.game_loop and, at
+   every turn of every game, times taking a snapshot and writing it as JSON,
+   reading it back and restoring the game, and reports the snapshot size.
+   Also reports the cost of the checkpoint taken at the start of each turn.
+
+   Usage: python -m benchmarks.snapshot [games]"""
+
+import sys
+import json
+import time
+import dominion
+from benchmarks.rooms import big_money_move
+
+def run(games=20):
+	saves, loads, sizes, checkpoints = [], [], [], []
+	for seed in range(games):
+		game = dominion.Dominion(['p{}'.format(num) for num in range(2 + seed % 3)], seed)
+		coro = game.game_loop()
+		name = next(coro)
+		ended = False
+		while not ended:
+			name = coro.send(big_money_move(game, name)) or name
+			for event in game.events.drain():
+				ended = ended or event.kind == 'end_game'
+
+			start = time.perf_counter()
+			encoded = json.dumps(game.snapshot(), separators=(',', ':'))
+			saves.append(time.perf_counter() - start)
+			sizes.append(len(encoded))
+
+			start = time.perf_counter()
+			dominion.restore(json.loads(encoded))
+			loads.append(time.perf_counter() - start)
+
+			start = time.perf_counter()
+			game.state()
+			checkpoints.append(time.perf_counter() - start)
+
+	def median(values): return sorted(values)[len(values) // 2]
+	return {'snapshots':     len(saves),
+			'save_us':       round(median(saves) * 1e6, 1),
+			'restore_us':    round(median(loads) * 1e6, 1),
+			'bytes':         median(sizes),
+			'checkpoint_us': round(median(checkpoints) * 1e6, 1)}
+
+if __name__ == '__main__':
+	games = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+	print('{:>10} {:>10} {:>12} {:>10} {:>15}'.format(
+		'snapshots', 'save us', 'restore us', 'bytes', 'checkpoint us'))
+	print('{snapshots:>10} {save_us:>10} {restore_us:>12} {bytes:>10} {checkpoint_us:>15}'.format(**run(games)))
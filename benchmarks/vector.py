@@ -0,0 +1,64 @@
+"""Vectorized environment benchmark.
+
+   Plays random legal moves for a fixed number of seconds, first one game at a
+   time through headless.Environment and then through VectorDominion with
+   growing batch sizes, all with the same kingdom. Reports steps per second
+   and the speedup over the single game engine.
+
+   Usage: python -m benchmarks.vector [seconds]"""
+
+import sys
+import time
+import random
+import numpy
+import cards
+import headless
+import vector
+
+BATCHES = (1, 64, 512, 4096)
+
+KINGDOM = [cards.CARDS[name].id for name in ('Village', 'Smithy', 'Market', 'Laboratory', 'Festival',
+											  'Witch', 'Moat', 'Council Room', 'Moneylender', 'Adventurer')]
+
+def single(seconds):
+	# returns the steps per second of random games played one at a time
+	rng = random.Random(0)
+	env = headless.Environment(['p0', 'p1'])
+	env.reset(0, KINGDOM)
+	steps, seed = 0, 0
+	start = time.perf_counter()
+	while time.perf_counter() - start < seconds:
+		for num in range(100):
+			observation, game_events, done = env.step(rng.choice(env.legal_actions()))
+			if done:
+				seed += 1
+				env.reset(seed, KINGDOM)
+		steps += 100
+	return steps / (time.perf_counter() - start)
+
+def batched(games, seconds):
+	# returns the steps per second, counting one step per game, of random games played in a batch
+	rng  = numpy.random.RandomState(0)
+	envs = vector.VectorDominion(games, 2, KINGDOM, seed=0)
+	steps = 0
+	start = time.perf_counter()
+	while time.perf_counter() - start < seconds:
+		for num in range(10):
+			mask = envs.legal_mask()
+			envs.step((rng.random_sample(mask.shape) + mask).argmax(1))
+		steps += 10 * games
+	return steps / (time.perf_counter() - start)
+
+def run(seconds=3):
+	base = single(seconds)
+	results = [{'engine': 'headless', 'games': 1, 'steps_per_s': round(base), 'speedup': 1.0}]
+	for games in BATCHES:
+		rate = batched(games, seconds)
+		results.append({'engine': 'vector', 'games': games, 'steps_per_s': round(rate), 'speedup': round(rate / base, 1)})
+	return results
+
+if __name__ == '__main__':
+	seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3
+	print('{:>10} {:>8} {:>12} {:>9}'.format('engine', 'games', 'steps/s', 'speedup'))
+	for r in run(seconds):
+		print('{engine:>10} {games:>8} {steps_per_s:>12} {speedup:>9}'.format(**r))
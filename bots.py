@@ -0,0 +1,148 @@
+import cards
+import protocol
+from random import Random
+
+# action cards that give at least one action back, played before the ones that do not
+NON_TERMINAL = {'Cellar', 'Village', 'Festival', 'Laboratory', 'Market', 'Spy', 'Throne Room'}
+
+def keep_value(card):
+	# returns how much a card is worth keeping, used to pick the cards to discard or trash
+	if card.type == 'Curse':
+		return -2
+	if card.type == 'Victory':
+		return -1
+	return card.cost
+
+class Bot:
+	"""Plays one seat of a headless.Environment. choose() is given the observation
+	   and the legal actions whenever the bot's player has to choose and returns
+	   one of the actions. Turns are played by turn() and the choices asked by
+	   cards are answered by decide(), which subclasses can override."""
+
+	def __init__(self, rng=None):
+		# rng is the random.Random used by bots that make random choices
+		self.rng = rng if rng != None else Random()
+
+	def choose(self, env, observation, actions):
+		# returns the action to send for the player of the observation
+		if observation.decision != None:
+			return self.decide(env, observation, actions)
+		return self.turn(env, observation, actions)
+
+	def turn(self, env, observation, actions):
+		# ends the turn without doing anything
+		return [action for action in actions if action.command == 'End Turn'][0]
+
+	def decide(self, env, observation, actions):
+		# answers the choice asked by the card on top of the decision stack
+		if actions[0].command != 'Play Card':
+			return actions[0]
+		card, step = observation.decision
+		frame = env.game.decision()
+		name  = actions[0].name
+		p     = env.game[observation.player]
+		hand  = list(p)
+
+		def answer(*indices): return protocol.Input('Play Card', name, tuple(indices))
+		def worst(positions): return sorted(positions, key=lambda position: keep_value(hand[position]))
+
+		if step == 'gain' and card != 'Thief':
+			# the most expensive card, victory cards only if they are worth it
+			return max(actions, key=lambda action: (env.piles[action.args[0]].type != 'Victory' or
+													env.piles[action.args[0]].cost >= 5,
+													env.piles[action.args[0]].cost))
+		if card == 'Cellar':
+			return answer(*sorted(position for position in range(len(hand)) if keep_value(hand[position]) < 0))
+		if card == 'Chapel':
+			return answer(*sorted(position for position in worst(range(len(hand)))[:4] if keep_value(hand[position]) < 0))
+		if card == 'Militia':
+			return answer(*sorted(worst(range(len(hand)))[:len(hand) - 3]))
+		if card == 'Remodel':
+			return answer(worst(range(len(hand)))[0])
+		if card == 'Mine':
+			return max(actions, key=lambda action: hand[action.args[0]].cost if hand[action.args[0]].cost < 6 else -1)
+		if card == 'Throne Room':
+			return max(actions, key=lambda action: hand[action.args[0]].cost)
+		if card == 'Spy':
+			# other players discard their good cards, the bot discards its own bad ones
+			target   = env.game[frame['target']]
+			revealed = target[('deck', -1)]
+			return answer(0 if (keep_value(revealed) < 0) == (target is p) else 1)
+		if card == 'Thief' and step == 'decide':
+			first, second = (cards.CATALOG[card_id] for card_id in frame['revealed'])
+			return answer(0 if first.cost >= second.cost else 1)
+		if card == 'Thief':
+			return answer(0 if cards.CATALOG[frame['trashed']].cost >= 3 else 1)
+		if card == 'Library':
+			return answer(0 if p.actions == 0 else 1)
+		return answer(0)
+
+class RandomBot(Bot):
+	"""Picks any legal action, every one with the same chance."""
+
+	def choose(self, env, observation, actions):
+		return self.rng.choice(actions)
+
+class BigMoney(Bot):
+	"""Buys the most expensive of Province, Gold and Silver it can afford, and
+	   Duchies and Estates once few Provinces are left. Can also buy up to a
+	   number of copies of one kingdom card, which it plays before its
+	   treasures."""
+
+	def __init__(self, rng=None, card=None, copies=1):
+		# card is the name of the kingdom card to buy, if any
+		Bot.__init__(self, rng)
+		self.card   = card
+		self.copies = copies
+
+	def turn(self, env, observation, actions):
+		# plays actions, then treasures, then buys
+		p = env.game[observation.player]
+		plays = [action for action in actions
+				 if action.command == 'Play Card' and p[('hand', action.args[0])].type == 'Action']
+		if plays:
+			return max(plays, key=lambda action: (p[('hand', action.args[0])].name in NON_TERMINAL,
+												  p[('hand', action.args[0])].cost))
+		for action in actions:
+			if action.command == 'Play All Treasures':
+				return action
+
+		buys = {env.piles[action.args[0]].name: action for action in actions if action.command == 'Buy Card'}
+		for name in self.buy_order(env, p):
+			if name in buys:
+				return buys[name]
+		return Bot.turn(self, env, observation, actions)
+
+	def buy_rules(self):
+		# returns the cards the bot wants, most wanted first, as tuples of the card name, the number
+		# of copies after which the bot stops buying it and the number of Provinces left at which
+		# it starts buying it. None means there is no limit
+		rules = [('Province', None, None), ('Duchy', None, 4), ('Gold', None, None)]
+		if self.card != None:
+			rules.append((self.card, self.copies, None))
+		rules += [('Estate', None, 2), ('Silver', None, None)]
+		return rules
+
+	def buy_order(self, env, p):
+		# returns the names of the cards the bot wants right now, most wanted first
+		provinces = env.game.supply_counts()[env.piles.index(cards.CARDS['Province'])]
+		return [name for name, copies, provinces_left in self.buy_rules()
+				if (copies == None or p.card_count(cards.CARDS[name]) < copies) and
+				   (provinces_left == None or provinces <= provinces_left)]
+
+# the strategies that can be named on the command line, see create()
+STRATEGIES = {'random': RandomBot, 'big_money': BigMoney}
+
+def create(spec, rng=None):
+	# returns a bot from a strategy name, big_money can be followed by a kingdom card and a number
+	# of copies to buy, e.g. 'big_money:Smithy:2'
+	name, *options = spec.split(':')
+	if name not in STRATEGIES:
+		raise ValueError('unknown strategy {}'.format(name))
+	if options and name == 'big_money':
+		if options[0] not in cards.CARDS or cards.CARDS[options[0]] not in cards.KINGDOM:
+			raise ValueError('{} is not a kingdom card'.format(options[0]))
+		return BigMoney(rng, options[0], int(options[1]) if len(options) > 1 else 1)
+	if options:
+		raise ValueError('{} takes no options'.format(name))
+	return STRATEGIES[name](rng)
@@ -1,18 +1,78 @@
 import sys
-from random import shuffle, SystemRandom
+from random import Random
 from collections import namedtuple
 
-Card = namedtuple('Card', 'name type cost')
+Card = namedtuple('Card', 'id name type cost')
+
+# every card in the game is a single shared Card, the position of a card in the catalog is its id
+# Blank, Back and Trash are not cards, they stand for the images of empty, face down and trash piles
+CATALOG = tuple(Card(card_id, name, card_type, cost) for card_id, (name, card_type, cost) in enumerate((
+	('Blank', 			None, 		0),
+	('Back', 			None, 		0),
+	('Trash', 			None, 		0),
+	('Copper', 			'Treasure', 0),
+	('Silver', 			'Treasure', 3),
+	('Gold', 			'Treasure', 6),
+	('Estate', 			'Victory', 	2),
+	('Duchy', 			'Victory', 	5),
+	('Province', 		'Victory', 	8),
+	('Curse', 			'Curse', 	0),
+	('Cellar', 			'Action', 	2),
+	('Chapel', 			'Action', 	2),
+	('Moat', 			'Action', 	2),
+	('Chancellor', 		'Action', 	3),
+	('Village', 		'Action',	3),
+	('Woodcutter', 		'Action',	3),
+	('Workshop', 		'Action', 	3),
+	('Bureaucrat', 		'Action', 	4),
+	('Feast', 			'Action', 	4),
+	('Gardens', 		'Victory', 	4),
+	('Militia', 		'Action', 	4),
+	('Moneylender', 	'Action', 	4),
+	('Remodel', 		'Action', 	4),
+	('Smithy', 			'Action', 	4),
+	('Spy', 			'Action', 	4),
+	('Thief', 			'Action', 	4),
+	('Throne Room', 	'Action', 	4),
+	('Council Room', 	'Action', 	5),
+	('Festival', 		'Action', 	5),
+	('Laboratory', 		'Action', 	5),
+	('Library', 		'Action', 	5),
+	('Market', 			'Action', 	5),
+	('Mine', 			'Action', 	5),
+	('Witch', 			'Action', 	5),
+	('Adventurer', 		'Action', 	6),
+	)))
+
+# the cards of the catalog keyed by name, e.g. CARDS['Province']
+CARDS = {card.name: card for card in CATALOG}
+
+# the 25 cards the kingdom supply piles are chosen from
+KINGDOM = CATALOG[CARDS['Cellar'].id:]
+
+# lists that are not given a generator of their own share this one
+_default_rng = Random()
+
+# victory points of each card id worth a fixed amount, Gardens are worth 1 point for every 10 cards owned
+VICTORY_POINTS = {CARDS['Estate'].id: 1, CARDS['Duchy'].id: 3, CARDS['Province'].id: 6, CARDS['Curse'].id: -1}
 
 class Cards:
-	"""A list of cards. Each item in the list is a named tuple that represents
-	   an individual card. This class is used to represent a player's deck,
-	   hand, discard pile, and cards in play. It is also used for the supply piles
-	   and trash."""
+	"""A list of cards. Each item in the list is one of the shared cards of the
+	   catalog, so copies of a card are the same object. This class is used to
+	   represent a player's deck, hand, discard pile, and cards in play. It is also
+	   used for the supply piles and trash."""
+
+	__slots__ = ('_cards', '_rng', '_shared', 'version')
 
-	def __init__(self):
+	def __init__(self, rng=None):
 		# initialize the list of cards to be empty
-		self._cards = []
+		# rng is the random.Random used to shuffle, normally the one owned by the game
+		# the version is incremented every time the list changes
+		# a list made by clone() shares its cards with the original until either of them changes
+		self._cards  = []
+		self._rng    = rng if rng != None else _default_rng
+		self._shared = False
+		self.version = 0
 
 	def __repr__(self):
 		# returns a string with the name, type, and cost of each card in the list
@@ -41,6 +101,7 @@ class Cards:
 
 	def __contains__(self, card):
 		# check if the given card is in the list
+		# copies of a card are the same object, so this is an identity check for each item
 		return card in self._cards
 
 	def __len__(self):
@@ -55,26 +116,215 @@ class Cards:
 		# returns the number of times a given card appears in the list
 		return self._cards.count(card)
 
+	def card_ids(self):
+		# returns the ids of the cards in the list, in order
+		return [card.id for card in self._cards]
+
+	def clone(self, rng=None):
+		# returns a copy of the list that shares its cards with this one until either of them changes
+		# the copy shuffles with rng, or with the same generator as this list if rng is None
+		copy = Cards(rng if rng != None else self._rng)
+		copy._cards  = self._cards
+		copy._shared = True
+		copy.version = self.version
+		self._shared = True
+		return copy
+
+	def own(self):
+		# makes a list that shares its cards hold a copy of its own before it changes
+		if self._shared:
+			self._cards  = list(self._cards)
+			self._shared = False
+
 	def shuffle(self):
 		# shuffle the list to randomize order of cards
-		shuffle(self._cards, SystemRandom().random)
+		self.own()
+		self.version += 1
+		self._rng.shuffle(self._cards)
 
 	def add_cards(self, cards_to_add):
 		# add cards to list
 		if type(cards_to_add) != list:
 			cards_to_add = [cards_to_add]
+		self.own()
 		self._cards.extend(cards_to_add)
 		cards_to_add.clear()
+		self.version += 1
 
 	def remove_card(self, position=-1):
 		# remove a card from the list
+		self.own()
 		try:
-			return self._cards.pop(position)
+			removed_card = self._cards.pop(position)
 		except IndexError:
 			sys.stderr.write('IndexError in Cards.remove_card()\n')
+		else:
+			self.version += 1
+			return removed_card
 
 	def remove_all_cards(self):
 		# remove all cards from the list
-		removed_cards = self._cards[:]
-		self._cards.clear()
+		# the list itself is handed over unless it is shared with a clone
+		removed_cards = list(self._cards) if self._shared else self._cards
+		self._cards   = []
+		self._shared  = False
+		self.version += 1
 		return removed_cards
+
+class SupplyPile:
+	"""A supply pile of identical cards. Only the card and the number of copies
+	   left are stored, so taking a card or returning one does not allocate.
+	   Supports the parts of the Cards interface that make sense for a pile
+	   where every card is the same."""
+
+	__slots__ = ('card', 'count', 'version')
+
+	def __init__(self, card, count=0):
+		# initialize the pile with the given number of copies of a card
+		# the version is incremented every time the pile changes
+		self.card    = card
+		self.count   = count
+		self.version = 0
+
+	def __repr__(self):
+		# returns a string with the card and the number of copies left
+		return '{} x {}'.format(self.count, self.card)
+
+	def __str__(self):
+		# returns a string with the name of the card and the number of copies left
+		return '{} x {}'.format(self.count, self.card.name)
+
+	def __getitem__(self, index):
+		# every position in the pile holds the same card
+		if -self.count <= index < self.count:
+			return self.card
+		sys.stderr.write('IndexError in SupplyPile.__getitem__()\n')
+
+	def __iter__(self):
+		# yields the card once for every copy left
+		for amount in range(self.count): yield self.card
+
+	def __contains__(self, card):
+		# check if the given card is in the pile
+		return self.count > 0 and card is self.card
+
+	def __len__(self):
+		# return the amount of cards in the pile
+		return self.count
+
+	def is_empty(self):
+		# check if the pile is empty
+		return self.count == 0
+
+	def card_count(self, card):
+		# returns the number of times a given card appears in the pile
+		return self.count if card is self.card else 0
+
+	def add_cards(self, cards_to_add):
+		# return cards to the pile, only copies of the pile's card can be added
+		if type(cards_to_add) != list:
+			cards_to_add = [cards_to_add]
+		if any(card is not self.card for card in cards_to_add):
+			sys.stderr.write('ValueError in SupplyPile.add_cards()\n')
+			return
+		self.count += len(cards_to_add)
+		cards_to_add.clear()
+		self.version += 1
+
+	def remove_card(self, position=-1):
+		# take a card from the pile
+		if self.count == 0:
+			sys.stderr.write('IndexError in SupplyPile.remove_card()\n')
+			return
+		self.count   -= 1
+		self.version += 1
+		return self.card
+
+	def remove_all_cards(self):
+		# take every card from the pile
+		removed_cards = [self.card] * self.count
+		self.count    = 0
+		self.version += 1
+		return removed_cards
+
+class Supply:
+	"""The supply piles of a game in a fixed order: the treasure piles, the
+	   victory piles, the 10 kingdom piles and finally the curses. The number
+	   of empty piles is kept up to date as cards are taken, so checking for
+	   the end of the game does not look at every pile. Cards should only be
+	   taken from the piles through take(). A supply made by clone() shares its
+	   piles with the original, a pile is copied before either of them takes a
+	   card from it."""
+
+	def __init__(self, piles):
+		# piles are SupplyPiles given in the order they are indexed by clients
+		# _owned tells which piles are not shared with a clone
+		self._piles      = list(piles)
+		self._owned      = [True] * len(self._piles)
+		self._index      = {pile.card.id: idx for idx, pile in enumerate(self._piles)}
+		self._provinces  = self._index[CARDS['Province'].id]
+		self.empty_piles = sum(1 for pile in self._piles if pile.is_empty())
+
+	def __getitem__(self, index):
+		# returns the pile at the given position
+		try:
+			return self._piles[index]
+		except IndexError:
+			sys.stderr.write('IndexError in Supply.__getitem__()\n')
+
+	def __iter__(self):
+		# yields every pile in order
+		for pile in self._piles: yield pile
+
+	def __len__(self):
+		# returns the number of piles, empty or not
+		return len(self._piles)
+
+	def index(self, card):
+		# returns the position of the pile holding the given card, or None if there is no such pile
+		return self._index.get(card.id)
+
+	def counts(self):
+		# returns the number of cards left in each pile
+		return [pile.count for pile in self._piles]
+
+	def load_counts(self, counts):
+		# sets the number of cards left in each pile, as returned by counts()
+		for idx, count in enumerate(counts):
+			if self._piles[idx].count != count:
+				pile = self.own(idx)
+				pile.count    = count
+				pile.version += 1
+		self.empty_piles = sum(1 for pile in self._piles if pile.is_empty())
+
+	def provinces(self):
+		# returns the number of Provinces left
+		return self._piles[self._provinces].count
+
+	def clone(self):
+		# returns a copy of the supply that shares every pile with this one
+		copy = Supply.__new__(Supply)
+		copy._piles      = list(self._piles)
+		copy._owned      = [False] * len(self._piles)
+		copy._index      = self._index
+		copy._provinces  = self._provinces
+		copy.empty_piles = self.empty_piles
+		self._owned      = [False] * len(self._piles)
+		return copy
+
+	def own(self, idx):
+		# returns the pile at the given position, copied first if it is shared with a clone
+		if not self._owned[idx]:
+			pile = self._piles[idx]
+			copy = SupplyPile(pile.card, pile.count)
+			copy.version = pile.version
+			self._piles[idx] = copy
+			self._owned[idx] = True
+		return self._piles[idx]
+
+	def take(self, idx):
+		# removes a card from the pile at the given position and returns it
+		pile = self.own(idx)
+		card = pile.remove_card()
+		if pile.is_empty(): self.empty_piles += 1
+		return card
@@ -1,40 +1,66 @@
 import cards
 import player
-from copy import copy
-from random import shuffle
-from itertools import cycle
+import events
+import protocol
+from random import Random, SystemRandom
+
+# version of the snapshots returned by Dominion.snapshot()
+SNAPSHOT_VERSION = 1
+
+# what a frame of the decision stack returns each time it is run, see Dominion.resume()
+WAIT = 'wait'	# the frame is waiting for a player to choose
+DONE = 'done'	# the card has resolved, the frame is removed from the stack
+NEXT = 'next'	# the frame pushed another frame or moved to a step that does not need a choice
 
 class Dominion:
 	"""A class to represent the game of Dominion. 2 to 4 players.
 	   Manages the supply piles and player turns."""
 
-	def __init__(self, player_names=None):
+	def __init__(self, player_names=None, seed=None, kingdom=None):
 		# initializes the decks and supply piles
-		self.info_list = []
-		self.resolved  = True
-		self.coro      = None
+		# every shuffle in the game uses one generator, so a game started with the same seed
+		# and given the same inputs plays out the same way. a seed is picked when none is given
+		# kingdom is an optional list of 10 kingdom card ids to use instead of a random selection
+		if seed == None:
+			seed = SystemRandom().randrange(2 ** 32)
+		self.seed = seed
+		self.rng  = Random(seed)
+
+		# everything that happens in the game is queued as an event for the server to send
+		self.events = events.EventQueue()
+
+		# frames of the action cards waiting on decisions, the card played last is on top
+		# a frame is a dict of strings and numbers, see resume()
+		self._stack = []
+
+		# the index of the player whose turn it is, the number of turns played, and the state
+		# at the start of the current turn along with the inputs received since, see snapshot()
+		self.turn         = 0
+		self.turns        = 0
+		self._checkpoint  = None
+		self._turn_inputs = []
+
+		# versions of each zone as of the last call to changed_zones()
+		self._synced = {}
 
 		player_count = len(player_names)
 		assert player_count in {2, 3, 4}
 
 		self._players = []
 		for p in player_names:
-			self._players.append(player.Player(p))
+			self._players.append(player.Player(p, self.rng))
 
-		# initialize the treasure, victory, and kingdom cards
-		self.init_treasure_cards(player_count)
-		self.init_victory_cards(player_count)
-		self.init_kingdom_cards()
+		# initialize the treasure, victory, kingdom, and curse cards
+		# the piles are indexed in that order, the curses are the last pile
+		self._supply = cards.Supply(self.init_treasure_cards(player_count) +
+									self.init_victory_cards(player_count) +
+									self.init_kingdom_cards(kingdom) +
+									self.init_curse_cards(player_count))
+		self._curse_idx = self._supply.index(cards.CARDS['Curse'])
 
 		# the trash pile is empty
 		self._trash = cards.Cards()
 
-		# 10 curses for a 2 player game, 20 for 3 players, 30 for 4 players
-		self._curses = cards.Cards()
-		curse_amount = {2: 10, 3: 20, 4: 30}
-		for amount in range(curse_amount[player_count]):
-			self._curses.add_cards(cards.Card('Curse', 'Curse', 0))
-
 	def __getitem__(self, index):
 		# allows indexing to be performed on the class
 		try:
@@ -44,151 +70,131 @@ class Dominion:
 
 	def __len__(self):
 		# returns the total number of supply piles that are not empty
-		total = 0
-		for supply in [self._treasures, self._victories, self._kingdoms]:
-			for piles in supply:
-				if piles.is_empty() == False:
-					total += 1
-		if self._curses.is_empty() == False:
-			total += 1
+		return len(self._supply) - self._supply.empty_piles
 
-		return total
+	def player_names(self):
+		# returns the names of the players in turn order, the order their indices follow
+		return [p.name for p in self._players]
 
 	def init_treasure_cards(self, player_count):
-		# initializes the treasure cards
-		self._treasures = []
+		# returns the treasure piles
 
 		# 46 coppers for a 2 player game, 39 for 3 players, 32 for 4 players
-		coppers = cards.Cards()
 		copper_amount = {2: 46, 3: 39, 4: 32}
-		for amount in range(copper_amount[player_count]):
-			coppers.add_cards(cards.Card('Copper', 'Treasure', 0))
+		coppers = cards.SupplyPile(cards.CARDS['Copper'], copper_amount[player_count])
 
 		# 40 silvers
-		silvers = cards.Cards()
-		for amount in range(40):
-			silvers.add_cards(cards.Card('Silver', 'Treasure', 3))
+		silvers = cards.SupplyPile(cards.CARDS['Silver'], 40)
 
 		# 30 golds
-		golds = cards.Cards()
-		for amount in range(30):
-			golds.add_cards(cards.Card('Gold', 'Treasure', 6))
+		golds = cards.SupplyPile(cards.CARDS['Gold'], 30)
 
-		self._treasures.extend([coppers, silvers, golds])
+		return [coppers, silvers, golds]
 
 	def init_victory_cards(self, player_count):
-		# initializes the victory cards
-		self._victories = []
+		# returns the victory piles
 
 		# 8 of each victory card for a 2 player game, 12 for 3 or 4 players
-		estates   = cards.Cards()
-		duchies   = cards.Cards()
-		provinces = cards.Cards()
 		victory_amount = {2: 8, 3: 12, 4: 12}
-		for amount in range(victory_amount[player_count]):
-			estates.add_cards(cards.Card('Estate', 'Victory', 2))
-			duchies.add_cards(cards.Card('Duchy', 'Victory', 5))
-			provinces.add_cards(cards.Card('Province', 'Victory', 8))
+		estates   = cards.SupplyPile(cards.CARDS['Estate'],   victory_amount[player_count])
+		duchies   = cards.SupplyPile(cards.CARDS['Duchy'],    victory_amount[player_count])
+		provinces = cards.SupplyPile(cards.CARDS['Province'], victory_amount[player_count])
 
-		self._victories.extend([estates, duchies, provinces])
+		return [estates, duchies, provinces]
 
-	def init_kingdom_cards(self):
+	def init_kingdom_cards(self, kingdom=None):
 		# the kingdom cards has 10 supply piles.
 		# each supply pile has 10 of the same card from the randomizers list
-		self._kingdoms = []
-		randomizers = [
-			cards.Card('Cellar', 		'Action', 	2),
-			cards.Card('Chapel', 		'Action', 	2),
-			cards.Card('Moat', 			'Action', 	2),
-			cards.Card('Chancellor', 	'Action', 	3),
-			cards.Card('Village', 		'Action',	3),
-			cards.Card('Woodcutter', 	'Action',	3),
-			cards.Card('Workshop', 		'Action', 	3),
-			cards.Card('Bureaucrat', 	'Action', 	4),
-			cards.Card('Feast', 		'Action', 	4),
-			cards.Card('Gardens', 		'Victory', 	4),
-			cards.Card('Militia', 		'Action', 	4),
-			cards.Card('Moneylender', 	'Action', 	4),
-			cards.Card('Remodel', 		'Action', 	4),
-			cards.Card('Smithy', 		'Action', 	4),
-			cards.Card('Spy', 			'Action', 	4),
-			cards.Card('Thief', 		'Action', 	4),
-			cards.Card('Throne Room', 	'Action', 	4),
-			cards.Card('Council Room', 	'Action', 	5),
-			cards.Card('Festival', 		'Action', 	5),
-			cards.Card('Laboratory', 	'Action', 	5),
-			cards.Card('Library', 		'Action', 	5),
-			cards.Card('Market', 		'Action', 	5),
-			cards.Card('Mine', 			'Action', 	5),
-			cards.Card('Witch', 		'Action', 	5),
-			cards.Card('Adventurer', 	'Action', 	6),
-			]
+		kingdoms = []
+		randomizers = list(cards.KINGDOM)
 
 		# randomly select 10 cards to be the kingdom cards of the supply pile
-		shuffle(randomizers)
+		# the randomizers are shuffled even when the kingdom is given, so the same seed
+		# leads to the same shuffles for the rest of the game either way
+		self.rng.shuffle(randomizers)
+		if kingdom != None:
+			randomizers = [cards.CATALOG[card_id] for card_id in kingdom]
+		self.kingdom = tuple(card.id for card in randomizers[:10])
 		for pile_num in range(10):
-			pile = cards.Cards()
 			if randomizers[pile_num].name == 'Gardens':
 				if len(self._players) == 2:
-					card_copies = [copy(randomizers[pile_num]) for amount in range(8)]
+					pile = cards.SupplyPile(randomizers[pile_num], 8)
 				else:
-					card_copies = [copy(randomizers[pile_num]) for amount in range(12)]
+					pile = cards.SupplyPile(randomizers[pile_num], 12)
 			else:
-				card_copies = [copy(randomizers[pile_num]) for amount in range(10)]
-			pile.add_cards(card_copies)
-			self._kingdoms.append(pile)
+				pile = cards.SupplyPile(randomizers[pile_num], 10)
+			kingdoms.append(pile)
+
+		return kingdoms
+
+	def init_curse_cards(self, player_count):
+		# returns the curse pile
+		# 10 curses for a 2 player game, 20 for 3 players, 30 for 4 players
+		curse_amount = {2: 10, 3: 20, 4: 30}
+		return [cards.SupplyPile(cards.CARDS['Curse'], curse_amount[player_count])]
 
-	def game_loop(self):
+	def game_loop(self, resume=False):
 		# the main loop of the game, cycles through all players until game is over
 		# each player chooses to play a card from hand or several other options
-		for current_player in cycle(self._players):
-			current_player.actions = 1
-			current_player.buys    = 1
-			current_player.gold    = 0
+		# the name of the current player is yielded at the start of each turn
+		# with resume the loop carries on with the turn in progress instead of starting it, see clone()
+		while True:
+			current_player = self._players[self.turn]
+			if resume == False:
+				# a decision still pending when the last turn ended is dropped
+				self._stack = []
+				current_player.actions = 1
+				current_player.buys    = 1
+				current_player.gold    = 0
+				# the generator is seeded again at the start of every turn, so a checkpoint
+				# only has to hold the number of turns played to restore it
+				self.rng.seed((self.seed << 32) + self.turns)
+				self._checkpoint  = self.state()
+				self._turn_inputs = []
+			resume = False
 			first_move = True	
 			while current_player.buys > 0:
 				if first_move == True:
-					user_input = yield 'Turn:{}'.format(current_player.name)
+					user_input = yield current_player.name
 					first_move = False
 				else:
 					user_input = yield
-				info = user_input.split(':', 1)
-				info = info[1].split(':')
-				if info[0] == 'Play All Treasures':
+				self._turn_inputs.append(user_input)
+				# user_input is a protocol.Input, args holds the indices chosen by the player
+				if user_input.command == 'Play All Treasures':
 					self.play_all_treasures(current_player)
-				elif info[0] == 'End Turn':
+				elif user_input.command == 'End Turn':
 					break
-				elif info[0] == 'Play Card':
-					if self.resolved == True:
-						idx = int(info[1])
-						self.play_card(current_player, idx)
+				elif user_input.command == 'Play Card':
+					if self._stack == []:
+						if user_input.args:
+							self.play_card(current_player, user_input.args[0])
 					else:
-						try:
-							self.coro.send(info[1])
-						except StopIteration:
-							self.resolved = True
-				elif info[0] == 'Buy Card':
-					idx = int(info[1])
-					self.buy_card(current_player, idx)
+						self.resume(user_input.args)
+				elif user_input.command == 'Buy Card':
+					if user_input.args:
+						self.buy_card(current_player, user_input.args[0])
 
 			current_player.end_turn()
 			# end the game if all provinces or 3 supply piles are empty
-			if self._victories[2].is_empty() or len(self) <= 14:
+			if self._supply.provinces() == 0 or self._supply.empty_piles >= 3:
 				self.end_game()
+			self.turn   = (self.turn + 1) % len(self._players)
+			self.turns += 1
 
 	def play_card(self, current_player, idx):
 		# play a card from hand
 		if current_player[('hand', idx)].type == 'Action':
 			if current_player.actions == 0:
-				self.info_list.append('Private:{}:Error:You have no more actions, try again!'.format(current_player.name))
+				self.events.emit('error_no_actions', recipient=current_player.name)
 				return
 
 		if current_player[('hand', idx)].type == 'Victory':
-			self.info_list.append('Private:{}:Error:You cannot play a victory card, try again!'.format(current_player.name))
+			self.events.emit('error_play_victory', recipient=current_player.name)
 			return
 
 		if current_player[('hand', idx)].type == 'Curse':
-			self.info_list.append('Private:{}:Error:You cannot play a Curse, try again!'.format(current_player.name))
+			self.events.emit('error_play_curse', recipient=current_player.name)
 			return
 
 		card_to_play = current_player.remove_card('hand', idx)
@@ -198,13 +204,8 @@ class Dominion:
 			self.play_treasure(current_player)
 		elif current_player[('in play', -1)].type == 'Action':
 			current_player.actions -= 1
-			self.coro = self.play_action(current_player)
-			try:
-				next(self.coro)
-			except StopIteration:
-				self.resolved = True
-			else:
-				self.resolved = False
+			self.play_action(current_player)
+			self.resume()
 
 	def play_treasure(self, current_player):
 		# play a treasure from hand to increase gold count
@@ -217,7 +218,7 @@ class Dominion:
 		elif current_player[('in play', -1)].name == 'Gold':
 			current_player.gold += 3
 
-		self.info_list.append('Public:{} played a {}.'.format(current_player.name, current_player[('in play', -1)].name))
+		self.events.emit('played', actor=current_player.name, card=current_player[('in play', -1)].name)
 
 	def play_all_treasures(self, current_player):
 		# play all treasures from hand to increase gold count
@@ -231,93 +232,41 @@ class Dominion:
 	def buy_card(self, current_player, idx):
 		# allows players to buy cards from the supply piles
 		if current_player.buys <= 0:
-			self.info_list.append('Private:{}:Error:You have no more buys.'.format(current_player.name))
-
-		supply = []
-		supply.extend(self._treasures + self._victories + self._kingdoms)
-		supply.append(self._curses)
+			self.events.emit('error_no_buys', recipient=current_player.name)
 
-		if supply[idx].is_empty() == False:
-			if supply[idx][-1].cost <= current_player.gold:
-				card_to_buy = supply[idx].remove_card()
+		if self._supply[idx].is_empty() == False:
+			if self._supply[idx].card.cost <= current_player.gold:
+				card_to_buy = self._supply.take(idx)
 				current_player.gold -= card_to_buy.cost
 				current_player.buys -= 1
 				current_player.actions = 0
 				current_player.add_cards('discard', card_to_buy)
-				self.info_list.append('Public:{} bought a {}.'.format(current_player.name, card_to_buy.name))
+				self.events.emit('bought', actor=current_player.name, card=card_to_buy.name)
 			else:
-				self.info_list.append('Private:{}:Error:You cannot afford that card, try again!'.format(current_player.name))
+				self.events.emit('error_afford', recipient=current_player.name)
 		else:
-			self.info_list.append('Private:{}:Error:The supply pile for that card is empty, try again!'.format(current_player.name))
+			self.events.emit('error_buy_empty', recipient=current_player.name)
+
+	def other_players(self, current_player):
+		# the other players in turn order, starting with the player after the current player
+		current_idx = self._players.index(current_player)
+		return self._players[current_idx + 1:] + self._players[:current_idx]
 
 	def play_action(self, current_player):
-		# play an action card from hand
-		other_players = set(self._players) - set([current_player])
+		# play the action card on top of the player's cards in play
+		# cards that need a decision push a frame on the decision stack for resume() to run,
+		# every other card is resolved right away
 		played_card = current_player[('in play', -1)]
-		moat = cards.Card('Moat', 'Action', 2)
+		moat = cards.CARDS['Moat']
 		
-		self.info_list.append('Public:{} played a {}.'.format(current_player.name, played_card.name))
-
-		if played_card.name == 'Cellar':
-			current_player.actions += 1
-			if current_player.is_empty('hand'):
-				self.info_list.append('Public:{} has no cards to discard.'.format(current_player.name))
-				return
-
-			self.info_list.append('Private:{}:Select:Choose any number of cards to discard.'.format(current_player.name))
-			discard_list = yield
-			discard_list = discard_list[::-1]
-			discard_list = discard_list.split(' ')
-			self.info_list.append('Public:{} discarded '.format(current_player.name))
-			if discard_list == ['']:
-				self.info_list[-1] += 'no cards.'
-				return
-			for idx in discard_list:
-				discarded_card = current_player.remove_card('hand', int(idx))
-				if idx == discard_list[-1]:
-					self.info_list[-1] += discarded_card.name + '.'
-				else:
-					self.info_list[-1] += discarded_card.name + ', '
-				current_player.add_cards('discard', discarded_card)
-
-			for idx in discard_list:
-				current_player.draw_card()
-			self.info_list.append('Public:{} drew {} cards.'.format(current_player.name, len(discard_list)))
+		self.events.emit('played', actor=current_player.name, card=played_card.name)
 
-		elif played_card.name == 'Chapel':
-			if current_player.is_empty('hand'):
-				self.info_list.append('Public:{} has no cards to trash.'.format(current_player.name))
-				return
-
-			self.info_list.append('Private:{}:Select:Choose up to 4 cards to trash.'.format(current_player.name))
-			trash_list = yield
-			trash_list = trash_list[::-1]
-			trash_list = trash_list.split(' ')[:4]
-			self.info_list.append('Public:{} trashed '.format(current_player.name))
-			if trash_list == ['']:
-				self.info_list[-1] += 'no cards.'
-				return
-			for idx in trash_list:
-				trashed_card = current_player.remove_card('hand', int(idx))
-				if idx == trash_list[-1]:
-					self.info_list[-1] += trashed_card.name + '.'
-				else:
-					self.info_list[-1] += trashed_card.name + ', '
-				self._trash.add_cards(trashed_card)
+		if played_card.name in RESOLVERS:
+			self._stack.append({'card': played_card.name, 'step': 'start'})
 
 		elif played_card.name == 'Moat':
 			for amount in range(2): current_player.draw_card()
 
-		elif played_card.name == 'Chancellor':
-			current_player.gold += 2
-			self.info_list.append('Private:{}:Decision:Place deck into discard pile?:Yes:No'.format(current_player.name))
-			user_input = yield
-			if user_input == '0':
-				current_player.transfer_cards('deck', 'discard')
-				self.info_list.append('Public:{} placed deck into discard pile.'.format(current_player.name))
-			else:
-				self.info_list.append('Public:{} did not place deck into discard pile.'.format(current_player.name))
-
 		elif played_card.name == 'Village':
 			current_player.draw_card()
 			current_player.actions += 2
@@ -326,323 +275,47 @@ class Dominion:
 			current_player.buys += 1
 			current_player.gold += 2
 
-		elif played_card.name == 'Workshop':
-			self.info_list.append('Private:{}:Gain:Gain a card costing up to 4.'.format(current_player.name))
-			while True:
-				idx = yield
-				if self.gain_card(current_player, 4, int(idx), {'Treasure', 'Victory', 'Action'}): break
-				self.info_list.append('Private:{}:Gain:(blank)'.format(current_player.name))
-
 		elif played_card.name == 'Bureaucrat':
-			if self._treasures[1].is_empty() == False:
-				gained_silver = self._treasures[1].remove_card()
+			silvers = self._supply.index(cards.CARDS['Silver'])
+			if self._supply[silvers].is_empty() == False:
+				gained_silver = self._supply.take(silvers)
 				current_player.add_cards('deck', gained_silver)
-				self.info_list.append('Public:{} gained a Silver.'.format(current_player.name))
+				self.events.emit('gained', actor=current_player.name, card='Silver')
 			else:
-				self.info_list.append('Public:There are no more Silvers.')
+				self.events.emit('no_silvers')
 			
-			for others in other_players:
+			for others in self.other_players(current_player):
 				if moat in others:
-					self.info_list.append('Public:{} blocked the attack using Moat.'.format(others.name))
+					self.events.emit('moat_blocked', actor=others.name)
 					continue
 				for idx, card in enumerate(others):
 					if card.name in {'Estate', 'Duchy', 'Province', 'Gardens'}:
 						removed_victory = others.remove_card('hand', idx)
 						others.add_cards('deck', removed_victory)
-						self.info_list.append('Public:{} placed {} on top of his deck.'.format(others.name, card.name))
+						self.events.emit('topdecked', actor=others.name, card=card.name)
 						break
 				else:
-					card_list = [card.name for card in others]
-					card_string = 'Public:{} revealed '.format(others.name) + ', '.join(card_list) + '.'
-					self.info_list.append(card_string)
-
-		elif played_card.name == 'Feast':
-			feast = current_player.remove_card('in play')
-			self._trash.add_cards(feast)
-			self.info_list.append('Private:{}:Gain:Gain a card costing up to 5.'.format(current_player.name))
-			while True:
-				idx = yield
-				if self.gain_card(current_player, 5, int(idx), {'Treasure', 'Victory', 'Action'}): break
-				self.info_list.append('Private:{}:Gain:(blank)'.format(current_player.name))
-
-		elif played_card.name == 'Militia':
-			current_player.gold += 2
-			for others in other_players:
-				if others.length('hand') <= 3:
-					self.info_list.append('Public:{} has 3 or fewer cards in hand.'.format(others.name))
-					continue
-				if moat in others:
-					self.info_list.append('Public:{} blocked the attack using Moat.'.format(others.name))
-					continue
-
-				self.info_list.append('Private:{}:Suspend:Waiting for {} to discard...'.format(current_player.name, others.name))
-				self.info_list.append('Private:{}:Discard:Discard down to 3 cards.'.format(others.name))
-				card_names = 'Public:{} discarded '.format(others.name)
-				while True:
-					discard_list = yield
-					discard_list = discard_list[::-1]
-					discard_list = discard_list.split(' ')
-					if discard_list == ['']:
-						self.info_list.append('Private:{}:Error:You must select cards to discard, try again!'.format(others.name))
-						self.info_list.append('Private:{}:Suspend:(blank)'.format(current_player.name, others.name))
-						self.info_list.append('Private:{}:Discard:(blank)'.format(others.name))
-						continue
-					elif others.length('hand') - len(discard_list) == 3:
-						for idx in discard_list:
-							discarded_card = others.remove_card('hand', int(idx))
-							if idx == discard_list[-1]:
-								card_names += discarded_card.name + '.'
-							else:
-								card_names += discarded_card.name + ', '
-							others.add_cards('discard', discarded_card)
-						self.info_list.append(card_names)
-						break
-					else:
-						self.info_list.append('Private:{}:Error:You must discard down to 3, try again!'.format(others.name))
-						self.info_list.append('Private:{}:Suspend:(blank)'.format(current_player.name, others.name))
-						self.info_list.append('Private:{}:Discard:(blank)'.format(others.name))
-			self.info_list.append('Private:{}:Resume:(blank)'.format(current_player.name))
+					self.events.emit('revealed_cards', actor=others.name, cards=tuple(card.name for card in others))
 
 		elif played_card.name == 'Moneylender':
 			for idx, card in enumerate(current_player):
 				if card.name == 'Copper':
 					trashed_copper = current_player.remove_card('hand', idx)
-					self.info_list.append('Public:{} trashed a Copper.'.format(current_player.name))
+					self.events.emit('trashed', actor=current_player.name, card='Copper')
 					self._trash.add_cards(trashed_copper)
 					current_player.gold += 3
 					return
 			else:
-				self.info_list.append('Public:{} does not have a Copper to trash.'.format(current_player.name))
-
-		elif played_card.name == 'Remodel':
-			if current_player.is_empty('hand'):
-				self.info_list.append("Public:{}'s hand is empty.".format(current_player.name))
-				return
-
-			self.info_list.append('Private:{}:Select:Choose a card to trash.'.format(current_player.name))
-			while True:
-				idx = yield
-				if idx != '':
-					break
-				self.info_list.append('Private:{}:Error:You must select a card to trash, try again!'.format(current_player.name))
-				self.info_list.append('Private:{}:Select:(blank)'.format(current_player.name))
-
-			idx = int(idx.split(' ')[0])
-			trashed_card = current_player.remove_card('hand', idx)
-			self._trash.add_cards(trashed_card)	
-			self.info_list.append('Public:{} trashed a {}.'.format(current_player.name, trashed_card.name))
-			self.info_list.append('Private:{}:Gain:Gain a card costing up to {}.'.format(current_player.name, trashed_card.cost + 2))		
-			while True:
-				idx = yield
-				if self.gain_card(current_player, trashed_card.cost + 2, int(idx), {'Treasure', 'Victory', 'Action'}): break
-				self.info_list.append('Private:{}:Gain:(blank)'.format(current_player.name))
+				self.events.emit('no_copper', actor=current_player.name)
 
 		elif played_card.name == 'Smithy':
 			for amount in range(3): current_player.draw_card()
 
-		elif played_card.name == 'Spy':
-			current_player.draw_card()
-			current_player.actions += 1
-			for p in self._players:
-				if p in other_players:
-					if moat in p:
-						self.info_list.append('Public:{} blocked the attack using Moat.'.format(p.name))
-						continue
-				if p.is_empty('deck'):
-					if p.is_empty('discard'):
-						print('Public:{} cannot reveal a card.'.format(p.name))
-						continue
-					p.transfer_cards('discard', 'deck')
-					p.shuffle()
-				revealed_card = p[('deck', -1)]
-				self.info_list.append('Public:{} revealed a {}.'.format(p.name, revealed_card.name))
-				if p in other_players:
-					self.info_list.append('Private:{}:Decision:Make {} discard the revealed {}?:Yes:No'.format(current_player.name, p.name, revealed_card.name))
-				else:
-					self.info_list.append('Private:{}:Decision:Discard the revealed {}?:Yes:No'.format(current_player.name, revealed_card.name))
-				user_input = yield
-				if user_input == '0':
-					revealed_card = p.remove_card('deck')
-					p.add_cards('discard', revealed_card)
-					self.info_list.append('Public:{} discarded the {}.'.format(p.name, revealed_card.name))
-				else:
-					self.info_list.append('Public:{} did not discard the {}.'.format(p.name, revealed_card.name))
-
-		elif played_card.name == 'Thief':
-			for others in other_players:
-				trashed = False
-				if moat in others:
-					self.info_list.append('Public:{} blocked the attack using Moat.'.format(others.name))
-					continue
-				revealed_cards = []
-				for amount in range(2):
-					if others.is_empty('deck'):
-						if others.is_empty('discard'): break
-						others.transfer_cards('discard', 'deck')
-						others.shuffle()
-					revealed_cards.append(others.remove_card('deck'))
-
-				if revealed_cards == []:
-					self.info_list.append('Public:{} could not reveal any cards.'.format(others.name))
-					continue
-
-				card_names = [card.name for card in revealed_cards]
-				self.info_list.append('Public:{} revealed '.format(others.name) + ', '.join(card_names) + '.')
-				for card in card_names:
-					if card in {'Copper', 'Silver', 'Gold'}: break
-				else:
-					self.info_list.append('Public:{} had no treasures to reveal.'.format(others.name))
-					others.add_cards('discard', revealed_cards)
-					self.info_list.append('Public:{} discarded '.format(others.name) + ', '.join(card_names) + '.')
-					continue
-				
-				treasure_count = card_names.count('Copper') + card_names.count('Silver') + card_names.count('Gold')
-				if treasure_count == 1:
-					if card_names[0] in {'Copper', 'Silver', 'Gold'}:
-						idx = 0
-					else:
-						idx = 1
-					trashed_card = revealed_cards.pop(idx)
-					self._trash.add_cards(trashed_card)
-					trashed = True
-					self.info_list.append('Public:{} trashed the revealed {}.'.format(others.name, card_names[idx]))
-				else:
-					self.info_list.append('Private:{}:Decision:Make {} trash the {} or {}?:{}:{}'.format(current_player.name, others.name,
-																								card_names[0], card_names[1], 
-																							  	card_names[0], card_names[1]))
-					user_input = yield
-					if user_input == '0':
-						trashed_card = revealed_cards.pop(0)
-					else:               
-						trashed_card = revealed_cards.pop(1)
-
-					self._trash.add_cards(trashed_card)
-					trashed = True
-					self.info_list.append('Public:{} trashed the revealed {}.'.format(others.name, trashed_card.name))
-
-				if revealed_cards != []:
-					self.info_list.append('Public:{} discarded the revealed {}.'.format(others.name, revealed_cards[0].name))
-					others.add_cards('discard', revealed_cards)
-
-				if trashed == True:
-					self.info_list.append('Private:{}:Decision:Gain the trashed {}?:Yes:No'.format(current_player.name, trashed_card.name))
-					user_input = yield
-					if user_input == '0':
-						gained_card = self._trash.remove_card()
-						current_player.add_cards('discard', gained_card)
-						self.info_list.append('Public:{} gained the trashed {}.'.format(current_player.name, gained_card.name))
-					else:
-						self.info_list.append('Public:{} did not gain the trashed {}.'.format(current_player.name, trashed_card.name))
-
-		elif played_card.name == 'Throne Room':
-			if current_player.is_empty('hand'):
-				self.info_list.append('Public:{} has no cards in hand.'.format(current_player.name))
-				return
-			for card in current_player:
-				if card.type == 'Action': break
-			else:
-				self.info_list.append('Public:{} has no actions to choose from.'.format(current_player.name))
-				return
-
-			self.info_list.append('Private:{}:Select:Choose an action card.'.format(current_player.name))
-			while True:
-				idx = yield
-				if idx == '':
-					self.info_list.append('Private:{}:Error:You must select a card from your hand, try again!'.format(current_player.name))
-				else:
-					idx = int(idx.split(' ')[0])
-					if current_player[('hand', idx)].type == 'Action':
-						break
-					else:
-						self.info_list.append('Private:{}:Error:You must select an action card, try again!'.format(current_player.name))
-				self.info_list.append('Private:{}:Select:(blank)'.format(current_player.name))
-
-			# feast and throne room are special cases
-			if current_player[('hand', idx)].name == 'Feast':
-				card_to_play = current_player.remove_card('hand', idx)
-				current_player.add_cards('in play', card_to_play)
-				coro = self.play_action(current_player)
-				try:
-					next(coro)
-				except StopIteration:
-					pass
-				else:
-					while True:
-						info = yield
-						try:
-							coro.send(info)
-						except StopIteration:
-							break
-
-				card_to_play = self._trash.remove_card()
-				current_player.add_cards('in play', card_to_play)
-				coro = self.play_action(current_player)
-				try:
-					next(coro)
-				except StopIteration:
-					pass
-				else:
-					while True:
-						info = yield
-						try:
-							coro.send(info)
-						except StopIteration:
-							break
-
-			elif current_player[('hand', idx)].name == 'Throne Room':
-				card_to_play = current_player.remove_card('hand', idx)
-				current_player.add_cards('in play', card_to_play)
-				coro = self.play_action(current_player)
-				try:
-					next(coro)
-				except StopIteration:
-					pass
-				else:
-					while True:
-						info = yield
-						try:
-							coro.send(info)
-						except StopIteration:
-							break
-
-				card_to_play = current_player.remove_card('in play', -2)
-				current_player.add_cards('in play', card_to_play)
-				coro = self.play_action(current_player)
-				try:
-					next(coro)
-				except StopIteration:
-					pass
-				else:
-					while True:
-						info = yield
-						try:
-							coro.send(info)
-						except StopIteration:
-							break
-
-			else:
-				card_to_play = current_player.remove_card('hand', idx)
-				current_player.add_cards('in play', card_to_play)
-
-				for amt in range(2):
-					coro = self.play_action(current_player)
-					try:
-						next(coro)
-					except StopIteration:
-						pass
-					else:
-						while True:
-							info = yield
-							try:
-								coro.send(info)
-							except StopIteration:
-								break
-
 		elif played_card.name == 'Council Room':
 			for amount in range(4):
 				current_player.draw_card()
 			current_player.buys += 1
-			for others in other_players:
+			for others in self.other_players(current_player):
 				others.draw_card()
 
 		elif played_card.name == 'Festival':
@@ -655,85 +328,23 @@ class Dominion:
 				current_player.draw_card()
 			current_player.actions += 1
 
-		elif played_card.name == 'Library':
-			set_aside = []
-			while current_player.length('hand') < 7:
-				if current_player.is_empty('deck'):
-					if current_player.is_empty('discard'):
-						self.info_list.append('Public:{} cannot draw anymore cards.'.format(current_player.name))
-						break
-					current_player.transfer_cards('discard', 'deck')
-					current_player.shuffle()
-				removed_card = current_player.remove_card('deck')
-				self.info_list.append('Public:{} drew a {}.'.format(current_player.name, removed_card.name))
-				if removed_card.type == 'Action':
-					self.info_list.append('Private:{}:Decision:Set aside the {}?:Yes:No'.format(current_player.name, removed_card.name))
-					user_input = yield
-					if user_input == '0':
-						set_aside.append(removed_card)
-						self.info_list.append('Public:{} set {} aside.'.format(current_player.name, removed_card.name))
-					else:
-						current_player.add_cards('hand', removed_card)
-						self.info_list.append('Public:{} did not set {} aside.'.format(current_player.name, removed_card.name))
-				else:
-					current_player.add_cards('hand', removed_card)
-			if set_aside != []:
-				current_player.add_cards('discard', set_aside)
-
 		elif played_card.name == 'Market':
 			current_player.draw_card()
 			current_player.actions += 1
 			current_player.buys    += 1
 			current_player.gold    += 1
 
-		elif played_card.name == 'Mine':
-			if current_player.is_empty('hand'):
-				self.info_list.append("Public:{}'s hand is empty.".format(current_player.name))
-				return
-
-			card_list = [card.name for card in current_player]
-			for card in card_list:
-				if card in {'Copper', 'Silver', 'Gold'}: break
-			else:
-				self.info_list.append('Public:{} has no treasures in hand.'.format(current_player.name))
-				return
-
-			self.info_list.append('Private:{}:Select:Choose a treasure card to trash.'.format(current_player.name))
-			while True:
-				idx = yield
-				if idx == '':
-					self.info_list.append('Private:{}:Error:You must choose a card to trash, try again!'.format(current_player.name))
-				else:
-					idx = int(idx.split(' ')[0])
-					if current_player[('hand', idx)].type == 'Treasure':
-						trashed_card = current_player.remove_card('hand', idx)
-						self._trash.add_cards(trashed_card)	
-						self.info_list.append('Public:{} trashed a {}.'.format(current_player.name, trashed_card.name))
-						break
-					else:
-						self.info_list.append('Private:{}:Error:That is not a treasure card, try again!'.format(current_player.name))
-				self.info_list.append('Private:{}:Select:(blank)'.format(current_player.name))
-
-			self.info_list.append('Private:{}:Gain:Gain a treasure card costing up to {}.'.format(current_player.name, trashed_card.cost + 3))		
-			while True:
-				idx = yield
-				if self.gain_card(current_player, trashed_card.cost + 3, int(idx), {'Treasure'}):
-					gained_card = current_player.remove_card('discard', -1)
-					current_player.add_cards('hand', gained_card)
-					break
-				self.info_list.append('Private:{}:Gain:(blank)'.format(current_player.name))
-
 		elif played_card.name == 'Witch':
 			for amount in range(2): current_player.draw_card()
-			for others in other_players:
+			for others in self.other_players(current_player):
 				if moat in others:
-					self.info_list.append('Public:{} blocked the attack using Moat.'.format(others.name))
+					self.events.emit('moat_blocked', actor=others.name)
 					continue
-				if self._curses.is_empty() == False:
-					others.add_cards('discard', self._curses.remove_card())
-					self.info_list.append('Public:{} gained a Curse.'.format(others.name))
+				if self._supply[self._curse_idx].is_empty() == False:
+					others.add_cards('discard', self._supply.take(self._curse_idx))
+					self.events.emit('gained', actor=others.name, card='Curse')
 				else:
-					self.info_list.append('Public:There are no more Curses. Yay...')
+					self.events.emit('no_curses')
 					return
 
 		elif played_card.name == 'Adventurer':
@@ -742,13 +353,13 @@ class Dominion:
 			while treasures_revealed < 2:
 				if current_player.is_empty('deck'):
 					if current_player.is_empty('discard'):	
-						self.info_list.append('Public:{} cannot draw anymore cards.'.format(current_player.name))
+						self.events.emit('cannot_draw', actor=current_player.name)
 						break
 					current_player.transfer_cards('discard', 'deck')
 					current_player.shuffle()
 
 				temp = current_player.remove_card('deck')
-				self.info_list.append('Public:{} revealed a {}.'.format(current_player.name, temp.name))
+				self.events.emit('revealed', actor=current_player.name, card=temp.name)
 				revealed.append(temp)	
 				if revealed[-1].type == 'Treasure':
 					current_player.add_cards('hand', revealed.pop())
@@ -757,73 +368,675 @@ class Dominion:
 			if revealed != []:
 				current_player.add_cards('discard', revealed)
 
+	def resume(self, user_input=None):
+		# runs the decision stack until the frame on top waits for a player or the stack is empty
+		# user_input holds the indices chosen by the player and is only given to the frame on top,
+		# a frame resumed after the frames it pushed have resolved is given None
+		current_player = self._players[self.turn]
+		while self._stack:
+			frame  = self._stack[-1]
+			status = RESOLVERS[frame['card']](self, frame, current_player, user_input)
+			user_input = None
+			if status == WAIT:
+				return
+			if status == DONE:
+				self._stack.pop()
+
+	def decision(self):
+		# returns the frame of the card waiting for a player to choose, or None if nothing is pending
+		return self._stack[-1] if self._stack else None
+
+	def to_move(self):
+		# returns the index of the player who has to choose next
+		# only Militia asks a player other than the current player to choose
+		frame = self.decision()
+		if frame != None and frame['card'] == 'Militia':
+			return (self.turn + 1 + frame['target']) % len(self._players)
+		return self.turn
+
+	def check_input(self, user_input):
+		# raises ValueError unless every index of a game input points at something that exists
+		# whether the move is allowed is left to the game loop, which answers with an error event
+		# while a card waits for a choice the indices are positions in the hand of the player who has to
+		# choose, supply piles for a gain, or 0 and 1 for the options of a decision
+		command, args = user_input.command, user_input.args
+		frame = self.decision()
+		if command in {'Play All Treasures', 'End Turn'}:
+			bound, counts = 0, (0,)
+		elif command == 'Buy Card':
+			bound, counts = len(self._supply), (1,)
+		elif command != 'Play Card':
+			raise ValueError('unknown command {}'.format(command))
+		elif frame == None:
+			bound, counts = self._players[self.turn].length('hand'), (1,)
+		elif frame['step'] == 'gain':
+			bound, counts = len(self._supply), (0, 1)
+		elif frame['card'] in HAND_CHOICES:
+			bound, counts = self._players[self.to_move()].length('hand'), None
+		else:
+			bound, counts = 2, (0, 1)
+		if counts != None and len(args) not in counts:
+			raise ValueError('{} takes {} {} here, not {}'.format(command, ' or '.join(map(str, counts)),
+															   'index' if counts == (1,) else 'indices', len(args)))
+		if any(idx >= bound for idx in args):
+			raise ValueError('the indices of {} have to be less than {}'.format(command, bound))
+		if len(set(args)) != len(args):
+			raise ValueError('the indices of {} have to be different'.format(command))
+
+	# functions that resolve the action cards that need decisions, one step at a time
+	# each is given the frame of the card on top of the decision stack, which holds the step the
+	# card is at along with anything the card has to remember between steps, made of strings and
+	# numbers only. returns WAIT, DONE or NEXT, see resume()
+	def resolve_cellar(self, frame, current_player, user_input):
+		if frame['step'] == 'start':
+			current_player.actions += 1
+			if current_player.is_empty('hand'):
+				self.events.emit('no_cards_to_discard', actor=current_player.name)
+				return DONE
+			self.events.emit('select_discard', recipient=current_player.name)
+			frame['step'] = 'discard'
+			return WAIT
+
+		discard_list = sorted(user_input, reverse=True)
+		if discard_list == []:
+			self.events.emit('discarded_cards', actor=current_player.name, cards=())
+			return DONE
+		card_names = []
+		for idx in discard_list:
+			discarded_card = current_player.remove_card('hand', idx)
+			card_names.append(discarded_card.name)
+			current_player.add_cards('discard', discarded_card)
+		self.events.emit('discarded_cards', actor=current_player.name, cards=tuple(card_names))
+
+		for idx in discard_list:
+			current_player.draw_card()
+		self.events.emit('drew_cards', actor=current_player.name, amount=len(discard_list))
+		return DONE
+
+	def resolve_chapel(self, frame, current_player, user_input):
+		if frame['step'] == 'start':
+			if current_player.is_empty('hand'):
+				self.events.emit('no_cards_to_trash', actor=current_player.name)
+				return DONE
+			self.events.emit('select_trash_4', recipient=current_player.name)
+			frame['step'] = 'trash'
+			return WAIT
+
+		trash_list = sorted(user_input, reverse=True)[:4]
+		if trash_list == []:
+			self.events.emit('trashed_cards', actor=current_player.name, cards=())
+			return DONE
+		card_names = []
+		for idx in trash_list:
+			trashed_card = current_player.remove_card('hand', idx)
+			card_names.append(trashed_card.name)
+			self._trash.add_cards(trashed_card)
+		self.events.emit('trashed_cards', actor=current_player.name, cards=tuple(card_names))
+		return DONE
+
+	def resolve_chancellor(self, frame, current_player, user_input):
+		if frame['step'] == 'start':
+			current_player.gold += 2
+			self.events.emit('decide_discard_deck', recipient=current_player.name)
+			frame['step'] = 'decide'
+			return WAIT
+
+		if user_input == (0,):
+			current_player.transfer_cards('deck', 'discard')
+			self.events.emit('deck_discarded', actor=current_player.name)
+		else:
+			self.events.emit('deck_not_discarded', actor=current_player.name)
+		return DONE
+
+	def resolve_gain(self, frame, current_player, user_input, card_type={'Treasure', 'Victory', 'Action'}):
+		# the step shared by every card that gains a card costing up to frame['cost']
+		if user_input and self.gain_card(current_player, frame['cost'], user_input[0], card_type):
+			return DONE
+		self.events.emit('gain_again', recipient=current_player.name)
+		return WAIT
+
+	def resolve_workshop(self, frame, current_player, user_input):
+		if frame['step'] == 'start':
+			self.events.emit('gain', recipient=current_player.name, amount=4)
+			frame['step'] = 'gain'
+			frame['cost'] = 4
+			return WAIT
+		return self.resolve_gain(frame, current_player, user_input)
+
+	def resolve_feast(self, frame, current_player, user_input):
+		if frame['step'] == 'start':
+			feast = current_player.remove_card('in play')
+			self._trash.add_cards(feast)
+			self.events.emit('gain', recipient=current_player.name, amount=5)
+			frame['step'] = 'gain'
+			frame['cost'] = 5
+			return WAIT
+		return self.resolve_gain(frame, current_player, user_input)
+
+	def resolve_militia(self, frame, current_player, user_input):
+		# frame['target'] is the position in other_players() of the player discarding
+		other_players = self.other_players(current_player)
+		moat = cards.CARDS['Moat']
+		if frame['step'] == 'start':
+			current_player.gold += 2
+			frame['step']   = 'next'
+			frame['target'] = 0
+
+		if frame['step'] == 'next':
+			while frame['target'] < len(other_players):
+				others = other_players[frame['target']]
+				if others.length('hand') <= 3:
+					self.events.emit('few_cards_in_hand', actor=others.name)
+					frame['target'] += 1
+					continue
+				if moat in others:
+					self.events.emit('moat_blocked', actor=others.name)
+					frame['target'] += 1
+					continue
+
+				self.events.emit('suspend', recipient=current_player.name, target=others.name)
+				self.events.emit('discard_to_3', recipient=others.name)
+				frame['step'] = 'discard'
+				return WAIT
+			self.events.emit('resume', recipient=current_player.name)
+			return DONE
+
+		others = other_players[frame['target']]
+		discard_list = sorted(user_input, reverse=True)
+		if discard_list == []:
+			self.events.emit('error_no_discard', recipient=others.name)
+			self.events.emit('suspend_again', recipient=current_player.name)
+			self.events.emit('discard_again', recipient=others.name)
+			return WAIT
+		elif others.length('hand') - len(discard_list) == 3:
+			card_names = []
+			for idx in discard_list:
+				discarded_card = others.remove_card('hand', idx)
+				card_names.append(discarded_card.name)
+				others.add_cards('discard', discarded_card)
+			self.events.emit('discarded_cards', actor=others.name, cards=tuple(card_names))
+			frame['step']    = 'next'
+			frame['target'] += 1
+			return NEXT
+		else:
+			self.events.emit('error_discard_to_3', recipient=others.name)
+			self.events.emit('suspend_again', recipient=current_player.name)
+			self.events.emit('discard_again', recipient=others.name)
+			return WAIT
+
+	def resolve_remodel(self, frame, current_player, user_input):
+		if frame['step'] == 'start':
+			if current_player.is_empty('hand'):
+				self.events.emit('hand_empty', actor=current_player.name)
+				return DONE
+			self.events.emit('select_trash', recipient=current_player.name)
+			frame['step'] = 'trash'
+			return WAIT
+
+		if frame['step'] == 'trash':
+			if user_input == ():
+				self.events.emit('error_select_trash', recipient=current_player.name)
+				self.events.emit('select_again', recipient=current_player.name)
+				return WAIT
+			trashed_card = current_player.remove_card('hand', user_input[0])
+			self._trash.add_cards(trashed_card)	
+			self.events.emit('trashed', actor=current_player.name, card=trashed_card.name)
+			self.events.emit('gain', recipient=current_player.name, amount=trashed_card.cost + 2)
+			frame['step'] = 'gain'
+			frame['cost'] = trashed_card.cost + 2
+			return WAIT
+		return self.resolve_gain(frame, current_player, user_input)
+
+	def resolve_spy(self, frame, current_player, user_input):
+		# frame['target'] is the position in the list of players of the player revealing a card,
+		# every player reveals a card, starting with the first player
+		moat = cards.CARDS['Moat']
+		if frame['step'] == 'start':
+			current_player.draw_card()
+			current_player.actions += 1
+			frame['step']   = 'next'
+			frame['target'] = 0
+
+		if frame['step'] == 'next':
+			while frame['target'] < len(self._players):
+				p = self._players[frame['target']]
+				if p is not current_player:
+					if moat in p:
+						self.events.emit('moat_blocked', actor=p.name)
+						frame['target'] += 1
+						continue
+				if p.is_empty('deck'):
+					if p.is_empty('discard'):
+						self.events.emit('cannot_reveal', actor=p.name)
+						frame['target'] += 1
+						continue
+					p.transfer_cards('discard', 'deck')
+					p.shuffle()
+				revealed_card = p[('deck', -1)]
+				self.events.emit('revealed', actor=p.name, card=revealed_card.name)
+				if p is not current_player:
+					self.events.emit('decide_spy_other', recipient=current_player.name, target=p.name, card=revealed_card.name)
+				else:
+					self.events.emit('decide_spy_self', recipient=current_player.name, card=revealed_card.name)
+				frame['step'] = 'decide'
+				return WAIT
+			return DONE
+
+		p = self._players[frame['target']]
+		if user_input == (0,):
+			revealed_card = p.remove_card('deck')
+			p.add_cards('discard', revealed_card)
+			self.events.emit('discarded', actor=p.name, card=revealed_card.name)
+		else:
+			self.events.emit('not_discarded', actor=p.name, card=p[('deck', -1)].name)
+		frame['step']    = 'next'
+		frame['target'] += 1
+		return NEXT
+
+	def resolve_thief(self, frame, current_player, user_input):
+		# frame['target'] is the position in other_players() of the player being robbed,
+		# frame['revealed'] holds the ids of the cards they revealed, frame['choice'] is the position
+		# of the revealed card to trash and frame['trashed'] is the id of the trashed card
+		other_players = self.other_players(current_player)
+		moat = cards.CARDS['Moat']
+		if frame['step'] == 'start':
+			frame['step']   = 'next'
+			frame['target'] = 0
+
+		if frame['step'] == 'next':
+			while frame['target'] < len(other_players):
+				others = other_players[frame['target']]
+				if moat in others:
+					self.events.emit('moat_blocked', actor=others.name)
+					frame['target'] += 1
+					continue
+				revealed_cards = []
+				for amount in range(2):
+					if others.is_empty('deck'):
+						if others.is_empty('discard'): break
+						others.transfer_cards('discard', 'deck')
+						others.shuffle()
+					revealed_cards.append(others.remove_card('deck'))
+
+				if revealed_cards == []:
+					self.events.emit('could_not_reveal', actor=others.name)
+					frame['target'] += 1
+					continue
+
+				card_names = [card.name for card in revealed_cards]
+				self.events.emit('revealed_cards', actor=others.name, cards=tuple(card_names))
+				for card in card_names:
+					if card in {'Copper', 'Silver', 'Gold'}: break
+				else:
+					self.events.emit('no_treasures_revealed', actor=others.name)
+					others.add_cards('discard', revealed_cards)
+					self.events.emit('discarded_cards', actor=others.name, cards=tuple(card_names))
+					frame['target'] += 1
+					continue
+
+				frame['revealed'] = [card.id for card in revealed_cards]
+				treasure_count = card_names.count('Copper') + card_names.count('Silver') + card_names.count('Gold')
+				if treasure_count == 1:
+					# the only treasure revealed is trashed without asking
+					frame['choice'] = 0 if card_names[0] in {'Copper', 'Silver', 'Gold'} else 1
+					frame['step']   = 'trash'
+					return NEXT
+				self.events.emit('decide_thief_trash', recipient=current_player.name, target=others.name, cards=tuple(card_names))
+				frame['step'] = 'decide'
+				return WAIT
+			return DONE
+
+		others = other_players[frame['target']]
+		if frame['step'] == 'decide':
+			frame['choice'] = 0 if user_input == (0,) else 1
+			frame['step']   = 'trash'
+
+		if frame['step'] == 'trash':
+			revealed_cards = [cards.CATALOG[card_id] for card_id in frame['revealed']]
+			trashed_card = revealed_cards.pop(frame['choice'])
+			self._trash.add_cards(trashed_card)
+			self.events.emit('trashed_revealed', actor=others.name, card=trashed_card.name)
+
+			if revealed_cards != []:
+				self.events.emit('discarded_revealed', actor=others.name, card=revealed_cards[0].name)
+				others.add_cards('discard', revealed_cards)
+
+			self.events.emit('decide_gain_trashed', recipient=current_player.name, card=trashed_card.name)
+			frame['trashed'] = trashed_card.id
+			frame['step']    = 'gain'
+			return WAIT
+
+		if user_input == (0,):
+			gained_card = self._trash.remove_card()
+			current_player.add_cards('discard', gained_card)
+			self.events.emit('gained_trashed', actor=current_player.name, card=gained_card.name)
+		else:
+			self.events.emit('not_gained_trashed', actor=current_player.name, card=cards.CATALOG[frame['trashed']].name)
+		frame['step']    = 'next'
+		frame['target'] += 1
+		return NEXT
+
+	def resolve_throne_room(self, frame, current_player, user_input):
+		# the chosen card is played by pushing its frame above this one, once it has resolved
+		# this frame is resumed to play it a second time
+		if frame['step'] == 'start':
+			if current_player.is_empty('hand'):
+				self.events.emit('no_cards_in_hand', actor=current_player.name)
+				return DONE
+			for card in current_player:
+				if card.type == 'Action': break
+			else:
+				self.events.emit('no_actions', actor=current_player.name)
+				return DONE
+			self.events.emit('select_action', recipient=current_player.name)
+			frame['step'] = 'select'
+			return WAIT
+
+		if frame['step'] == 'select':
+			if user_input == ():
+				self.events.emit('error_no_selection', recipient=current_player.name)
+				self.events.emit('select_again', recipient=current_player.name)
+				return WAIT
+			idx = user_input[0]
+			if current_player[('hand', idx)].type != 'Action':
+				self.events.emit('error_not_action', recipient=current_player.name)
+				self.events.emit('select_again', recipient=current_player.name)
+				return WAIT
+
+			card_to_play = current_player.remove_card('hand', idx)
+			current_player.add_cards('in play', card_to_play)
+			# feast and throne room are special cases when played the second time
+			if card_to_play.name == 'Feast':
+				frame['step'] = 'replay feast'
+			elif card_to_play.name == 'Throne Room':
+				frame['step'] = 'replay throne room'
+			else:
+				frame['step'] = 'replay'
+			self.play_action(current_player)
+			return NEXT
+
+		if frame['step'] == 'replay feast':
+			# the feast trashed itself, take it back from the trash
+			card_to_play = self._trash.remove_card()
+			current_player.add_cards('in play', card_to_play)
+		elif frame['step'] == 'replay throne room':
+			# the throne room is below the card it played, move it back on top
+			card_to_play = current_player.remove_card('in play', -2)
+			current_player.add_cards('in play', card_to_play)
+		elif frame['step'] == 'played twice':
+			return DONE
+		frame['step'] = 'played twice'
+		self.play_action(current_player)
+		return NEXT
+
+	def resolve_library(self, frame, current_player, user_input):
+		# frame['drawn'] is the id of the action card drawn that the player decides to set aside or not,
+		# frame['set aside'] holds the ids of the cards set aside
+		if frame['step'] == 'start':
+			frame['step']      = 'draw'
+			frame['set aside'] = []
+
+		if frame['step'] == 'decide':
+			removed_card = cards.CATALOG[frame['drawn']]
+			if user_input == (0,):
+				frame['set aside'].append(removed_card.id)
+				self.events.emit('set_aside', actor=current_player.name, card=removed_card.name)
+			else:
+				current_player.add_cards('hand', removed_card)
+				self.events.emit('not_set_aside', actor=current_player.name, card=removed_card.name)
+			frame['step'] = 'draw'
+
+		while current_player.length('hand') < 7:
+			if current_player.is_empty('deck'):
+				if current_player.is_empty('discard'):
+					self.events.emit('cannot_draw', actor=current_player.name)
+					break
+				current_player.transfer_cards('discard', 'deck')
+				current_player.shuffle()
+			removed_card = current_player.remove_card('deck')
+			self.events.emit('drew', actor=current_player.name, card=removed_card.name)
+			if removed_card.type == 'Action':
+				self.events.emit('decide_set_aside', recipient=current_player.name, card=removed_card.name)
+				frame['drawn'] = removed_card.id
+				frame['step']  = 'decide'
+				return WAIT
+			else:
+				current_player.add_cards('hand', removed_card)
+		if frame['set aside'] != []:
+			current_player.add_cards('discard', [cards.CATALOG[card_id] for card_id in frame['set aside']])
+		return DONE
+
+	def resolve_mine(self, frame, current_player, user_input):
+		if frame['step'] == 'start':
+			if current_player.is_empty('hand'):
+				self.events.emit('hand_empty', actor=current_player.name)
+				return DONE
+
+			card_list = [card.name for card in current_player]
+			for card in card_list:
+				if card in {'Copper', 'Silver', 'Gold'}: break
+			else:
+				self.events.emit('no_treasures_in_hand', actor=current_player.name)
+				return DONE
+
+			self.events.emit('select_treasure', recipient=current_player.name)
+			frame['step'] = 'trash'
+			return WAIT
+
+		if frame['step'] == 'trash':
+			if user_input == ():
+				self.events.emit('error_choose_trash', recipient=current_player.name)
+			elif current_player[('hand', user_input[0])].type == 'Treasure':
+				trashed_card = current_player.remove_card('hand', user_input[0])
+				self._trash.add_cards(trashed_card)	
+				self.events.emit('trashed', actor=current_player.name, card=trashed_card.name)
+				self.events.emit('gain_treasure', recipient=current_player.name, amount=trashed_card.cost + 3)
+				frame['step'] = 'gain'
+				frame['cost'] = trashed_card.cost + 3
+				return WAIT
+			else:
+				self.events.emit('error_not_treasure', recipient=current_player.name)
+			self.events.emit('select_again', recipient=current_player.name)
+			return WAIT
+
+		if user_input and self.gain_card(current_player, frame['cost'], user_input[0], {'Treasure'}):
+			gained_card = current_player.remove_card('discard', -1)
+			current_player.add_cards('hand', gained_card)
+			return DONE
+		self.events.emit('gain_again', recipient=current_player.name)
+		return WAIT
+
 	def gain_card(self, current_player, cost, idx, card_type=set()):
-		supply = []
-		supply.extend(self._treasures + self._victories + self._kingdoms)
-	
-		if supply[idx].is_empty() == False:
-			if supply[idx][-1].type in card_type:
-				if supply[idx][-1].cost <= cost:
-					gained_card = supply[idx].remove_card()
+		if self._supply[idx].is_empty() == False:
+			if self._supply[idx].card.type in card_type:
+				if self._supply[idx].card.cost <= cost:
+					gained_card = self._supply.take(idx)
 					current_player.add_cards('discard', gained_card)
-					self.info_list.append('Public:{} gained a {}.'.format(current_player.name, gained_card.name))
+					self.events.emit('gained', actor=current_player.name, card=gained_card.name)
 					return True
 				else:
-					self.info_list.append('Private:{}:Error:That card costs more than {}, try again!'.format(current_player.name, cost))
+					self.events.emit('error_gain_cost', recipient=current_player.name, amount=cost)
 					return False
 			else:
-				self.info_list.append('Private:{}:Error:You cannot gain a card of that type, try again!'.format(current_player.name))
+				self.events.emit('error_gain_type', recipient=current_player.name)
 				return False
 		else:
-			self.info_list.append('Private:{}:Error:That supply pile is empty, try again!'.format(current_player.name))
+			self.events.emit('error_gain_empty', recipient=current_player.name)
 			return False
 
+	def zone_versions(self):
+		# yields every displayed zone along with a value that changes whenever the zone does
+		# zones are tuples of the zone name and the supply pile or player index
+		for idx, pile in enumerate(self._supply):
+			if idx != self._curse_idx:
+				yield ('supply', idx), pile.version
+		yield ('curses', None), self._supply[self._curse_idx].version
+		yield ('trash', None), self._trash.version
+		for idx, p in enumerate(self._players):
+			yield ('hand', idx),    p.version('hand')
+			yield ('deck', idx),    p.version('deck')
+			yield ('discard', idx), p.version('discard')
+			yield ('stats', idx),   (p.actions, p.gold, p.buys)
+
+	def changed_zones(self):
+		# returns the zones that changed since the last call
+		changed = []
+		for zone, version in self.zone_versions():
+			if self._synced.get(zone) != version:
+				self._synced[zone] = version
+				changed.append(zone)
+		return changed
+
+	def state(self):
+		# returns the state of the game outside of any card being played, made of lists, numbers and strings
+		return {'players': [p.state() for p in self._players],
+				'supply':  self._supply.counts(),
+				'trash':   self._trash.card_ids(),
+				'turn':    self.turn,
+				'turns':   self.turns}
+
+	def load_state(self, state):
+		# replaces the state of the game with one returned by state()
+		for p, player_state in zip(self._players, state['players']):
+			p.load_state(player_state)
+		self._supply.load_counts(state['supply'])
+		self._trash.remove_all_cards()
+		self._trash.add_cards([cards.CATALOG[card_id] for card_id in state['trash']])
+		self.turn  = state['turn']
+		self.turns = state['turns']
+
+	def snapshot(self):
+		# returns a snapshot of the game that can be saved as JSON and given to restore()
+		# the snapshot holds the state at the start of the turn and the inputs received since,
+		# which rebuild the decision stack along with everything else that happened this turn
+		return {'version':    SNAPSHOT_VERSION,
+				'players':    self.player_names(),
+				'seed':       self.seed,
+				'kingdom':    list(self.kingdom),
+				'checkpoint': self._checkpoint,
+				'inputs':     [[user_input.command, user_input.name, list(user_input.args)]
+							   for user_input in self._turn_inputs]}
+
+	def clone(self, observer=None, rng=None):
+		# returns a copy of the game for lookahead, its game loop is started with game_loop(resume=True)
+		# the copy shares every card list and supply pile with this game until either of them changes it,
+		# so cloning costs about as much as the players and decisions in the game, not their cards
+		# without an observer the copy plays out the same way as this game given the same inputs.
+		# with the index of an observer it is determinized for that player with rng, a random.Random:
+		# the hands and decks of the other players are dealt again from the cards in them, every deck
+		# is shuffled and the copy is given a new seed, so it holds nothing the observer cannot know
+		copy = Dominion.__new__(Dominion)
+		copy.seed   = self.seed
+		copy.rng    = Random(0)
+		if observer == None:
+			copy.rng.setstate(self.rng.getstate())
+		copy.events = events.EventQueue()
+		copy._stack = [{key: list(value) if type(value) == list else value for key, value in frame.items()}
+					   for frame in self._stack]
+		copy.turn         = self.turn
+		copy.turns        = self.turns
+		copy._checkpoint  = self._checkpoint
+		copy._turn_inputs = list(self._turn_inputs)
+		copy._synced      = {}
+		copy._players     = [p.clone(copy.rng) for p in self._players]
+		copy._supply      = self._supply.clone()
+		copy._curse_idx   = self._curse_idx
+		copy._trash       = self._trash.clone()
+		copy.kingdom      = self.kingdom
+		if observer != None:
+			copy.determinize(observer, rng if rng != None else Random())
+		return copy
+
+	def determinize(self, observer, rng):
+		# deals the hands and decks of every player but the observer again from the cards in them,
+		# shuffles every deck and picks a new seed, see clone()
+		self.seed = rng.randrange(2 ** 32)
+		self.rng.seed((self.seed << 32) + self.turns)
+		for idx, p in enumerate(self._players):
+			if idx != observer:
+				hand_size = p.length('hand')
+				unseen    = p.remove_all_cards('hand') + p.remove_all_cards('deck')
+				rng.shuffle(unseen)
+				p.add_cards('hand', unseen[:hand_size])
+				p.add_cards('deck', unseen[hand_size:])
+			else:
+				p.shuffle()
+
 	def end_game(self):
 		# calculates the final score for each player
 		ret = ''
 		for temp in self._players:
 			ret += temp.calc_score() + '<br>'
-		self.info_list.append('End Game:{}'.format(ret))
-
-	def supply_string(self):
-		supply = []
-		supply.extend(self._treasures + self._victories + self._kingdoms)
-		pile_string = ''
-		for pile in supply:
-			if pile.is_empty() == False:
-				pile_string += pile[-1].name + ',' + str(len(pile))
-			else:
-				pile_string += 'Blank' + ',0'
-			if pile != supply[-1]:
-				pile_string += ','
+		self.events.emit('end_game', detail=ret)
 
-		return pile_string
+	# functions that describe what players can see of each zone
+	# piles are described by the id of the card shown on top and the number of cards
+	# the curses are shown apart from the other supply piles
+	def supply_piles(self):
+		return tuple(self.pile(idx) for idx in range(len(self._supply)) if idx != self._curse_idx)
 
-	def hand_string(self, idx):
-		if self._players[idx].is_empty('hand'):
-			return '(blank)'
-		return ','.join(card.name for card in self._players[idx])
+	def pile(self, idx):
+		if self._supply[idx].is_empty():
+			return (cards.CARDS['Blank'].id, 0)
+		return (self._supply[idx].card.id, len(self._supply[idx]))
 
-	def stats_string(self, idx):
+	def hand(self, idx):
+		return tuple(card.id for card in self._players[idx])
+
+	def stats(self, idx):
 		p = self._players[idx]
-		return ','.join(str(stats) for stats in (p.actions, p.gold, p.buys))
+		return (p.actions, p.gold, p.buys)
 
-	def deck_string(self, idx):
+	def deck_pile(self, idx):
 		if self._players[idx].is_empty('deck'):
-			return 'Blank,0'
-		return 'Back,' + str(self._players[idx].length('deck'))
+			return (cards.CARDS['Blank'].id, 0)
+		return (cards.CARDS['Back'].id, self._players[idx].length('deck'))
 
-	def discard_string(self, idx):
+	def discard_pile(self, idx):
 		if self._players[idx].is_empty('discard'):
-			return 'Blank,0'
-		return self._players[idx][('discard', -1)].name + ',' + str(self._players[idx].length('discard'))
+			return (cards.CARDS['Blank'].id, 0)
+		return (self._players[idx][('discard', -1)].id, self._players[idx].length('discard'))
+
+	def supply_cards(self):
+		return tuple(pile.card for pile in self._supply)
+
+	def supply_counts(self):
+		return tuple(self._supply.counts())
 
-	def curse_string(self):
-		if self._curses.is_empty():
-			return 'Blank,0'
-		return 'Curse,' + str(len(self._curses))
+	def curse_pile(self):
+		return self.pile(self._curse_idx)
 
-	def trash_string(self):
+	def trash_pile(self):
 		if self._trash.is_empty():
-			return 'Trash,0'
-		return self._trash[-1].name + ',' + str(len(self._trash))
+			return (cards.CARDS['Trash'].id, 0)
+		return (self._trash[-1].id, len(self._trash))
+
+# the action cards that need decisions and the functions that resolve them
+# the cards that wait for the player to choose cards in hand, unless they are at their gain step
+HAND_CHOICES = {'Cellar', 'Chapel', 'Militia', 'Remodel', 'Throne Room', 'Mine'}
+
+RESOLVERS = {'Cellar':      Dominion.resolve_cellar,
+			 'Chapel':      Dominion.resolve_chapel,
+			 'Chancellor':  Dominion.resolve_chancellor,
+			 'Workshop':    Dominion.resolve_workshop,
+			 'Feast':       Dominion.resolve_feast,
+			 'Militia':     Dominion.resolve_militia,
+			 'Remodel':     Dominion.resolve_remodel,
+			 'Spy':         Dominion.resolve_spy,
+			 'Thief':       Dominion.resolve_thief,
+			 'Throne Room': Dominion.resolve_throne_room,
+			 'Library':     Dominion.resolve_library,
+			 'Mine':        Dominion.resolve_mine}
+
+def restore(snapshot):
+	# returns a game rebuilt from a snapshot and its game loop, waiting for the next input
+	if snapshot['version'] != SNAPSHOT_VERSION:
+		raise ValueError('unsupported snapshot version {}'.format(snapshot['version']))
+	game = Dominion(snapshot['players'], snapshot['seed'], snapshot['kingdom'])
+	game.load_state(snapshot['checkpoint'])
+	coro = game.game_loop()
+	next(coro)
+	for command, name, args in snapshot['inputs']:
+		coro.send(protocol.Input(command, name, tuple(args)))
+	game.events.clear()
+	return game, coro
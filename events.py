@@ -0,0 +1,156 @@
+from collections import deque, namedtuple
+
+# the client command and text for every kind of event, followed by the options of a decision
+# public events are sent to every player, every other command is only sent to the event's recipient
+TEMPLATES = {
+	# public events
+	'played':                ('Public', '{actor} played a {card}.'),
+	'bought':                ('Public', '{actor} bought a {card}.'),
+	'gained':                ('Public', '{actor} gained a {card}.'),
+	'gained_trashed':        ('Public', '{actor} gained the trashed {card}.'),
+	'not_gained_trashed':    ('Public', '{actor} did not gain the trashed {card}.'),
+	'trashed':               ('Public', '{actor} trashed a {card}.'),
+	'trashed_cards':         ('Public', '{actor} trashed {card_list}.'),
+	'trashed_revealed':      ('Public', '{actor} trashed the revealed {card}.'),
+	'discarded':             ('Public', '{actor} discarded the {card}.'),
+	'discarded_cards':       ('Public', '{actor} discarded {card_list}.'),
+	'discarded_revealed':    ('Public', '{actor} discarded the revealed {card}.'),
+	'not_discarded':         ('Public', '{actor} did not discard the {card}.'),
+	'revealed':              ('Public', '{actor} revealed a {card}.'),
+	'revealed_cards':        ('Public', '{actor} revealed {card_list}.'),
+	'drew':                  ('Public', '{actor} drew a {card}.'),
+	'drew_cards':            ('Public', '{actor} drew {amount} cards.'),
+	'set_aside':             ('Public', '{actor} set {card} aside.'),
+	'not_set_aside':         ('Public', '{actor} did not set {card} aside.'),
+	'topdecked':             ('Public', '{actor} placed {card} on top of his deck.'),
+	'deck_discarded':        ('Public', '{actor} placed deck into discard pile.'),
+	'deck_not_discarded':    ('Public', '{actor} did not place deck into discard pile.'),
+	'moat_blocked':          ('Public', '{actor} blocked the attack using Moat.'),
+	'no_cards_to_discard':   ('Public', '{actor} has no cards to discard.'),
+	'no_cards_to_trash':     ('Public', '{actor} has no cards to trash.'),
+	'no_cards_in_hand':      ('Public', '{actor} has no cards in hand.'),
+	'hand_empty':            ('Public', "{actor}'s hand is empty."),
+	'no_actions':            ('Public', '{actor} has no actions to choose from.'),
+	'no_treasures_in_hand':  ('Public', '{actor} has no treasures in hand.'),
+	'no_treasures_revealed': ('Public', '{actor} had no treasures to reveal.'),
+	'no_copper':             ('Public', '{actor} does not have a Copper to trash.'),
+	'few_cards_in_hand':     ('Public', '{actor} has 3 or fewer cards in hand.'),
+	'cannot_draw':           ('Public', '{actor} cannot draw anymore cards.'),
+	'cannot_reveal':         ('Public', '{actor} cannot reveal a card.'),
+	'could_not_reveal':      ('Public', '{actor} could not reveal any cards.'),
+	'no_silvers':            ('Public', 'There are no more Silvers.'),
+	'no_curses':             ('Public', 'There are no more Curses. Yay...'),
+	'end_game':              ('End Game', '{detail}'),
+	'game_failed':           ('End Game', 'The game was stopped by an error on the server, start a new one to play again.'),
+
+	# answers to a player asking what is in the trash
+	'trash_empty':           ('Public', 'The trash is empty.'),
+	'trash_contents':        ('Public', 'Cards in trash are {card_list}.'),
+
+	# prompts for a decision from the recipient
+	'select_discard':        ('Select', 'Choose any number of cards to discard.'),
+	'select_trash_4':        ('Select', 'Choose up to 4 cards to trash.'),
+	'select_trash':          ('Select', 'Choose a card to trash.'),
+	'select_action':         ('Select', 'Choose an action card.'),
+	'select_treasure':       ('Select', 'Choose a treasure card to trash.'),
+	'select_again':          ('Select', '(blank)'),
+	'gain':                  ('Gain', 'Gain a card costing up to {amount}.'),
+	'gain_treasure':         ('Gain', 'Gain a treasure card costing up to {amount}.'),
+	'gain_again':            ('Gain', '(blank)'),
+	'discard_to_3':          ('Discard', 'Discard down to 3 cards.'),
+	'discard_again':         ('Discard', '(blank)'),
+	'decide_discard_deck':   ('Decision', 'Place deck into discard pile?', 'Yes', 'No'),
+	'decide_spy_self':       ('Decision', 'Discard the revealed {card}?', 'Yes', 'No'),
+	'decide_spy_other':      ('Decision', 'Make {target} discard the revealed {card}?', 'Yes', 'No'),
+	'decide_thief_trash':    ('Decision', 'Make {target} trash the {cards[0]} or {cards[1]}?', '{cards[0]}', '{cards[1]}'),
+	'decide_gain_trashed':   ('Decision', 'Gain the trashed {card}?', 'Yes', 'No'),
+	'decide_set_aside':      ('Decision', 'Set aside the {card}?', 'Yes', 'No'),
+	'suspend':               ('Suspend', 'Waiting for {target} to discard...'),
+	'suspend_again':         ('Suspend', '(blank)'),
+	'resume':                ('Resume', '(blank)'),
+
+	# errors shown to the recipient
+	'error_no_actions':      ('Error', 'You have no more actions, try again!'),
+	'error_no_buys':         ('Error', 'You have no more buys.'),
+	'error_play_victory':    ('Error', 'You cannot play a victory card, try again!'),
+	'error_play_curse':      ('Error', 'You cannot play a Curse, try again!'),
+	'error_afford':          ('Error', 'You cannot afford that card, try again!'),
+	'error_buy_empty':       ('Error', 'The supply pile for that card is empty, try again!'),
+	'error_gain_empty':      ('Error', 'That supply pile is empty, try again!'),
+	'error_gain_type':       ('Error', 'You cannot gain a card of that type, try again!'),
+	'error_gain_cost':       ('Error', 'That card costs more than {amount}, try again!'),
+	'error_no_selection':    ('Error', 'You must select a card from your hand, try again!'),
+	'error_select_trash':    ('Error', 'You must select a card to trash, try again!'),
+	'error_choose_trash':    ('Error', 'You must choose a card to trash, try again!'),
+	'error_not_action':      ('Error', 'You must select an action card, try again!'),
+	'error_not_treasure':    ('Error', 'That is not a treasure card, try again!'),
+	'error_no_discard':      ('Error', 'You must select cards to discard, try again!'),
+	'error_discard_to_3':    ('Error', 'You must discard down to 3, try again!'),
+	'error_invalid':         ('Error', 'That message was turned down: {detail}.'),
+}
+
+class Event(namedtuple('Event', 'kind actor card cards target amount recipient detail')):
+	"""A single thing that happened in the game. The kind is a key of TEMPLATES,
+	   actor and target are player names, card is a card name and cards is a
+	   tuple of card names. Events with a recipient are only meant for that player."""
+
+	__slots__ = ()
+
+	def is_private(self):
+		# returns True if the event should only be sent to its recipient
+		return self.recipient != None
+
+	def command(self):
+		# returns the client command for the event, e.g. 'Public', 'Select' or 'Decision'
+		return TEMPLATES[self.kind][0]
+
+	def text(self):
+		# returns the message shown to players, filled in from the event's fields
+		card_list = ', '.join(self.cards) if self.cards else 'no cards'
+		return TEMPLATES[self.kind][1].format(card_list=card_list, **self._asdict())
+
+	def options(self):
+		# returns the labels of the two choices of a decision
+		template = TEMPLATES[self.kind]
+		if len(template) == 2:
+			return ()
+		return tuple(option.format(**self._asdict()) for option in template[2:])
+
+	def render(self):
+		# returns the event in the legacy text format, e.g. 'Private:<name>:Decision:<text>:Yes:No'
+		command = self.command()
+		if command == 'Public' or command == 'End Game':
+			return command + ':' + self.text()
+		return ':'.join(('Private', self.recipient, command, self.text()) + self.options())
+
+# every field except the kind is optional
+Event.__new__.__defaults__ = (None,) * (len(Event._fields) - 1)
+
+class EventQueue:
+	"""A first in, first out queue of events produced by the game.
+	   Events are stored as they happen and only rendered by whoever drains them."""
+
+	def __init__(self):
+		# initialize the queue to be empty
+		self._events = deque()
+
+	def __len__(self):
+		# returns the number of events waiting to be drained
+		return len(self._events)
+
+	def __iter__(self):
+		# yields the waiting events without removing them
+		for event in self._events: yield event
+
+	def emit(self, kind, **fields):
+		# adds a new event to the end of the queue
+		self._events.append(Event(kind, **fields))
+
+	def drain(self):
+		# removes and yields every waiting event in the order they happened
+		while self._events:
+			yield self._events.popleft()
+
+	def clear(self):
+		# discards every waiting event
+		self._events.clear()
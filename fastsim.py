@@ -0,0 +1,151 @@
+"""Plays Big Money games in large numpy batches, for questions that only involve
+   treasure, victory and the simple cards of vector.SUPPORTED.
+
+   The games are played by vector.VectorDominion and the bots are the BigMoney
+   bots of bots.py, with their buy rules turned into thresholds applied to
+   every game at once. With --check the same strategies, kingdom and seed are
+   also played by the full engine through simulate.py, and every figure of the
+   two reports is compared.
+
+   Usage: python fastsim.py big_money big_money:Smithy --kingdom Smithy,Village,...
+		  [--games 100000] [--seed 0] [--batch 4096] [--check 2000]"""
+
+import sys
+import math
+import time
+import argparse
+import numpy
+import bots
+import cards
+import vector
+import simulate
+
+# stands in for a rule without a limit
+NO_LIMIT = numpy.iinfo(numpy.int32).max
+
+# the order BigMoney plays its action cards in, see bots.BigMoney.turn()
+PLAY_PRIORITY = numpy.array([(card.name in bots.NON_TERMINAL) * 100 + card.cost + 1 if card.type == 'Action' else 0
+							 for card in cards.CATALOG], numpy.int32)
+
+def buy_rules(bot):
+	# returns the buy rules of a BigMoney bot as (card id, copies, provinces left) with numbers for every limit
+	return [(cards.CARDS[name].id,
+			 copies if copies != None else NO_LIMIT,
+			 provinces_left if provinces_left != None else NO_LIMIT)
+			for name, copies, provinces_left in bot.buy_rules()]
+
+def big_money_actions(envs, rules, seat_strategy):
+	# returns the action of the current player of every game, chosen as bots.BigMoney would
+	# rules holds the buy rules of every strategy and seat_strategy the strategy of every seat of every game
+	games = numpy.arange(envs.games)
+	seats = envs.turn
+	hand  = envs.hand[games, seats]
+	owned = hand + envs.deck[games, seats] + envs.discard[games, seats] + envs.in_play[games, seats]
+	strategy  = seat_strategy[games, seats]
+	provinces = envs.supply[:, vector.PROVINCE]
+	actions   = numpy.full(envs.games, vector.END_TURN)
+
+	# the least wanted card is tried first, so the most wanted card the player can buy is kept
+	for index, strategy_rules in enumerate(rules):
+		for card_id, copies, provinces_left in reversed(strategy_rules):
+			wanted = ((strategy == index) & (envs.supply[:, card_id] > 0) & (vector.COST[card_id] <= envs.gold) &
+					  (owned[:, card_id] < copies) & (provinces <= provinces_left))
+			actions[wanted] = vector.BUY + card_id
+
+	# treasures are played before buying and actions before treasures
+	actions[(hand[:, vector.IS_TREASURE] > 0).any(1)] = vector.PLAY_TREASURES
+	priority = numpy.where(hand > 0, PLAY_PRIORITY, 0)
+	playable = (priority.max(1) > 0) & (envs.actions > 0)
+	actions[playable] = vector.PLAY + priority.argmax(1)[playable]
+	return actions
+
+def simulate_fast(strategies, games, kingdom, seed=0, batch=4096, max_turns=200):
+	# plays the games in batches and returns a simulate.Summary
+	# every slot of the batch plays the same number of games give or take one, so short games
+	# are not counted more often than long ones
+	players = [bots.create(spec) for spec in strategies]
+	for spec, bot in zip(strategies, players):
+		if not isinstance(bot, bots.BigMoney):
+			raise ValueError('{} cannot be played by fastsim, only big_money strategies can'.format(spec))
+	rules = [buy_rules(bot) for bot in players]
+
+	seat_count = len(strategies)
+	batch = min(batch, games)
+	envs  = vector.VectorDominion(batch, seat_count, kingdom, seed)
+	seat_strategy = (numpy.arange(seat_count)[None, :] + numpy.arange(batch)[:, None]) % seat_count
+	quota   = numpy.full(batch, games // batch)
+	quota[:games % batch] += 1
+	summary = simulate.Summary(seat_count)
+
+	while quota.any():
+		observations, rewards, done = envs.step(big_money_actions(envs, rules, seat_strategy))
+		for game in numpy.flatnonzero(done & (quota > 0)):
+			scores = [0] * seat_count
+			for seat in range(seat_count):
+				scores[seat_strategy[game, seat]] = int(envs.final_scores[game, seat])
+			summary.add_game(scores, int(envs.final_turns[game]))
+			quota[game] -= 1
+
+		# games still going after max_turns are cut short
+		cut = numpy.flatnonzero(envs.turns >= max_turns)
+		if len(cut):
+			summary.cut += int((quota[cut] > 0).sum())
+			quota[cut] = numpy.maximum(quota[cut] - 1, 0)
+			envs.reset(cut)
+	return summary
+
+def compare(strategies, fast, full):
+	# prints every figure of both summaries and whether they agree within their confidence intervals
+	# returns the number of figures that do not
+	figures = [('turns per game', (fast.turns, fast.turns_sq), (full.turns, full.turns_sq))]
+	for strategy, spec in enumerate(strategies):
+		figures.append(('{} win rate'.format(spec),
+						(fast.wins[strategy], fast.wins_sq[strategy]), (full.wins[strategy], full.wins_sq[strategy])))
+		figures.append(('{} points'.format(spec), fast.points_totals(strategy), full.points_totals(strategy)))
+
+	disagree = 0
+	print('{:>32} {:>18} {:>18} {:>8}'.format('', 'fastsim', 'engine', 'agree'))
+	for label, fast_totals, full_totals in figures:
+		fast_mean, fast_ci = simulate.interval(fast_totals[0], fast_totals[1], fast.games)
+		full_mean, full_ci = simulate.interval(full_totals[0], full_totals[1], full.games)
+		agree = abs(fast_mean - full_mean) <= math.sqrt(fast_ci ** 2 + full_ci ** 2)
+		disagree += not agree
+		print('{:>32} {:>18} {:>18} {:>8}'.format(label, '{:.3f} +- {:.3f}'.format(fast_mean, fast_ci),
+												  '{:.3f} +- {:.3f}'.format(full_mean, full_ci), 'yes' if agree else 'NO'))
+	return disagree
+
+def main(argv):
+	parser = argparse.ArgumentParser(description='Plays Big Money games in numpy batches and reports how each strategy did.')
+	parser.add_argument('strategies', nargs='+', help='2 to 4 strategies, e.g. big_money or big_money:Smithy:2')
+	parser.add_argument('--kingdom', required=True, help='10 comma separated kingdom card names, see vector.SUPPORTED')
+	parser.add_argument('--games', type=int, default=100000)
+	parser.add_argument('--seed', type=int, default=0)
+	parser.add_argument('--batch', type=int, default=4096, help='games played at the same time')
+	parser.add_argument('--max-turns', type=int, default=200, help='games still going after this many turns are cut short')
+	parser.add_argument('--check', type=int, default=0, help='also play this many games with the full engine and compare')
+	args = parser.parse_args(argv)
+
+	if not 2 <= len(args.strategies) <= 4:
+		parser.error('between 2 and 4 strategies are needed')
+	names = args.kingdom.split(',')
+	if len(names) != 10 or any(name not in vector.SUPPORTED for name in names):
+		parser.error('the kingdom must be 10 of {}'.format(', '.join(vector.SUPPORTED)))
+	kingdom = [cards.CARDS[name].id for name in names]
+
+	start = time.perf_counter()
+	try:
+		fast = simulate_fast(args.strategies, args.games, kingdom, args.seed, args.batch, args.max_turns)
+	except ValueError as e:
+		parser.error(str(e))
+	simulate.report(args.strategies, fast, time.perf_counter() - start)
+
+	if args.check:
+		start = time.perf_counter()
+		full = simulate.simulate(args.strategies, args.check, kingdom, args.seed, None, args.max_turns)
+		print()
+		simulate.report(args.strategies, full, time.perf_counter() - start)
+		print()
+		sys.exit(1 if compare(args.strategies, fast, full) else 0)
+
+if __name__ == '__main__':
+	main(sys.argv[1:])
@@ -0,0 +1,154 @@
+import dominion
+import protocol
+from itertools import combinations, islice
+from collections import namedtuple
+
+# what the player who has to choose next can see of the game, made of numbers and tuples of numbers
+#   player:   index of the player who has to choose
+#   decision: (card name, step) of the card waiting for the player to choose, None outside of a card
+#   hand:     ids of the cards in the player's hand
+#   stats:    (actions, gold, buys) of the player whose turn it is
+#   supply:   number of cards left in each supply pile, in the order piles are indexed
+#   scores:   score of every player
+#   turns:    number of turns played
+Observation = namedtuple('Observation', 'player decision hand stats supply scores turns')
+
+# the card types each card with a gain step can gain
+GAIN_TYPES = {'Workshop': {'Treasure', 'Victory', 'Action'},
+			  'Feast':    {'Treasure', 'Victory', 'Action'},
+			  'Remodel':  {'Treasure', 'Victory', 'Action'},
+			  'Mine':     {'Treasure'}}
+
+# the most subsets of each size listed for a card that takes a subset of the hand, a hand of up to
+# 5 cards has every subset listed, larger hands a sample, so listing stays linear in the hand size
+SUBSETS_PER_SIZE = 16
+
+def subsets(positions, sizes):
+	# returns the subsets of positions of the given sizes, at most SUBSETS_PER_SIZE of each size
+	return [choice for size in sizes for choice in islice(combinations(positions, size), SUBSETS_PER_SIZE)]
+
+class Environment:
+	"""Drives a game of Dominion without a server, for bots and analytics. Every
+	   seat is played through the same environment: observe() tells whose choice
+	   it is, legal_actions() lists the protocol.Inputs that player may send and
+	   step() sends one of them. Events are returned as they were emitted and are
+	   never rendered as text."""
+
+	def __init__(self, player_names=('p0', 'p1')):
+		# the same players take part in every game started with reset()
+		# piles holds the card of every supply pile, in the order piles are indexed
+		self.player_names = tuple(player_names)
+		self.game  = None
+		self.done  = False
+		self.piles = ()
+		self._coro = None
+
+	def reset(self, seed=None, kingdom=None):
+		# starts a new game and returns the first observation, see Dominion for seed and kingdom
+		game = dominion.Dominion(list(self.player_names), seed, kingdom)
+		coro = game.game_loop()
+		next(coro)
+		self.attach(game, coro)
+		return self.observe()
+
+	def attach(self, game, coro):
+		# plays on from a game started elsewhere, such as one returned by dominion.restore()
+		# coro is the game loop of the game, waiting for the next input
+		self.game  = game
+		self.done  = False
+		self.piles = game.supply_cards()
+		self._coro = coro
+
+	def clone(self, observer=None, rng=None):
+		# returns an environment that plays on from a copy of the game, see Dominion.clone()
+		# for observer and rng. steps taken in either environment do not change the other
+		game = self.game.clone(observer, rng)
+		coro = game.game_loop(resume=True)
+		next(coro)
+		env = Environment(self.player_names)
+		env.attach(game, coro)
+		env.done = self.done
+		return env
+
+	def step(self, action):
+		# sends an action to the game, normally one returned by legal_actions()
+		# returns the next observation, the events the action produced and whether the game is over
+		self._coro.send(action)
+		game_events = tuple(self.game.events)
+		self.game.events.clear()
+		for event in game_events:
+			if event.kind == 'end_game':
+				self.done = True
+		return self.observe(), game_events, self.done
+
+	def to_move(self):
+		# returns the index of the player who has to choose next, see Dominion.to_move()
+		return self.game.to_move()
+
+	def observe(self):
+		# returns what the player who has to choose next can see
+		game  = self.game
+		idx   = self.to_move()
+		frame = game.decision()
+		return Observation(idx,
+						   (frame['card'], frame['step']) if frame != None else None,
+						   game.hand(idx),
+						   game.stats(game.turn),
+						   game.supply_counts(),
+						   tuple(game[seat].score() for seat in range(len(self.player_names))),
+						   game.turns)
+
+	def legal_actions(self):
+		# returns every input the player who has to choose next can send without getting an error
+		# while a card waits for a choice only its choices are listed, if it cannot be satisfied
+		# the turn can only be ended. of the subsets a card takes only a sample is listed for a
+		# large hand, see subsets(), step() takes any other subset the card allows just the same
+		idx   = self.to_move()
+		name  = self.player_names[idx]
+		frame = self.game.decision()
+		if frame == None:
+			return self.turn_actions(idx, name)
+		actions = [protocol.Input('Play Card', name, choice) for choice in self.choices(frame, idx)]
+		return actions or [protocol.Input('End Turn', name, ())]
+
+	def turn_actions(self, idx, name):
+		# returns the inputs of the player whose turn it is when no card is waiting for a choice
+		p = self.game[idx]
+		actions = []
+		treasures = False
+		for position, card in enumerate(p):
+			if card.type == 'Treasure':
+				treasures = True
+				actions.append(protocol.Input('Play Card', name, (position,)))
+			elif card.type == 'Action' and p.actions > 0:
+				actions.append(protocol.Input('Play Card', name, (position,)))
+		if treasures:
+			actions.append(protocol.Input('Play All Treasures', name, ()))
+		for pile, count in enumerate(self.game.supply_counts()):
+			if count > 0 and self.piles[pile].cost <= p.gold:
+				actions.append(protocol.Input('Buy Card', name, (pile,)))
+		actions.append(protocol.Input('End Turn', name, ()))
+		return actions
+
+	def choices(self, frame, idx):
+		# returns the indices the given player can choose for the card waiting on top of the stack
+		card, step = frame['card'], frame['step']
+		hand = list(self.game[idx])
+		positions = range(len(hand))
+		if step == 'gain' and card in GAIN_TYPES:
+			return [(pile,) for pile, count in enumerate(self.game.supply_counts())
+					if count > 0 and self.piles[pile].type in GAIN_TYPES[card] and self.piles[pile].cost <= frame['cost']]
+		if card == 'Cellar':
+			return subsets(positions, range(len(hand) + 1))
+		if card == 'Chapel':
+			return subsets(positions, range(min(len(hand), 4) + 1))
+		if card == 'Militia':
+			return subsets(positions, (len(hand) - 3,))
+		if card == 'Remodel':
+			return [(position,) for position in positions]
+		if card == 'Throne Room':
+			return [(position,) for position in positions if hand[position].type == 'Action']
+		if card == 'Mine':
+			return [(position,) for position in positions if hand[position].type == 'Treasure']
+		# every other choice is a decision between the first and second option
+		return [(0,), (1,)]
@@ -0,0 +1,93 @@
+import sys
+import json
+import time
+import zlib
+import dominion
+import protocol
+
+# a journal is a text file with one JSON value per line. the first line describes the game:
+#   {"version": 1, "players": [<names>], "seed": <seed>, "kingdom": [<card ids>]}
+# every following line is one input passed to the game loop, in the order it was received:
+#   [<opcode>, <player name>, [<indices>], <digest of the events the input produced>]
+# opcodes are the client opcodes of the compact protocol, see CLIENT_SCHEMA in protocol.py
+JOURNAL_VERSION = 1
+
+OPCODES = {command: opcode for opcode, command in protocol.CLIENT_COMMANDS.items()}
+
+def digest(game_events):
+	# returns a checksum of the given events, used to check that a replay produced the same events
+	return zlib.crc32(repr(tuple(game_events)).encode('utf-8'))
+
+class Journal:
+	"""Records a game as it is played, so it can be replayed later. The header
+	   is written when the journal is created and every input is appended as
+	   soon as the game has handled it."""
+
+	def __init__(self, stream, game, player_names):
+		# stream is a text file opened for appending, the header is written right away
+		self._stream = stream
+		self.inputs  = 0
+		header = {'version': JOURNAL_VERSION, 'players': list(player_names),
+				  'seed': game.seed, 'kingdom': list(game.kingdom)}
+		self._write(header)
+
+	def _write(self, value):
+		# appends a single line to the journal
+		self._stream.write(json.dumps(value, separators=(',', ':')) + '\n')
+
+	def record(self, user_input, game_events):
+		# appends an input along with a digest of the events it produced
+		# game_events is None if handling the input raised an exception
+		self.inputs += 1
+		checksum = digest(game_events) if game_events != None else None
+		self._write([OPCODES[user_input.command], user_input.name, list(user_input.args), checksum])
+
+	def close(self):
+		# closes the underlying file
+		self._stream.close()
+
+def read(lines):
+	# returns the header and the list of inputs of a journal given as lines of text
+	lines  = iter(lines)
+	header = json.loads(next(lines))
+	if header.get('version') != JOURNAL_VERSION:
+		raise ValueError('unsupported journal version {}'.format(header.get('version')))
+	entries = []
+	for line in lines:
+		if line.strip() == '':
+			continue
+		opcode, name, args, checksum = json.loads(line)
+		entries.append((protocol.Input(protocol.CLIENT_COMMANDS[opcode], name, tuple(args)), checksum))
+	return header, entries
+
+def replay(header, entries):
+	# drives a new game through the recorded inputs as fast as possible
+	# returns the game and the positions of the inputs whose events did not match the journal
+	game = dominion.Dominion(header['players'], header['seed'], header['kingdom'])
+	coro = game.game_loop()
+	next(coro)
+	mismatches = []
+	for position, (user_input, checksum) in enumerate(entries):
+		coro.send(user_input)
+		if digest(game.events) != checksum:
+			mismatches.append(position)
+		game.events.clear()
+	return game, mismatches
+
+if __name__ == '__main__':
+	# replays every journal given on the command line and reports any that diverged
+	# usage: python journal.py <journal files...>
+	failed = 0
+	for path in sys.argv[1:]:
+		with open(path) as stream:
+			header, entries = read(stream)
+		start = time.perf_counter()
+		game, mismatches = replay(header, entries)
+		elapsed = time.perf_counter() - start
+		rate = len(entries) / elapsed if elapsed > 0 else 0
+		if mismatches:
+			failed += 1
+			print('{}: {} inputs, first mismatch at input {}'.format(path, len(entries), mismatches[0] + 1))
+		else:
+			print('{}: {} inputs replayed, {:.0f} inputs/s'.format(path, len(entries), rate))
+	sys.exit(1 if failed else 0)
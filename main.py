@@ -1,72 +1,189 @@
 import os
+import hmac
+import time
 import tornado.httpserver
+import tornado.log
 import tornado.ioloop
 import tornado.options
 import tornado.web
 import sockjs.tornado
-import dominion
+import rooms
+import seats
+import events
+import metrics
+import profiler
+import protocol
+import watchdog
 
 from tornado.options import define, options
 define("port", default=8000, help="run on the given port", type=int)
+define("journal_dir", default='', help="record every game to a journal in this directory, see journal.py")
+define("bot_seats", default=2, help="seats filled with bots when a game is started with fewer players", type=int)
+define("bots", default='big_money,big_money:Smithy', help="comma separated strategies of the bots, see bots.create()")
+define("bot_budget", default=1.0, help="seconds a bot may think about a move before a fallback move is played", type=float)
+define("bot_workers", default=None, help="worker processes the bots think in, one per core if not given", type=int)
+define("watchdog_threshold", default=0.1, help="seconds a message may take to handle before it is logged as slow, see watchdog.py", type=float)
+define("watchdog_stacks", default=False, help="sample the stack of the IO loop while it is held up for longer than the threshold", type=bool)
+define("admin_token", default='', help="token the /admin pages have to be requested with, they are turned off without one")
+
+# instrumentation of the server, served on /metrics
+METRICS = metrics.Registry()
+HANDLER_SECONDS = METRICS.histogram('dominion_handler_seconds',
+	'Time taken to handle a message from a client and send everything it produced, by command', labels=('command',))
+FRAMES_PER_MESSAGE = METRICS.histogram('dominion_frames_per_message',
+	'Frames sent to clients as a result of one message from a client', buckets=(0, 1, 2, 3, 4, 6, 8, 12, 16))
+FRAME_BYTES = METRICS.histogram('dominion_frame_bytes',
+	'Size of each frame sent to a client', buckets=(64, 128, 256, 512, 1024, 2048, 4096, 8192))
+FRAMES_SENT = METRICS.counter('dominion_frames_sent_total', 'Frames sent to clients')
+EVENTS_PER_INPUT = METRICS.histogram('dominion_events_per_input',
+	'Game events produced by one game input', buckets=(0, 1, 2, 4, 8, 16, 32, 64))
+GAME_INPUTS = METRICS.counter('dominion_game_inputs_total', 'Inputs passed to the game loops, by command', ('command',))
+TURNS = METRICS.counter('dominion_turns_total', 'Turns played')
+GAMES_STARTED  = METRICS.counter('dominion_games_started_total', 'Games started')
+GAMES_FINISHED = METRICS.counter('dominion_games_finished_total', 'Games played to the end')
+GAMES_FAILED   = METRICS.counter('dominion_games_failed_total', 'Games ended because their game loop raised an exception')
 
 # handles GET and POST requests
 class IndexHandler(tornado.web.RequestHandler):
-	def get(self):
-		self.render('index.html', error='')
-
-	def post(self):
-		name = self.get_argument('name')
-		# return to previous page if a game is already in progress, the maximum player count has been reached,
-		# or the specified username is already being used by another player
-		if GameConnection.game != None:
-			self.render('index.html', error='A match is already in progress, please try again later.')
-		elif len(GameConnection.participants) >= 4:
-			self.render('index.html', error='We are at maximum player count, please try again later.')
-		elif name in GameConnection.names:
-			self.render('index.html', error='That name is already taken, please try again.')
+	def get(self, room_id=''):
+		self.render('index.html', error='', room=room_id)
+
+	def post(self, room_id=''):
+		name    = self.get_argument('name')
+		room_id = self.get_argument('room', room_id)
+		registry = GameConnection.rooms
+		# players without a room id are placed in a room that is waiting for players
+		if room_id == '':
+			room_id = registry.find_open()
+		room = registry.get(room_id)
+		# return to previous page if the room id is invalid, a game is already in progress in the room,
+		# the maximum player count has been reached, or the specified username is already being used by another player
+		if not registry.valid_id.match(room_id):
+			self.render('index.html', error='Room names must be alphanumeric, please try again.', room='')
+		elif room != None and room.in_progress():
+			self.render('index.html', error='A match is already in progress in that room, please try again later.', room='')
+		elif room != None and room.is_full():
+			self.render('index.html', error='That room is at maximum player count, please try again later.', room='')
+		elif room != None and name in room:
+			self.render('index.html', error='That name is already taken, please try again.', room=room_id)
 		else:
-			self.render('dominion.html', name=name)
+			self.render('dominion.html', name=name, room=room_id)
 
 # handles websocket connection between the server and clients
 class GameConnection(sockjs.tornado.SockJSConnection):
-	participants = []
-	names = []
-	game = None
-	coro = None
+	rooms  = rooms.RoomRegistry()
+	seats  = seats.BotSeats()
+	is_bot = False
+	# watches for messages that hold up the IO loop, see watchdog.py
+	watchdog = watchdog.Watchdog(registry=METRICS)
+	# the number of open connections
+	connections = 0
 
 	def on_open(self, info):
-		cls = GameConnection
-		cls.participants.append(self)
+		# the room and protocol are not known until the client sends its Open message
+		GameConnection.connections += 1
+		self.room     = None
+		self.name     = None
+		self.protocol = None
+		self.outbox   = []
 
-	# messages are parsed from clients
-	# each message sent from the client to the server is in the format '<command>:<info>'
 	def on_message(self, message):
-		cls     = GameConnection
-		command = message.split(':')[0]
-		info    = message.split(':')[1]
+		# everything produced by handling one message is sent once the message is handled
+		# the time it took and the number of frames sent are recorded for /metrics
+		# messages are parsed once by the protocol negotiated in the client's Open message
+		# clients either send '<command>:<info>' text or compact JSON arrays, see protocol.py
+		# a message that is not valid becomes an Invalid input, which is answered with an error
+		start  = time.perf_counter()
+		frames = FRAMES_SENT.value()
+		if self.protocol == None:
+			self.protocol = protocol.negotiate(message)
+		try:
+			user_input = self.protocol.decode(message)
+			self.check(user_input)
+		except ValueError as e:
+			user_input = protocol.Input('Invalid', self.name, (str(e),))
+		GameConnection.watchdog.begin(watchdog.context(self.room, user_input, self.name))
+		try:
+			self.handle_message(user_input)
+		finally:
+			self.flush()
+			GameConnection.watchdog.end()
+		# a client whose Open was turned down may open again, in either protocol
+		if self.room == None:
+			self.protocol = None
+		HANDLER_SECONDS.observe(time.perf_counter() - start, (user_input.command,))
+		FRAMES_PER_MESSAGE.observe(FRAMES_SENT.value() - frames)
+		self.play_bots()
 
+	def check(self, user_input):
+		# raises ValueError if the input cannot be handled in the state the client and its room are in
+		# the game inputs are checked by the game, so nothing that reaches the game loop can break it
+		command = user_input.command
+		room    = self.room
 		if command == 'Open':
-			cls.names.append(info)
-			self.broadcast(cls.participants, 'Names:' + ','.join(name for name in cls.names))
+			if room != None:
+				raise ValueError('you are already in a room')
+			name, room_id = user_input.args
+			# the room id ends up in the name of the room's journal file
+			if not GameConnection.rooms.valid_id.match(room_id):
+				raise ValueError('room names have to be 1 to 20 letters and digits')
+			# the same rules as IndexHandler.post(), for clients that open without going through it
+			room = GameConnection.rooms.get(room_id)
+			if room != None:
+				room.check_join(name)
+		elif room == None:
+			raise ValueError('the first message has to be Open')
+		elif command in protocol.GAME_COMMANDS or command == 'Trash':
+			if not room.in_progress():
+				raise ValueError('no game is being played')
+			# the game loop takes every input as the move of the player it waits on, so only their client may send one
+			game = room.game
+			if command != 'Trash' and game.player_names()[game.to_move()] != self.name:
+				raise ValueError('it is not your move')
+			if command != 'Trash':
+				game.check_input(user_input)
+
+	def handle_message(self, user_input):
+		command    = user_input.command
+		room       = self.room
+
+		# an input that was turned down is only answered to the client that sent it
+		if command == 'Invalid':
+			event = events.Event('error_invalid', detail=user_input.args[0], recipient=self.name or '')
+			self.post([self], protocol.Message('Event', event))
+
+		elif command == 'Open':
+			self.name, room_id = user_input.args
+			room = self.room = GameConnection.rooms.get_or_create(room_id)
+			room.join(self, self.name)
+			if self.protocol.version == protocol.COMPACT_VERSION:
+				self.post([self], protocol.Message('Hello'))
+			self.post(room.participants, protocol.Message('Names', tuple(room.names)))
 
 		elif command == 'Chat':
-		 	self.broadcast(cls.participants, message)
+			# text clients send chat messages that already start with '(<name>) '
+			text = user_input.args[0]
+			if self.protocol.version == protocol.COMPACT_VERSION:
+				text = '({}) {}'.format(self.name, text)
+			self.post(room.participants, protocol.Message('Chat', text))
 
 		elif command == 'Trash':
-			cls = GameConnection
-			if cls.game._trash.is_empty():
-				self.send('Public:The trash is empty.')
+			if room.game._trash.is_empty():
+				event = events.Event('trash_empty', recipient=self.name)
 			else:
-				self.send('Public:Cards in trash are ' + ', '.join([card.name for card in cls.game._trash]) + '.')
+				event = events.Event('trash_contents', cards=tuple(card.name for card in room.game._trash), recipient=self.name)
+			self.post([self], protocol.Message('Event', event))
 
 		# once a game is started, an instance of the dominion class is created
 		# all relevant information is presented to each player
+		# seats left empty are taken by bots, see seats.py
 		elif command == 'Start':
-			self.broadcast(cls.participants, 'Start: (blank)')
-			cls.game = dominion.Dominion(cls.names)
-			cls.coro = cls.game.game_loop()
-			ret = next(cls.coro)
-			self.broadcast(cls.participants, ret)
+			if GameConnection.seats.fill(room, options.bot_seats):
+				self.post(room.participants, protocol.Message('Names', tuple(room.names)))
+			self.post(room.participants, protocol.Message('Start'))
+			ret = room.start_game()
+			GAMES_STARTED.inc()
+			self.post(room.participants, protocol.Message('Turn', ret))
 			self.display_supply()
 			self.display_curses()
 			self.display_trash()
@@ -74,77 +191,286 @@ class GameConnection(sockjs.tornado.SockJSConnection):
 			self.display_stats()
 			self.display_decks()
 			self.display_discards()
+			room.game.changed_zones()
+
+		# a client can request the full state of the game at any time
+		elif command == 'Sync':
+			self.display_all()
 
+		# after every other message only the zones that changed are sent
 		else:
-			ret = cls.coro.send(message)
-			self.display_supply()
-			self.display_curses()
-			self.display_trash()
-			self.display_hands()
-			while cls.game.info_list != []:
-				msg = cls.game.info_list.pop(0)
-				self.broadcast(cls.participants, msg)
-				if msg.split(':')[0] == 'End Game':
-					cls.game = None
-					return
-			if ret: self.broadcast(cls.participants, ret)
-			self.display_stats()
-			self.display_decks()
-			self.display_discards()
+			# compact clients do not repeat their name in every game input, and the name a text client
+			# sends is not trusted, the input is the move of the player of the connection
+			self.handle_input(user_input._replace(name=self.name))
+
+	def handle_input(self, user_input):
+		# passes a game input to the room and sends everyone what it changed
+		room = self.room
+		try:
+			ret = room.send(user_input)
+		except Exception:
+			# a game loop that raised cannot take another input, so the game is ended
+			# rather than left in the room answering every input with StopIteration
+			tornado.log.app_log.exception('game loop of room %s raised on %s', room.room_id, user_input)
+			GAMES_FAILED.inc()
+			self.end_game(events.Event('game_failed'))
+			return
+		GAME_INPUTS.inc(1, (user_input.command,))
+		if ret: TURNS.inc()
+		changed = room.game.changed_zones()
+		# the client clears the stats display when the turn passes to another player
+		if ret: changed.extend(('stats', idx) for idx in range(len(room.participants)) if ('stats', idx) not in changed)
+		self.display_zones(changed, {'supply', 'curses', 'trash', 'hand'})
+		# private events are only sent to the player they are meant for
+		count = 0
+		for event in room.game.events.drain():
+			count += 1
+			if not event.is_private():
+				self.post(room.participants, protocol.Message('Event', event))
+			elif event.recipient in room.names:
+				self.post([room.participants[room.names.index(event.recipient)]], protocol.Message('Event', event))
+			if event.kind == 'end_game':
+				EVENTS_PER_INPUT.observe(count)
+				GAMES_FINISHED.inc()
+				self.end_game()
+				return
+		EVENTS_PER_INPUT.observe(count)
+		if ret: self.post(room.participants, protocol.Message('Turn', ret))
+		self.display_zones(changed, {'stats', 'deck', 'discard'})
+
+	def end_game(self, event=None):
+		# ends the game of the room, telling every player about it with event if one is given
+		# the bots that stood in for players who left go with the game
+		room  = self.room
+		names = tuple(room.names)
+		room.end_game()
+		if event != None:
+			self.post(room.participants, protocol.Message('Event', event))
+		if tuple(room.names) != names:
+			self.post(room.participants, protocol.Message('Names', tuple(room.names)))
 
 	def on_close(self):
-		cls = GameConnection
-		idx = cls.participants.index(self)
-		cls.participants.pop(idx)
-		rage_quitter = cls.names.pop(idx)
-		self.broadcast(cls.participants, 'Names:' + ','.join(name for name in cls.names))
-		if cls.participants == []:
-			cls.game = None
-		self.broadcast(cls.participants, 'Leave:{} has left the game.'.format(rage_quitter))
+		GameConnection.connections -= 1
+		room = self.room
+		if room == None:
+			return
+		# a bot plays on for a player who leaves during a game, see Room.leave()
+		in_progress  = room.in_progress()
+		rage_quitter = room.leave(self, GameConnection.seats.stand_in(self.name) if in_progress else None)
+		if room.participants == []:
+			GameConnection.rooms.remove(room)
+			return
+		# a Leave ends the game for the clients, the names do not change while a bot plays on
+		if in_progress:
+			self.post(room.participants, protocol.Message('Stand In', rage_quitter))
+		else:
+			self.post(room.participants, protocol.Message('Names', tuple(room.names)))
+			self.post(room.participants, protocol.Message('Leave', '{} has left the game.'.format(rage_quitter)))
+		self.flush()
+		self.play_bots()
+
+	def play_bots(self):
+		# lets the bots of the room move until a player has to, without waiting for them
+		room = self.room
+		if room != None and room.in_progress():
+			tornado.ioloop.IOLoop.current().spawn_callback(GameConnection.seats.play, room, GameConnection.play_bot_move)
+
+	@staticmethod
+	def play_bot_move(room, user_input):
+		# handles a bot's move through a player's connection, as if it had been sent by that player
+		for participant in room.participants:
+			if not participant.is_bot:
+				GameConnection.watchdog.begin(watchdog.context(room, user_input))
+				try:
+					participant.handle_input(user_input)
+					participant.flush()
+				finally:
+					GameConnection.watchdog.end()
+				return
+
+	def post(self, participants, message):
+		# queues a message for batched clients and sends it right away to everyone else
+		# nothing is sent to bots
+		direct = []
+		for participant in participants:
+			if participant.is_bot:
+				continue
+			if participant.protocol.batched:
+				participant.outbox.append(message)
+			else:
+				direct.append(participant)
+		if direct:
+			encoded = message.encode(direct[0].protocol)
+			self.broadcast(direct, encoded)
+			FRAMES_SENT.inc(len(direct))
+			for participant in direct:
+				FRAME_BYTES.observe(len(encoded))
+
+	def flush(self):
+		# sends each batched client everything queued for it as a single frame
+		# messages posted to several clients are only encoded once per protocol
+		participants = self.room.participants if self.room != None else [self]
+		for participant in participants:
+			if participant.outbox != []:
+				encoded = [message.encode(participant.protocol) for message in participant.outbox]
+				frame   = participant.protocol.frame(encoded)
+				participant.send(frame)
+				participant.outbox = []
+				FRAMES_SENT.inc()
+				FRAME_BYTES.observe(len(frame))
 
 	# various functions that grab infomation from the dominion class and sends it to client
+	def display_zones(self, zones, zone_names):
+		# sends the given zones, skipping any whose name is not in zone_names
+		room = self.room
+		for zone, idx in zones:
+			if zone not in zone_names:
+				continue
+			if zone == 'supply':
+				self.post(room.participants, protocol.Message('Pile', (idx,) + room.game.pile(idx)))
+			elif zone == 'curses':
+				self.post(room.participants, protocol.Message('Curses', room.game.curse_pile()))
+			elif zone == 'trash':
+				self.post(room.participants, protocol.Message('Trash', room.game.trash_pile()))
+			elif idx < len(room.participants):
+				if zone == 'hand':
+					self.post([room.participants[idx]], protocol.Message('Hand', room.game.hand(idx)))
+				elif zone == 'deck':
+					self.post([room.participants[idx]], protocol.Message('Deck', room.game.deck_pile(idx)))
+				elif zone == 'discard':
+					self.post([room.participants[idx]], protocol.Message('Discard', room.game.discard_pile(idx)))
+				elif zone == 'stats':
+					self.post([room.participants[idx]], protocol.Message('Stats', room.game.stats(idx)))
+
+	def display_all(self):
+		# sends the full state of the game to this client only
+		room = self.room
+		if room.game == None:
+			return
+		idx = room.participants.index(self)
+		self.post([self], protocol.Message('Supply',  room.game.supply_piles()))
+		self.post([self], protocol.Message('Curses',  room.game.curse_pile()))
+		self.post([self], protocol.Message('Trash',   room.game.trash_pile()))
+		self.post([self], protocol.Message('Hand',    room.game.hand(idx)))
+		self.post([self], protocol.Message('Stats',   room.game.stats(idx)))
+		self.post([self], protocol.Message('Deck',    room.game.deck_pile(idx)))
+		self.post([self], protocol.Message('Discard', room.game.discard_pile(idx)))
+
 	def display_supply(self):
-		cls = GameConnection
-		self.broadcast(cls.participants, 'Supply:' + cls.game.supply_string())
+		room = self.room
+		self.post(room.participants, protocol.Message('Supply', room.game.supply_piles()))
 
 	def display_curses(self):
-		cls = GameConnection
-		self.broadcast(cls.participants, 'Curses:' + cls.game.curse_string())
+		room = self.room
+		self.post(room.participants, protocol.Message('Curses', room.game.curse_pile()))
 
 	def display_trash(self):
-		cls = GameConnection
-		self.broadcast(cls.participants, 'Trash:' + cls.game.trash_string())
+		room = self.room
+		self.post(room.participants, protocol.Message('Trash', room.game.trash_pile()))
 
 	def display_hands(self):
-		cls = GameConnection
-		for idx, participant in enumerate(cls.participants):
-			participant.send('Hand:' + cls.game.hand_string(idx))
+		room = self.room
+		for idx, participant in enumerate(room.participants):
+			self.post([participant], protocol.Message('Hand', room.game.hand(idx)))
 
 	def display_discards(self):
-		cls = GameConnection
-		for idx, participant in enumerate(cls.participants):
-			participant.send('Discard:' + cls.game.discard_string(idx))
+		room = self.room
+		for idx, participant in enumerate(room.participants):
+			self.post([participant], protocol.Message('Discard', room.game.discard_pile(idx)))
 
 	def display_stats(self):
-		cls = GameConnection
-		for idx, participant in enumerate(cls.participants):
-			participant.send('Stats:' + cls.game.stats_string(idx))
+		room = self.room
+		for idx, participant in enumerate(room.participants):
+			self.post([participant], protocol.Message('Stats', room.game.stats(idx)))
 
 	def display_decks(self):
-		cls = GameConnection
-		for idx, participant in enumerate(cls.participants):
-			participant.send('Deck:' + cls.game.deck_string(idx))
+		room = self.room
+		for idx, participant in enumerate(room.participants):
+			self.post([participant], protocol.Message('Deck', room.game.deck_pile(idx)))
+
+METRICS.gauge('dominion_connections', 'Open client connections', lambda: GameConnection.connections)
+METRICS.gauge('dominion_rooms', 'Rooms with at least one player', lambda: len(GameConnection.rooms))
+METRICS.gauge('dominion_games_in_progress', 'Rooms playing a game',
+			  lambda: sum(1 for room in GameConnection.rooms if room.in_progress()))
+
+# profiles the messages handled for a room on request, see AdminHandler and profiler.py
+PROFILER = profiler.Profiler(lambda: GameConnection.watchdog.handling(),
+							 (GameConnection.on_message, GameConnection.play_bot_move))
+
+# serves the metrics of the server in the Prometheus text format
+class MetricsHandler(tornado.web.RequestHandler):
+	def get(self):
+		self.set_header('Content-Type', metrics.Registry.content_type)
+		self.write(METRICS.exposition())
+
+# serves the state of the server as JSON to requests carrying the admin token, as ?token= or an X-Admin-Token header
+# the admin pages are turned off unless the server is started with --admin_token
+class AdminHandler(tornado.web.RequestHandler):
+	def prepare(self):
+		token = self.get_argument('token', self.request.headers.get('X-Admin-Token', ''))
+		if options.admin_token == '' or not hmac.compare_digest(token.encode(), options.admin_token.encode()):
+			raise tornado.web.HTTPError(403)
+
+	# /admin/watchdog is the report of the watchdog
+	# /admin/profile is the progress of the last profile, or its stacks with ?format=collapsed, e.g. for flamegraph.pl
+	def get(self, page):
+		if page == 'watchdog':
+			self.write(GameConnection.watchdog.report())
+		elif page == 'profile' and self.get_argument('format', 'json') == 'collapsed':
+			self.set_header('Content-Type', 'text/plain; charset=utf-8')
+			self.write(PROFILER.collapsed())
+		elif page == 'profile':
+			self.write(PROFILER.status())
+		else:
+			raise tornado.web.HTTPError(404)
+
+	# a profile is started with POST /admin/profile?action=start&room=<room id>&seconds=10&hz=200,
+	# every room is profiled when no room is given, and stopped early with action=stop
+	def post(self, page):
+		if page != 'profile':
+			raise tornado.web.HTTPError(404)
+		action = self.get_argument('action', 'start')
+		if action == 'stop':
+			PROFILER.stop()
+		elif action == 'start':
+			if not profiler.Profiler.available:
+				raise tornado.web.HTTPError(501, 'profiles need SIGPROF, which this platform does not have')
+			room_id = self.get_argument('room', '')
+			try:
+				seconds = float(self.get_argument('seconds', '10'))
+				hz      = float(self.get_argument('hz', '200'))
+			except ValueError:
+				raise tornado.web.HTTPError(400, 'seconds and hz have to be numbers')
+			# float() also takes 'nan' and 'inf', neither is within the limits
+			if not 0 < seconds <= profiler.MAX_SECONDS:
+				raise tornado.web.HTTPError(400, 'seconds has to be more than 0 and at most {}'.format(profiler.MAX_SECONDS))
+			if not 0 < hz <= profiler.MAX_HZ:
+				raise tornado.web.HTTPError(400, 'hz has to be more than 0 and at most {}'.format(profiler.MAX_HZ))
+			if room_id != '' and room_id not in GameConnection.rooms:
+				raise tornado.web.HTTPError(404, 'there is no room {}'.format(room_id))
+			if not PROFILER.start(room_id if room_id != '' else None, seconds, hz):
+				raise tornado.web.HTTPError(409, 'a profile is already running')
+		else:
+			raise tornado.web.HTTPError(400, 'action has to be start or stop')
+		self.write(PROFILER.status())
 
 if __name__ == '__main__':
 	GameRouter = sockjs.tornado.SockJSRouter(GameConnection, '/router')
 
 	tornado.options.parse_command_line()
+	if options.journal_dir != '':
+		GameConnection.rooms.journal_dir = options.journal_dir
+	GameConnection.seats = seats.BotSeats(options.bots.split(','), options.bot_budget, options.bot_workers)
+	GameConnection.watchdog.threshold = options.watchdog_threshold
+	GameConnection.watchdog.stacks    = options.watchdog_stacks
 	app = tornado.web.Application(
-		handlers=[(r'/', IndexHandler)] + GameRouter.urls,
+		handlers=[(r'/', IndexHandler), (r'/room/([a-zA-Z0-9]{1,20})', IndexHandler), (r'/metrics', MetricsHandler),
+				  (r'/admin/(\w+)', AdminHandler)] + GameRouter.urls,
 				  template_path=os.path.join(os.path.dirname(__file__), 'templates'),
 				  static_path=os.path.join(os.path.dirname(__file__), 'static'),
 				  debug=True
 		)
 
 	app.listen(int(os.environ.get('PORT', 8000)))
+	GameConnection.watchdog.start(tornado.ioloop.IOLoop.instance())
 	tornado.ioloop.IOLoop.instance().start()
@@ -0,0 +1,126 @@
+import bisect
+
+# upper bounds of the buckets of latency histograms, in seconds
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+def _labels(names, values, extra=''):
+	# returns the label set of a series in the text format, e.g. {command="Buy Card"}
+	pairs = ['{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+			 for name, value in zip(names, values)]
+	if extra:
+		pairs.append(extra)
+	return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _number(value):
+	# returns a number in the text format
+	if value == float('inf'):
+		return '+Inf'
+	return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+	"""A number that only goes up, kept for every combination of label values."""
+
+	kind = 'counter'
+
+	def __init__(self, name, description, labels=()):
+		self.name        = name
+		self.description = description
+		self.labels      = tuple(labels)
+		self._values     = {}
+
+	def inc(self, amount=1, labels=()):
+		# adds amount to the series of the given label values
+		self._values[labels] = self._values.get(labels, 0) + amount
+
+	def value(self, labels=()):
+		return self._values.get(labels, 0)
+
+	def samples(self):
+		# yields the lines of the series in the text format
+		for values, total in sorted(self._values.items()):
+			yield '{}{} {}'.format(self.name, _labels(self.labels, values), _number(total))
+
+class Gauge:
+	"""A number read when the metrics are collected, from a function that
+	   takes no arguments."""
+
+	kind = 'gauge'
+
+	def __init__(self, name, description, function):
+		self.name        = name
+		self.description = description
+		self.function    = function
+
+	def samples(self):
+		yield '{} {}'.format(self.name, _number(self.function()))
+
+class Histogram:
+	"""Counts observations in buckets, for every combination of label values.
+	   Observing a value costs a binary search over the bucket bounds."""
+
+	kind = 'histogram'
+
+	def __init__(self, name, description, buckets=LATENCY_BUCKETS, labels=()):
+		self.name        = name
+		self.description = description
+		self.buckets     = tuple(buckets)
+		self.labels      = tuple(labels)
+		self._series     = {}
+
+	def observe(self, value, labels=()):
+		# counts a value in the series of the given label values
+		series = self._series.get(labels)
+		if series == None:
+			# the count of each bucket, the last one has no upper bound, and the sum of the values
+			series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0]
+		series[0][bisect.bisect_left(self.buckets, value)] += 1
+		series[1] += value
+
+	def count(self, labels=()):
+		series = self._series.get(labels)
+		return sum(series[0]) if series != None else 0
+
+	def samples(self):
+		# yields the cumulative buckets, sum and count of every series in the text format
+		for values, (counts, total) in sorted(self._series.items()):
+			cumulative = 0
+			for bound, count in zip(self.buckets + (float('inf'),), counts):
+				cumulative += count
+				le = 'le="{}"'.format(_number(bound if bound == float('inf') else float(bound)))
+				yield '{}_bucket{} {}'.format(self.name, _labels(self.labels, values, le), cumulative)
+			yield '{}_sum{} {}'.format(self.name, _labels(self.labels, values), _number(total))
+			yield '{}_count{} {}'.format(self.name, _labels(self.labels, values), cumulative)
+
+class Registry:
+	"""The metrics of a process, written out in the Prometheus text exposition
+	   format by exposition()."""
+
+	content_type = 'text/plain; version=0.0.4; charset=utf-8'
+
+	def __init__(self):
+		self._metrics = []
+
+	def counter(self, name, description, labels=()):
+		return self.register(Counter(name, description, labels))
+
+	def gauge(self, name, description, function):
+		return self.register(Gauge(name, description, function))
+
+	def histogram(self, name, description, buckets=LATENCY_BUCKETS, labels=()):
+		return self.register(Histogram(name, description, buckets, labels))
+
+	def register(self, metric):
+		# adds a metric and returns it, names must be unique
+		if any(other.name == metric.name for other in self._metrics):
+			raise ValueError('a metric named {} is already registered'.format(metric.name))
+		self._metrics.append(metric)
+		return metric
+
+	def exposition(self):
+		# returns every metric in the text format
+		lines = []
+		for metric in self._metrics:
+			lines.append('# HELP {} {}'.format(metric.name, metric.description.replace('\\', '\\\\').replace('\n', '\\n')))
+			lines.append('# TYPE {} {}'.format(metric.name, metric.kind))
+			lines.extend(metric.samples())
+		return '\n'.join(lines) + '\n'
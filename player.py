@@ -1,17 +1,19 @@
 import sys
 import cards
+from collections import Counter
 
 class Player:
 	"""A class to represent a player.
 	   Four lists to manage: deck, hand, discard pile, and cards in play."""
 
-	def __init__(self, name=''):
+	def __init__(self, name='', rng=None):
 		# initialize name, score, and card lists
+		# rng is the random.Random the deck is shuffled with, see Dominion
 		self.name           = name
 		self.actions        = 0
 		self.gold           = 0
 		self.buys           = 0
-		self._deck          = cards.Cards()
+		self._deck          = cards.Cards(rng)
 		self._hand          = cards.Cards()
 		self._discard_pile  = cards.Cards()
 		self._cards_in_play = cards.Cards()
@@ -20,9 +22,14 @@ class Player:
 						   'discard': self._discard_pile,
 						   'in play': self._cards_in_play,}
 
+		# the number of copies of each card id the player owns across all four lists
+		# cards moved from one list to another are not counted again
+		self._composition = Counter()
+		self._card_total  = 0
+
 		# a player starts with three Estates and seven Coppers in deck
-		estates = [cards.Card('Estate', 'Victory', 2)  for amount in range(3)]
-		coppers = [cards.Card('Copper', 'Treasure', 0) for amount in range(7)]
+		estates = [cards.CARDS['Estate']] * 3
+		coppers = [cards.CARDS['Copper']] * 7
 		self.add_cards('deck', estates)
 		self.add_cards('deck', coppers)
 		
@@ -63,12 +70,9 @@ class Player:
 
 		return '\n'.join(ret)
 
-	def __len__(self, card_list):
+	def __len__(self):
 		# returns the total number of cards owned by the player
-		return sum([len(self._deck),
-			        len(self._hand), 
-			        len(self._discard_pile),
-			        len(self._cards_in_play)])
+		return self._card_total
 
 	def __contains__(self, card):
 		# returns True if a given card is in the player's hand
@@ -88,6 +92,26 @@ class Player:
 		else:
 			return card_list[idx]
 
+	def clone(self, rng=None):
+		# returns a copy of the player whose lists share their cards with this player's until either changes
+		# the copy's deck is shuffled with rng, or with the same generator as this player's if rng is None
+		copy = Player.__new__(Player)
+		copy.name           = self.name
+		copy.actions        = self.actions
+		copy.gold           = self.gold
+		copy.buys           = self.buys
+		copy._deck          = self._deck.clone(rng)
+		copy._hand          = self._hand.clone()
+		copy._discard_pile  = self._discard_pile.clone()
+		copy._cards_in_play = self._cards_in_play.clone()
+		copy._card_dict = {'hand':    copy._hand,
+						   'deck':    copy._deck,
+						   'discard': copy._discard_pile,
+						   'in play': copy._cards_in_play,}
+		copy._composition = self._composition.copy()
+		copy._card_total  = self._card_total
+		return copy
+
 	def draw_card(self):
 		# draw 1 card from the deck and place it in hand
 		if self.is_empty('deck') == False:
@@ -144,6 +168,7 @@ class Player:
 		except KeyError:
 			sys.stderr.write('KeyError in Player.add_cards()\n')
 		else:
+			self.count_cards(cards_to_add, 1)
 			card_list.add_cards(cards_to_add)
 
 	def remove_card(self, card_list, idx=-1):
@@ -153,7 +178,10 @@ class Player:
 		except KeyError:
 			sys.stderr.write('KeyError in Player.remove_card()\n')
 		else:
-			return card_list.remove_card(idx)
+			removed_card = card_list.remove_card(idx)
+			if removed_card != None:
+				self.count_cards(removed_card, -1)
+			return removed_card
 
 	def remove_all_cards(self, card_list):
 		# removes all cards from one of the lists and returns them
@@ -162,7 +190,31 @@ class Player:
 		except KeyError:
 			sys.stderr.write('KeyError in Player.remove_all_cards()\n')
 		else:
-			return card_list.remove_all_cards()
+			removed_cards = card_list.remove_all_cards()
+			self.count_cards(removed_cards, -1)
+			return removed_cards
+
+	def count_cards(self, cards_changed, amount):
+		# adds amount to the count of each given card, 1 when cards are gained and -1 when they are lost
+		if type(cards_changed) != list:
+			cards_changed = [cards_changed]
+		for card in cards_changed:
+			self._composition[card.id] += amount
+		self._card_total += amount * len(cards_changed)
+
+	def card_count(self, card):
+		# returns the number of copies of a given card the player owns
+		return self._composition[card.id]
+
+	def score(self):
+		# returns the player's current victory points
+		score = 0
+		for card_id, points in cards.VICTORY_POINTS.items():
+			score += points * self._composition[card_id]
+
+		# gardens are worth 1 point for every 10 cards the player owns
+		score += (self._card_total // 10) * self.card_count(cards.CARDS['Gardens'])
+		return score
 
 	def length(self, card_list):
 		# returns the total number of cards in the given list
@@ -173,40 +225,45 @@ class Player:
 		else:
 			return len(card_list)
 
+	def version(self, card_list):
+		# returns the version of the given list, which changes whenever the list does
+		try:
+			card_list = self._card_dict[card_list]
+		except KeyError:
+			sys.stderr.write('KeyError in Player.version()\n')
+		else:
+			return card_list.version
+
+	def state(self):
+		# returns the player's stats and the card ids in each list
+		state = {'name': self.name, 'actions': self.actions, 'gold': self.gold, 'buys': self.buys}
+		for list_name, card_list in self._card_dict.items():
+			state[list_name] = card_list.card_ids()
+		return state
+
+	def load_state(self, state):
+		# replaces the player's stats and cards with ones returned by state()
+		self.actions = state['actions']
+		self.gold    = state['gold']
+		self.buys    = state['buys']
+		self._composition = Counter()
+		self._card_total  = 0
+		for list_name, card_list in self._card_dict.items():
+			card_list.remove_all_cards()
+			restored = [cards.CATALOG[card_id] for card_id in state[list_name]]
+			self.count_cards(restored, 1)
+			card_list.add_cards(restored)
+
 	def calc_score(self):
-		# calculates the final score for the player once the game ends
+		# returns the final score for the player once the game ends
+		# the score is read from the card counts, so the player's lists are left as they are
 		score_string = '{} -> '.format(self.name)
 
-		self.transfer_cards('hand',    'deck')
-		self.transfer_cards('discard', 'deck')
-		self.transfer_cards('in play', 'deck')
+		for name, plural in [('Province', 'Provinces'), ('Duchy', 'Duchies'), ('Estate', 'Estates'),
+							 ('Gardens', 'Gardens'), ('Curse', 'Curses')]:
+			if self.card_count(cards.CARDS[name]) > 0:
+				score_string += '{} {} '.format(self.card_count(cards.CARDS[name]), plural)
 
-		def card_count(card): return self._deck.card_count(card)
+		score_string += ' = {}'.format(self.score())
 
-		# estates are worth 1 point, duchies are worth 3, and provinces are worth 6
-		score  = 0
-		score += 1 * card_count(cards.Card('Estate', 'Victory', 2))
-		score += 3 * card_count(cards.Card('Duchy', 'Victory', 5))
-		score += 6 * card_count(cards.Card('Province', 'Victory', 8))
-
-		# curses are worth -1 point
-		score += -1 * card_count(cards.Card('Curse', 'Curse', 0))
-		
-		# gardens are worth 1 point for every 10 cards in the deck
-		gardens_count = card_count(cards.Card('Gardens', 'Victory', 4))
-		score += (len(self._deck) // 10) * gardens_count
-
-		if cards.Card('Province', 'Victory', 8) in self._deck:
-			score_string += '{} Provinces '.format(str(card_count(cards.Card('Province', 'Victory', 8))))
-		if cards.Card('Duchy', 'Victory', 5) in self._deck:
-			score_string += '{} Duchies '.format(str(card_count(cards.Card('Duchy', 'Victory', 5))))
-		if cards.Card('Estate', 'Victory', 2) in self._deck:
-			score_string += '{} Estates '.format(str(card_count(cards.Card('Estate', 'Victory', 2))))
-		if cards.Card('Gardens', 'Victory', 4) in self._deck:
-			score_string += '{} Gardens '.format(str(card_count(cards.Card('Gardens', 'Victory', 4))))
-		if cards.Card('Curse', 'Curse', 0) in self._deck:
-			score_string += '{} Curses '.format(str(card_count(cards.Card('Curse', 'Curse', 0))))
-
-		score_string += ' = {}'.format(score)
-
-		return score_string
\ No newline at end of file
+		return score_string
@@ -0,0 +1,135 @@
+import os
+import time
+import signal
+import collections
+from tornado import ioloop
+
+# the longest a profile may run, in seconds, and the most samples it may take per second of CPU time
+MAX_SECONDS = 300
+MAX_HZ      = 1000
+
+def frame_label(frame):
+	# returns the name a frame is shown under in a stack: its module and function, e.g. dominion:buy_card
+	# Dominion.play_action resolves every card in its own branch, so the card played is added, e.g. dominion:play_action[Smithy]
+	code  = frame.f_code
+	label = '{}:{}'.format(os.path.splitext(os.path.basename(code.co_filename))[0], code.co_name)
+	if label == 'dominion:play_action':
+		card = frame.f_locals.get('played_card')
+		if card != None:
+			label += '[{}]'.format(card.name)
+	return label
+
+class Profiler:
+	"""Profiles the messages the IO loop handles for a room, for a limited
+	   time. A SIGPROF timer interrupts the process every 1/hz seconds of CPU
+	   time, and the signal handler counts the stack it interrupted under the
+	   room and command being handled. Python runs signal handlers on the main
+	   thread between two bytecodes, so unlike a sampling thread, which only
+	   gets to run where the loop lets go of the GIL, every line of a handler is
+	   as likely to be sampled as its share of the time. The stacks are written
+	   in the collapsed format read by flamegraph.pl and speedscope, one
+	   'frame;frame;frame count' line per stack.
+
+	   The handler running is told by context, so only code run between
+	   Watchdog.begin() and end() is profiled. The loop has to run on the main
+	   thread. A profile can be started and stopped at any time, only one runs
+	   at once."""
+
+	available = hasattr(signal, 'setitimer') and hasattr(signal, 'SIGPROF')
+
+	def __init__(self, context, entries=()):
+		# context returns the context of the handler running on the loop, or None, see Watchdog.handling()
+		# entries are the functions messages are handled by, the frames they are called from are left out
+		self.context   = context
+		self._entries  = set(function.__code__ for function in entries)
+		self._io_loop  = None
+		self._timeout  = None
+		self._handler  = False
+		self.running   = False
+		self.room      = None
+		self.seconds   = 0
+		self.hz        = 0
+		self.started   = None
+		self._stacks   = collections.Counter()
+		self._samples  = {'room': 0, 'other_rooms': 0, 'outside': 0}
+
+	def start(self, room_id=None, seconds=10, hz=200, io_loop=None):
+		# starts a profile of the given room, or of every room if room_id is None, and returns True
+		# returns False if a profile is already running, the stacks of the last profile are dropped
+		# has to be called on the main thread, which runs the loop
+		if self.running:
+			return False
+		# the handler is left installed once a profile has run, a signal still on its way after stop()
+		# then finds a handler that ignores it instead of the default action, which ends the process
+		if not self._handler:
+			signal.signal(signal.SIGPROF, self._sample)
+			self._handler = True
+		self.room     = room_id
+		self.seconds  = min(seconds, MAX_SECONDS)
+		self.hz       = min(hz, MAX_HZ)
+		self.started  = time.time()
+		self._stacks  = collections.Counter()
+		self._samples = {'room': 0, 'other_rooms': 0, 'outside': 0}
+		self._io_loop = io_loop if io_loop != None else ioloop.IOLoop.current()
+		self._timeout = self._io_loop.call_later(self.seconds, self.stop)
+		self.running  = True
+		signal.setitimer(signal.ITIMER_PROF, 1 / self.hz, 1 / self.hz)
+		return True
+
+	def stop(self):
+		# stops the profile running, the stacks it took are kept
+		if not self.running:
+			return
+		signal.setitimer(signal.ITIMER_PROF, 0)
+		self.running = False
+		self._io_loop.remove_timeout(self._timeout)
+		self._timeout = None
+
+	def _sample(self, signum, frame):
+		# the handler of SIGPROF, counts the interrupted stack under the room and command being handled
+		if not self.running:
+			return
+		handled = self.context()
+		if handled == None:
+			self._samples['outside'] += 1
+			return
+		if self.room != None and handled['room'] != self.room:
+			self._samples['other_rooms'] += 1
+			return
+		labels = []
+		while frame != None:
+			labels.append(frame_label(frame))
+			if frame.f_code in self._entries:
+				break
+			frame = frame.f_back
+		# a stack without an entry was interrupted after the handler had returned
+		if frame == None and self._entries:
+			self._samples['outside'] += 1
+			return
+		labels.append(handled['command'])
+		labels.append('room:{}'.format(handled['room']))
+		self._samples['room'] += 1
+		self._stacks[';'.join(reversed(labels))] += 1
+
+	# the signal handler can run between any two bytecodes of the loop, so the counts are copied
+	# in a single call before they are read
+	def collapsed(self):
+		# returns the stacks counted so far in the collapsed format, the most frequent first
+		stacks = sorted(list(self._stacks.items()), key=lambda item: -item[1])
+		return ''.join('{} {}\n'.format(stack, count) for stack, count in stacks)
+
+	def status(self):
+		# returns the settings and progress of the last profile and the functions most often on top of its
+		# stacks, in a form that can be sent as JSON
+		leaves = collections.Counter()
+		stacks = list(self._stacks.items())
+		for stack, count in stacks:
+			leaves[stack.rsplit(';', 1)[-1]] += count
+		return {'running': self.running,
+				'room':    self.room,
+				'seconds': self.seconds,
+				'hz':      self.hz,
+				'started': self.started,
+				'samples': dict(self._samples),
+				'stacks':  len(stacks),
+				'top':     [[label, count] for label, count in leaves.most_common(10)]}
@@ -0,0 +1,250 @@
+import json
+import cards
+from collections import namedtuple
+
+# version 1 is the original colon-delimited text protocol, version 2 is the compact protocol
+# every message of the compact protocol is a JSON array that starts with an opcode
+LEGACY_VERSION  = 1
+COMPACT_VERSION = 2
+
+# a message from a client, parsed once when it arrives
+# name is the player the input is for, args holds the remaining fields of the message
+Input = namedtuple('Input', 'command name args')
+
+# card names indexed by card id, cards are sent as their id from the catalog in cards.py
+CARD_NAMES = tuple(card.name for card in cards.CATALOG)
+
+# opcodes of the messages sent by clients and the fields that follow the opcode
+# Open is always [1, <version>, <name>, <room id>], the player of a game input is the sender
+CLIENT_SCHEMA = (
+	('Open',               'version name room'),
+	('Start',              ''),
+	('Chat',               'text'),
+	('Trash',              ''),
+	('Sync',               ''),
+	('Play Card',          'indices...'),
+	('Buy Card',           'index'),
+	('Play All Treasures', ''),
+	('End Turn',           ''),
+	)
+
+# opcodes of the messages sent by the server and the fields that follow the opcode
+# piles are sent as a card id followed by the number of cards in the pile
+SERVER_SCHEMA = (
+	('Hello',          'version card_names'),
+	('Names',          'names'),
+	('Start',          ''),
+	('Turn',           'name'),
+	('Supply',         'card_id count ...'),
+	('Pile',           'index card_id count'),
+	('Curses',         'card_id count'),
+	('Trash',          'card_id count'),
+	('Hand',           'card_ids'),
+	('Stats',          'actions gold buys'),
+	('Deck',           'card_id count'),
+	('Discard',        'card_id count'),
+	('Chat',           'text'),
+	('Leave',          'text'),
+	('Public',         'text'),
+	('End Game',       'text'),
+	('Select',         'text'),
+	('Gain',           'text'),
+	('Discard Prompt', 'text'),
+	('Decision',       'text option option'),
+	('Suspend',        'text'),
+	('Resume',         'text'),
+	('Error',          'text'),
+	('Stand In',       'name'),
+	)
+
+CLIENT_COMMANDS = {opcode: command for opcode, (command, fields) in enumerate(CLIENT_SCHEMA, 1)}
+CLIENT_FIELDS   = {command: tuple(fields.split()) for command, fields in CLIENT_SCHEMA}
+SERVER_OPCODES  = {command: opcode for opcode, (command, fields) in enumerate(SERVER_SCHEMA, 1)}
+
+# the type of every field of CLIENT_SCHEMA, indices are integers of at least 0 and a field ending in ... repeats
+FIELD_TYPES = {'version': int, 'name': str, 'room': str, 'text': str, 'index': int, 'indices...': int}
+
+# the inputs handled by the game loop of a room, every other input is handled by the server
+GAME_COMMANDS = {'Play Card', 'Buy Card', 'Play All Treasures', 'End Turn'}
+
+def check_fields(command, fields):
+	# raises ValueError unless the fields of a client message are the ones CLIENT_SCHEMA gives the command
+	if command not in CLIENT_FIELDS:
+		raise ValueError('unknown command {}'.format(command))
+	names = CLIENT_FIELDS[command]
+	if names and names[-1].endswith('...'):
+		names = names[:-1] + names[-1:] * max(0, len(fields) - len(names) + 1)
+	if len(fields) != len(names):
+		raise ValueError('{} takes {} field{}, not {}'.format(command, len(names), '' if len(names) == 1 else 's', len(fields)))
+	for name, field in zip(names, fields):
+		# booleans are integers to Python but not to the schema
+		if type(field) is not FIELD_TYPES[name] or (type(field) is int and field < 0):
+			kind = 'a whole number of at least 0' if FIELD_TYPES[name] is int else 'text'
+			raise ValueError('the {} of {} has to be {}'.format('index' if name == 'indices...' else name, command, kind))
+
+# messages only hold strings, integers and lists of them, so they are written without json.dumps
+# which sets up a new encoder for every call
+_quote = json.encoder.encode_basestring_ascii
+
+def _compact_json(value):
+	# returns value as JSON without any whitespace
+	if isinstance(value, str):
+		return _quote(value)
+	if isinstance(value, (list, tuple)):
+		return '[' + ','.join([_compact_json(item) for item in value]) + ']'
+	return str(value)
+
+class Message:
+	"""A message from the server, made of a command from SERVER_SCHEMA and its
+	   payload. A message is encoded at most once for each protocol, however
+	   many clients it is sent to."""
+
+	__slots__ = ('command', 'payload', '_encoded')
+
+	def __init__(self, command, payload=None):
+		# payload is a string, a tuple, or an event for the Event command
+		self.command  = command
+		self.payload  = payload
+		self._encoded = {}
+
+	def encode(self, protocol):
+		# returns the message in the given protocol's format, reusing earlier work
+		key = (protocol.version, protocol.batched)
+		try:
+			return self._encoded[key]
+		except KeyError:
+			encoded = self._encoded[key] = protocol.encode(self)
+			return encoded
+
+class LegacyProtocol:
+	"""The original text protocol, where every message is '<command>:<info>'.
+	   Batched clients receive 'Frame:' followed by a JSON list of messages."""
+
+	version = LEGACY_VERSION
+
+	def __init__(self, batched=False):
+		self.batched = batched
+
+	def decode(self, message):
+		# returns the Input for a message from the client
+		# raises ValueError for a message that does not follow the protocol
+		command, _, info = message.partition(':')
+		if command == 'Open':
+			# 'Open:<name>:<room id>[:batch]'
+			fields = info.split(':')
+			if len(fields) < 2:
+				raise ValueError('Open takes a name and a room')
+			return Input(command, None, tuple(fields[:2]))
+		if command == 'Chat':
+			return Input(command, None, (info,))
+		if command in {'Start', 'Trash', 'Sync'}:
+			return Input(command, None, ())
+
+		# game inputs are '<name>:<command>[:<space separated indices>]'
+		name = command
+		command, _, info = info.partition(':')
+		if command not in GAME_COMMANDS:
+			raise ValueError('unknown command {}'.format(command))
+		try:
+			args = tuple(int(idx) for idx in info.split())
+		except ValueError:
+			raise ValueError('the indices of {} have to be numbers'.format(command))
+		check_fields(command, args)
+		return Input(command, name, args)
+
+	def text(self, message):
+		# returns the message as '<command>:<info>'
+		command, payload = message.command, message.payload
+		if command == 'Event':
+			return payload.render()
+		if command == 'Start':
+			return 'Start: (blank)'
+		if command == 'Hand':
+			return command + ':' + (','.join(CARD_NAMES[card_id] for card_id in payload) or '(blank)')
+		if command == 'Supply':
+			return command + ':' + ','.join(CARD_NAMES[card_id] + ',' + str(count) for card_id, count in payload)
+		if command == 'Pile':
+			return command + ':' + '{},{},{}'.format(payload[0], CARD_NAMES[payload[1]], payload[2])
+		if command in {'Curses', 'Trash', 'Deck', 'Discard'}:
+			return command + ':' + CARD_NAMES[payload[0]] + ',' + str(payload[1])
+		if command in {'Turn', 'Chat', 'Leave', 'Stand In'}:
+			return command + ':' + payload
+		if command == 'Names':
+			return command + ':' + ','.join(payload)
+		return command + ':' + ','.join(str(field) for field in payload)
+
+	def encode(self, message):
+		# batched clients receive each message as an element of a JSON list
+		if self.batched:
+			return json.dumps(self.text(message))
+		return self.text(message)
+
+	def frame(self, encoded):
+		# returns a single frame holding every encoded message
+		return 'Frame:[' + ','.join(encoded) + ']'
+
+class CompactProtocol:
+	"""The compact protocol. Every message is a JSON array that starts with an
+	   opcode and cards are sent as card ids. Every frame is a JSON list of messages."""
+
+	version = COMPACT_VERSION
+	batched = True
+
+	def decode(self, message):
+		# returns the Input for a message from the client
+		# raises ValueError for a message that does not follow CLIENT_SCHEMA or opens with another version
+		try:
+			fields = json.loads(message)
+		except ValueError:
+			raise ValueError('messages have to be JSON arrays')
+		if type(fields) is not list or fields == [] or type(fields[0]) is not int or fields[0] not in CLIENT_COMMANDS:
+			raise ValueError('messages have to start with a known opcode')
+		command = CLIENT_COMMANDS[fields[0]]
+		check_fields(command, fields[1:])
+		if command == 'Open':
+			if fields[1] != self.version:
+				raise ValueError('protocol version {} is not supported, use {}'.format(fields[1], self.version))
+			return Input(command, None, tuple(fields[2:4]))
+		return Input(command, None, tuple(fields[1:]))
+
+	def encode(self, message):
+		# returns the message as a JSON array
+		# the messages sent most, which only hold numbers or text, are written out directly
+		command, payload = message.command, message.payload
+		if command in {'Pile', 'Curses', 'Trash', 'Deck', 'Discard', 'Stats'}:
+			return '[{},{}]'.format(SERVER_OPCODES[command], ','.join(map(str, payload)))
+		if command == 'Hand':
+			return '[{},[{}]]'.format(SERVER_OPCODES[command], ','.join(map(str, payload)))
+		if command == 'Turn':
+			return '[{},{}]'.format(SERVER_OPCODES[command], _quote(payload))
+		if command == 'Event':
+			command = payload.command()
+			if command == 'Discard':
+				command = 'Discard Prompt'
+			fields = [str(SERVER_OPCODES[command]), _quote(payload.text())]
+			fields.extend(map(_quote, payload.options()))
+			return '[' + ','.join(fields) + ']'
+		if command == 'Start':
+			fields = [SERVER_OPCODES[command]]
+		elif command == 'Hello':
+			fields = [SERVER_OPCODES[command], self.version, CARD_NAMES]
+		elif command == 'Names':
+			fields = [SERVER_OPCODES[command], payload]
+		elif command == 'Supply':
+			fields = [SERVER_OPCODES[command]]
+			for card_id, count in payload:
+				fields.extend((card_id, count))
+		else:
+			fields = [SERVER_OPCODES[command], payload]
+		return _compact_json(fields)
+
+	def frame(self, encoded):
+		# returns a single frame holding every encoded message
+		return '[' + ','.join(encoded) + ']'
+
+def negotiate(message):
+	# picks the protocol from the client's Open message
+	# clients that open with a JSON array use the compact protocol, every other client uses the text protocol
+	if message.startswith('['):
+		return CompactProtocol()
+	return LegacyProtocol(batched=message.split(':')[3:] == ['batch'])
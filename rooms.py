@@ -0,0 +1,169 @@
+import os
+import re
+import itertools
+import dominion
+import journal
+
+class Room:
+	"""A class to represent a single match. Each room owns its participants,
+	   their names, the Dominion instance and the game_loop coroutine, so one
+	   server process can host many matches at the same time."""
+
+	def __init__(self, room_id, journal_dir=None):
+		# a room starts out empty with no game in progress
+		# games are recorded to a journal in journal_dir, unless it is None
+		self.room_id      = room_id
+		self.participants = []
+		self.names        = []
+		self.game         = None
+		self.coro         = None
+		self.journal_dir  = journal_dir
+		self.journal      = None
+		# bots playing on for players who left during the game, see leave()
+		self.stand_ins    = []
+
+	def __len__(self):
+		# returns the number of players connected to the room
+		return len(self.participants)
+
+	def __contains__(self, name):
+		# returns True if the given name is already used in the room
+		return name in self.names
+
+	def is_full(self):
+		# rooms hold at most 4 players
+		return len(self.participants) >= 4
+
+	def in_progress(self):
+		# returns True if a match is being played in the room
+		return self.game != None
+
+	def check_join(self, name):
+		# raises ValueError if a player of the given name cannot join the room
+		# the game's players are fixed once it starts, see leave()
+		if self.in_progress():
+			raise ValueError('a game is already being played in room {}'.format(self.room_id))
+		if self.is_full():
+			raise ValueError('room {} is full'.format(self.room_id))
+		if name in self:
+			raise ValueError('the name {} is already taken in room {}'.format(name, self.room_id))
+
+	def join(self, participant, name):
+		# adds a connection, or a bot from seats.py, and its player name to the room
+		# raises ValueError if it cannot join, see check_join()
+		self.check_join(name)
+		self.participants.append(participant)
+		self.names.append(name)
+
+	def leave(self, participant, stand_in=None):
+		# removes a connection from the room and returns its player name
+		# during a game the participants are in the order of the game's players, so the seat is handed
+		# to stand_in, a bot from seats.py, which plays on under the player's name until the game ends
+		# without a stand in the game is ended
+		idx  = self.participants.index(participant)
+		name = self.names[idx]
+		if self.in_progress() and stand_in != None:
+			self.participants[idx] = stand_in
+			self.stand_ins.append(stand_in)
+		else:
+			self.participants.pop(idx)
+			self.names.pop(idx)
+			self.end_game()
+		# bots do not play on once every player has left
+		if all(participant.is_bot for participant in self.participants):
+			self.participants = []
+			self.names        = []
+		if self.participants == []:
+			self.end_game()
+		return name
+
+	def start_game(self, seed=None):
+		# creates the Dominion instance and returns the first message of the game loop
+		# the game picks its own seed unless one is given
+		self.game = dominion.Dominion(self.names, seed)
+		self.coro = self.game.game_loop()
+		if self.journal_dir != None:
+			path = os.path.join(self.journal_dir, '{}-{}.jsonl'.format(self.room_id, self.game.seed))
+			self.journal = journal.Journal(open(path, 'a', buffering=1), self.game, self.names)
+		return next(self.coro)
+
+	def send(self, user_input):
+		# passes an input to the game loop, records it, and returns what the game loop yields
+		# inputs that raise an exception are recorded too, so the game can be replayed up to the error
+		try:
+			ret = self.coro.send(user_input)
+		except Exception:
+			if self.journal != None: self.journal.record(user_input, None)
+			raise
+		if self.journal != None: self.journal.record(user_input, self.game.events)
+		return ret
+
+	def end_game(self):
+		# discards the current match so a new one can be started, the stand ins leave with it
+		if self.journal != None:
+			self.journal.close()
+		for stand_in in self.stand_ins:
+			if stand_in in self.participants:
+				idx = self.participants.index(stand_in)
+				self.participants.pop(idx)
+				self.names.pop(idx)
+		self.stand_ins = []
+		self.game    = None
+		self.coro    = None
+		self.journal = None
+
+class RoomRegistry:
+	"""A collection of rooms keyed by room id. Rooms are created when the first
+	   player connects and removed once the last player leaves."""
+
+	valid_id = re.compile(r'^[a-z0-9]{1,20}\Z', re.I)
+
+	def __init__(self, journal_dir=None):
+		# initialize the registry to be empty
+		# every room records its games in journal_dir, unless it is None
+		self._rooms      = {}
+		self._ids        = itertools.count(1)
+		self.journal_dir = journal_dir
+
+	def __len__(self):
+		# returns the number of active rooms
+		return len(self._rooms)
+
+	def __iter__(self):
+		# yields every active room
+		for room in list(self._rooms.values()): yield room
+
+	def __contains__(self, room_id):
+		# check if a room with the given id exists
+		return room_id in self._rooms
+
+	def get(self, room_id):
+		# returns the room with the given id, or None if it does not exist
+		return self._rooms.get(room_id)
+
+	def get_or_create(self, room_id):
+		# returns the room with the given id, creating it if necessary
+		room = self._rooms.get(room_id)
+		if room == None:
+			room = Room(room_id, self.journal_dir)
+			self._rooms[room_id] = room
+		return room
+
+	def remove(self, room):
+		# removes a room from the registry
+		self._rooms.pop(room.room_id, None)
+
+	def new_id(self):
+		# returns a room id that is not currently in use
+		while True:
+			room_id = 'room{}'.format(next(self._ids))
+			if room_id not in self._rooms:
+				return room_id
+
+	def find_open(self):
+		# returns the id of a room that is waiting for players,
+		# or a new room id if every room is full or playing
+		for room in self._rooms.values():
+			if not room.in_progress() and not room.is_full():
+				return room.room_id
+		return self.new_id()
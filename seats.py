@@ -0,0 +1,115 @@
+import sys
+import concurrent.futures
+from datetime import timedelta
+from tornado import gen
+from tornado.concurrent import Future, chain_future
+import bots
+import dominion
+import headless
+import protocol
+
+class BotParticipant:
+	"""Takes a seat in a room in place of a connection. Nothing posted to a bot
+	   is sent anywhere, its moves are chosen by BotSeats."""
+
+	is_bot = True
+
+	def __init__(self, name, strategy):
+		# strategy is a strategy spec of bots.py, e.g. 'big_money:Smithy'
+		self.name     = name
+		self.strategy = strategy
+		self.protocol = None
+		self.outbox   = []
+
+def choose_move(strategy, snapshot):
+	# returns the input a bot of the given strategy sends in the game of a snapshot
+	# runs in a worker process, which rebuilds the game from the snapshot
+	game, coro = dominion.restore(snapshot)
+	env = headless.Environment(snapshot['players'])
+	env.attach(game, coro)
+	return bots.create(strategy).choose(env, env.observe(), env.legal_actions())
+
+def fallback_move(env):
+	# returns the input sent for a bot that ran out of time: the first choice asked by a card, or End Turn
+	actions = env.legal_actions()
+	if env.game.decision() != None:
+		return actions[0]
+	return actions[-1]
+
+class BotSeats:
+	"""Plays the bot seats of every room. Bots think in a pool of worker
+	   processes and are handed a snapshot of the game, so a slow bot never holds
+	   up the IO loop. A bot that has not answered within the time budget plays
+	   fallback_move() instead, its answer is dropped when it comes."""
+
+	def __init__(self, strategies=('big_money',), budget=1.0, workers=None, executor=None):
+		# the bots added to a room take turns using strategies
+		# the pool of workers is only started when a bot first has to move, unless an executor is given
+		self.strategies = list(strategies)
+		self.budget     = budget
+		self.workers    = workers
+		self._executor  = executor
+		self._playing   = set()
+
+	def executor(self):
+		if self._executor == None:
+			self._executor = concurrent.futures.ProcessPoolExecutor(self.workers)
+		return self._executor
+
+	def fill(self, room, seats):
+		# adds bots to a room until it has the given number of players and returns them
+		added = []
+		num = 1
+		while len(room) < seats and not room.is_full():
+			while 'bot{}'.format(num) in room:
+				num += 1
+			bot = BotParticipant('bot{}'.format(num), self.strategies[len(added) % len(self.strategies)])
+			room.join(bot, bot.name)
+			added.append(bot)
+		return added
+
+	def stand_in(self, name):
+		# returns a bot that plays on under the name of a player who left during a game, see Room.leave()
+		return BotParticipant(name, self.strategies[0])
+
+	def to_move(self, room):
+		# returns the environment of a room's game and the bot who has to move in it, or None if a player has to
+		# the seat is found by the name of the game's player, so a seat nobody sits in is never played
+		game = room.game
+		env  = headless.Environment(game.player_names())
+		env.attach(game, room.coro)
+		name = env.player_names[env.to_move()]
+		if name not in room.names:
+			return env, None
+		participant = room.participants[room.names.index(name)]
+		return env, participant if participant.is_bot else None
+
+	@gen.coroutine
+	def play(self, room, apply):
+		# plays the bots of a room until a player has to move or the game ends
+		# apply(room, user_input) hands a move to the room the way a player's message would be
+		if room in self._playing:
+			return
+		self._playing.add(room)
+		try:
+			game = room.game
+			while room.game is game and game != None:
+				env, bot = self.to_move(room)
+				if bot == None:
+					return
+				snapshot = game.snapshot()
+				# the answer of the worker is passed on by the IO loop, so it cannot race the timeout
+				thinking = Future()
+				chain_future(self.executor().submit(choose_move, bot.strategy, snapshot), thinking)
+				try:
+					move = yield gen.with_timeout(timedelta(seconds=self.budget), thinking, quiet_exceptions=Exception)
+				except gen.TimeoutError:
+					move = fallback_move(env)
+				except Exception as e:
+					sys.stderr.write('{} in BotSeats.play()\n'.format(type(e).__name__))
+					move = fallback_move(env)
+				# a move chosen for a game that has since changed is chosen again
+				if room.game is game and game.snapshot() == snapshot:
+					apply(room, protocol.Input(move.command, bot.name, move.args))
+		finally:
+			self._playing.discard(room)
@@ -0,0 +1,178 @@
+"""Plays bot against bot games on every core and reports how each strategy did.
+
+   Every game is played by the real rules through headless.Environment. Game
+   number n of a run with seed s always gets the same Dominion seed and bot
+   generators, whichever worker plays it, so a run can be repeated exactly.
+   The strategies take turns sitting first.
+
+   Usage: python simulate.py big_money big_money:Smithy --games 100000
+		  [--kingdom Smithy,Village,...] [--seed 0] [--workers 8]"""
+
+import sys
+import math
+import time
+import argparse
+import multiprocessing
+from random import Random
+from collections import Counter
+import bots
+import cards
+import headless
+
+# games handed to a worker at a time
+CHUNK = 500
+
+def game_seed(seed, game):
+	# returns the seed of a game of the run, seeds of different games and runs do not overlap
+	return (seed << 32) + game
+
+def play_game(strategies, kingdom, seed, game, max_turns):
+	# plays a game and returns the score of each strategy and the number of turns played,
+	# or None if the game was still going after max_turns turns
+	seats = len(strategies)
+	order = [(first + game) % seats for first in range(seats)]
+	env   = headless.Environment(['p{}'.format(seat) for seat in range(seats)])
+	rng   = Random('{}:{}'.format(seed, game))
+	players = [bots.create(strategies[strategy], rng) for strategy in order]
+	observation = env.reset(game_seed(seed, game), kingdom)
+	while not env.done:
+		if observation.turns >= max_turns:
+			return None
+		action = players[observation.player].choose(env, observation, env.legal_actions())
+		observation, game_events, done = env.step(action)
+	scores = [0] * seats
+	for seat, strategy in enumerate(order):
+		scores[strategy] = env.game[seat].score()
+	return scores, env.game.turns
+
+class Summary:
+	"""Totals of a number of games, which can be added together. Each strategy
+	   gets a win, or a share of it when tied, and its victory points are
+	   counted in a histogram."""
+
+	def __init__(self, strategy_count):
+		self.games    = 0
+		self.cut      = 0
+		self.wins     = [0.0] * strategy_count
+		self.wins_sq  = [0.0] * strategy_count
+		self.points   = [Counter() for strategy in range(strategy_count)]
+		self.turns    = 0
+		self.turns_sq = 0
+
+	def add_game(self, scores, turns):
+		# counts a finished game
+		self.games    += 1
+		self.turns    += turns
+		self.turns_sq += turns * turns
+		winners = [strategy for strategy, score in enumerate(scores) if score == max(scores)]
+		for strategy, score in enumerate(scores):
+			win = 1 / len(winners) if strategy in winners else 0
+			self.wins[strategy]    += win
+			self.wins_sq[strategy] += win * win
+			self.points[strategy][score] += 1
+
+	def points_totals(self, strategy):
+		# returns the sum of a strategy's points over every game and the sum of their squares
+		histogram = self.points[strategy]
+		return (sum(score * count for score, count in histogram.items()),
+				sum(score * score * count for score, count in histogram.items()))
+
+	def merge(self, other):
+		# adds the totals of another summary to this one
+		self.games    += other.games
+		self.cut      += other.cut
+		self.turns    += other.turns
+		self.turns_sq += other.turns_sq
+		for strategy in range(len(self.wins)):
+			self.wins[strategy]    += other.wins[strategy]
+			self.wins_sq[strategy] += other.wins_sq[strategy]
+			self.points[strategy].update(other.points[strategy])
+
+def simulate_chunk(job):
+	# plays the games of one chunk in a worker and returns their summary
+	strategies, kingdom, seed, first, last, max_turns = job
+	summary = Summary(len(strategies))
+	for game in range(first, last):
+		result = play_game(strategies, kingdom, seed, game, max_turns)
+		if result == None:
+			summary.cut += 1
+		else:
+			summary.add_game(*result)
+	return summary
+
+def interval(total, total_sq, count):
+	# returns the mean and the half width of its 95% confidence interval
+	if count == 0:
+		return 0.0, 0.0
+	mean = total / count
+	variance = max(total_sq / count - mean * mean, 0.0)
+	return mean, 1.96 * math.sqrt(variance / count)
+
+def percentile(histogram, fraction):
+	# returns the smallest value with at least the given fraction of the counts at or below it
+	# returns None for an empty histogram
+	needed = fraction * sum(histogram.values())
+	seen = 0
+	for value in sorted(histogram):
+		seen += histogram[value]
+		if seen >= needed:
+			return value
+
+def simulate(strategies, games, kingdom=None, seed=0, workers=None, max_turns=200):
+	# plays the games on a pool of worker processes and returns their summary
+	jobs = [(strategies, kingdom, seed, first, min(first + CHUNK, games), max_turns)
+			for first in range(0, games, CHUNK)]
+	summary = Summary(len(strategies))
+	with multiprocessing.Pool(workers) as pool:
+		for chunk in pool.imap_unordered(simulate_chunk, jobs):
+			summary.merge(chunk)
+	return summary
+
+def report(strategies, summary, elapsed):
+	# prints the win rate, victory points and game length of every strategy
+	print('{} games in {:.1f}s ({:.0f} games/s), {} cut short'.format(
+		summary.games, elapsed, summary.games / elapsed if elapsed else 0, summary.cut))
+	turns, turns_ci = interval(summary.turns, summary.turns_sq, summary.games)
+	print('turns per game {:.2f} +- {:.2f}'.format(turns, turns_ci))
+	print('{:>24} {:>16} {:>16} {:>20}'.format('strategy', 'win rate', 'points', 'points p5/p50/p95'))
+	for strategy, spec in enumerate(strategies):
+		wins, wins_ci = interval(summary.wins[strategy], summary.wins_sq[strategy], summary.games)
+		points, points_ci = interval(*summary.points_totals(strategy), count=summary.games)
+		spread = 'n/a'
+		if summary.games > 0:
+			spread = '/'.join(str(percentile(summary.points[strategy], fraction)) for fraction in (0.05, 0.5, 0.95))
+		print('{:>24} {:>16} {:>16} {:>20}'.format(
+			spec, '{:.2%} +- {:.2%}'.format(wins, wins_ci), '{:.2f} +- {:.2f}'.format(points, points_ci), spread))
+
+def main(argv):
+	parser = argparse.ArgumentParser(description='Plays bot against bot games and reports how each strategy did.')
+	parser.add_argument('strategies', nargs='+', help='2 to 4 strategies, e.g. big_money or big_money:Smithy:2')
+	parser.add_argument('--games', type=int, default=10000)
+	parser.add_argument('--kingdom', help='10 comma separated kingdom card names, random for every game if not given')
+	parser.add_argument('--seed', type=int, default=0)
+	parser.add_argument('--workers', type=int, default=None, help='worker processes, one per core if not given')
+	parser.add_argument('--max-turns', type=int, default=200, help='games still going after this many turns are cut short')
+	args = parser.parse_args(argv)
+
+	if not 2 <= len(args.strategies) <= 4:
+		parser.error('between 2 and 4 strategies are needed')
+	if args.games < 1:
+		parser.error('at least 1 game has to be played')
+	try:
+		for spec in args.strategies:
+			bots.create(spec)
+	except ValueError as e:
+		parser.error(str(e))
+	kingdom = None
+	if args.kingdom:
+		names = args.kingdom.split(',')
+		if len(names) != 10 or any(name not in cards.CARDS or cards.CARDS[name] not in cards.KINGDOM for name in names):
+			parser.error('the kingdom must be 10 kingdom card names')
+		kingdom = [cards.CARDS[name].id for name in names]
+
+	start = time.perf_counter()
+	summary = simulate(args.strategies, args.games, kingdom, args.seed, args.workers, args.max_turns)
+	report(args.strategies, summary, time.perf_counter() - start)
+
+if __name__ == '__main__':
+	main(sys.argv[1:])
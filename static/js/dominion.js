@@ -4,21 +4,49 @@ $(function() {
 	var conn = null;
 	conn = new SockJS('https://' + window.location.host + '/router', 'websocket');
 
+	// opcodes of the compact protocol, see CLIENT_SCHEMA and SERVER_SCHEMA in protocol.py
+	var PROTOCOL_VERSION = 2;
+	var CLIENT_OPCODES   = {'Open': 1, 'Start': 2, 'Chat': 3, 'Trash': 4, 'Sync': 5,
+							'Play Card': 6, 'Buy Card': 7, 'Play All Treasures': 8, 'End Turn': 9};
+	var SERVER_COMMANDS  = ['Hello', 'Names', 'Start', 'Turn', 'Supply', 'Pile', 'Curses', 'Trash',
+							'Hand', 'Stats', 'Deck', 'Discard', 'Chat', 'Leave', 'Public', 'End Game',
+							'Select', 'Gain', 'Discard Prompt', 'Decision', 'Suspend', 'Resume', 'Error', 'Stand In'];
+
+	// card names indexed by card id, sent by the server in its Hello message
+	var card_names = [];
+
+	// sends a command followed by its fields, e.g. send('Buy Card', 3)
+	function send(command) {
+		var fields = [CLIENT_OPCODES[command]];
+		for (var i = 1; i < arguments.length; i++)
+			fields.push(arguments[i]);
+		conn.send(JSON.stringify(fields));
+	}
+
 	conn.onopen = function() {
-		conn.send('Open:' + $('#username').text());
+		send('Open', PROTOCOL_VERSION, $('#username').text(), $('#room').text());
 	};
 
 	var my_turn = false;
 	var first_turn = true;
 
+	// the server sends everything produced by one input as a single frame
+	// each message in the frame is handled in order before the page is redrawn
 	conn.onmessage = function(e) {
-		var command = e.data.split(':')[0];
-		var info    = e.data.split(':')[1];
+		var frame = JSON.parse(e.data);
+		for (var i = 0; i < frame.length; i++)
+			handle_message(SERVER_COMMANDS[frame[i][0] - 1], frame[i].slice(1));
+	};
 
+	function handle_message(command, args) {
 		switch(command) {
+			case 'Hello':
+				card_names = args[1];
+				break;
+
 			case 'Names':
-				var player_count = info.split(',').length;
-				var player_names = info.split(',').join('<br>');
+				var player_count = args[0].length;
+				var player_names = args[0].join('<br>');
 				$('#connections').html(player_names);
 				if (player_count >=2)
 					$('#play_button').fadeIn(400);
@@ -39,14 +67,14 @@ $(function() {
 
 			case 'Supply':
 				$('.supply_row').html('');
-				var supply = info.split(',');
+				var supply = args;
 				for (var i = 0; i < supply.length; i++) {
 					if (i % 2 == 0) {
 						if (i < 16)
 							$('.supply_row').eq(0).append('<figure></figure>');
 						else
 							$('.supply_row').eq(1).append('<figure></figure>');
-						$(new Image()).attr('src', '/static/images/' + supply[i] + '.jpg').css({'maxHeight': 'calc(100% - 2em)', 'maxWidth': '100%'}).appendTo($('.supply_row > figure:last'));
+						$(new Image()).attr('src', '/static/images/' + card_names[supply[i]] + '.jpg').css({'maxHeight': 'calc(100% - 2em)', 'maxWidth': '100%'}).appendTo($('.supply_row > figure:last'));
 					}
 					else {
 						$('.supply_row > figure:last').append('<figcaption>' + supply[i] + '</figcaption>');
@@ -55,53 +83,60 @@ $(function() {
 
 				$('.supply_row img').on('click', function() {
 					if (my_turn == true) {
-						conn.send($('#username').text() + ':Buy Card:' + $('.supply_row img').index($(this)));
+						send('Buy Card', $('.supply_row img').index($(this)));
 					}
 				});
 				break;
 
+			case 'Pile':
+				var figure = $('.supply_row > figure').eq(args[0]);
+				figure.children('img').attr('src', '/static/images/' + card_names[args[1]] + '.jpg');
+				figure.children('figcaption').text(args[2]);
+				break;
+
 			case 'Curses':
 				$('#curses > figure').html('');
-				$(new Image()).attr('src', '/static/images/' + info.split(',')[0] + '.jpg').css({'maxHeight': 'calc(100% - 2em)', 'maxWidth': '100%'}).appendTo($('#curses > figure'));
-				$('#curses > figure').append('<figcaption>' + info.split(',')[1] + '</figcaption>');
+				$(new Image()).attr('src', '/static/images/' + card_names[args[0]] + '.jpg').css({'maxHeight': 'calc(100% - 2em)', 'maxWidth': '100%'}).appendTo($('#curses > figure'));
+				$('#curses > figure').append('<figcaption>' + args[1] + '</figcaption>');
 
 				$('#curses img').off('click');
 				$('#curses img').on('click', function() {
 					if (my_turn == true) {
-						conn.send($('#username').text() + ':Buy Card:16');
+						send('Buy Card', 16);
 					}
 				});
 				break;
 
 			case 'Trash':
 				$('#trash > figure').html('');
-				$(new Image()).attr('src', '/static/images/' + info.split(',')[0] + '.jpg').css({'maxHeight': 'calc(100% - 2em)', 'maxWidth': '100%'}).appendTo($('#trash > figure'));
-				$('#trash > figure').append('<figcaption>' + info.split(',')[1] + '</figcaption>');
+				$(new Image()).attr('src', '/static/images/' + card_names[args[0]] + '.jpg').css({'maxHeight': 'calc(100% - 2em)', 'maxWidth': '100%'}).appendTo($('#trash > figure'));
+				$('#trash > figure').append('<figcaption>' + args[1] + '</figcaption>');
 
 				$('#trash img').off('click');
 				$('#trash img').on('click', function() {
-					conn.send('Trash:');
+					send('Trash');
 				});
 				break;
 
 			case 'Hand':
 				$('#hand').html('');
-				if (info != '(blank)') {
-					var hand = info.split(',');
+				if (args[0].length > 0) {
+					var hand = args[0];
 					
 					for (var i = 0; i < hand.length; i++) {
-						$(new Image()).attr('src', '/static/images/' + hand[i] + '.jpg').height('100%').appendTo($('#hand'));
+						$(new Image()).attr('src', '/static/images/' + card_names[hand[i]] + '.jpg').height('100%').appendTo($('#hand'));
 					}
 
 					$('#hand > img').on('click', function() {
 						if (my_turn == true) {
-							conn.send($('#username').text() + ':Play Card:' + $('#hand > img').index($(this)));
+							send('Play Card', $('#hand > img').index($(this)));
 						}
 					});
 				}
 				break;
 
 			case 'Turn':
+				var info = args[0];
 				if ($('#username').text() == info) {
 					my_turn = true;
 				}
@@ -126,27 +161,27 @@ $(function() {
 
 			case 'Stats':
 				if (my_turn == true) {
-					var actions = info.split(',')[0];
-					var gold    = info.split(',')[1];
-					var buys    = info.split(',')[2];
+					var actions = args[0];
+					var gold    = args[1];
+					var buys    = args[2];
 					$('#stats').html('Actions: ' + actions + '<br>' + 'Gold: ' + gold + '<br>' + 'Buys: ' + buys);
 				}
 				break;
 
 			case 'Deck':
 				$('#deck > figure').html('');
-				$(new Image()).attr('src', '/static/images/' + info.split(',')[0] + '.jpg').css({'maxHeight': 'calc(100% - 2em)', 'maxWidth': '100%'}).appendTo($('#deck > figure'));
-				$('#deck > figure').append('<figcaption>' + info.split(',')[1] + '</figcaption>');
+				$(new Image()).attr('src', '/static/images/' + card_names[args[0]] + '.jpg').css({'maxHeight': 'calc(100% - 2em)', 'maxWidth': '100%'}).appendTo($('#deck > figure'));
+				$('#deck > figure').append('<figcaption>' + args[1] + '</figcaption>');
 				break;
 
 			case 'Discard':
 				$('#discard > figure').html('');
-				$(new Image()).attr('src', '/static/images/' + info.split(',')[0] + '.jpg').css({'maxHeight': 'calc(100% - 2em)', 'maxWidth': '100%'}).appendTo($('#discard > figure'));
-				$('#discard > figure').append('<figcaption>' + info.split(',')[1] + '</figcaption>');
+				$(new Image()).attr('src', '/static/images/' + card_names[args[0]] + '.jpg').css({'maxHeight': 'calc(100% - 2em)', 'maxWidth': '100%'}).appendTo($('#discard > figure'));
+				$('#discard > figure').append('<figcaption>' + args[1] + '</figcaption>');
 				break;
 
 			case 'Chat':
-				var msg = e.data.slice(e.data.indexOf(':') + 1);
+				var msg = args[0];
 				$('#log').html($('#log').html() + '<span class="chat"></span><br>');
 				$('#log > span:last').text(msg);
 				$('#log').scrollTop($('#log')[0].scrollHeight);
@@ -160,7 +195,7 @@ $(function() {
 				$('#play_all_button').off('click');
 				$('#end_button').off('click');
 
-				var msg = e.data.split(':')[1];
+				var msg = args[0];
 				$('#end_game_form span').html(msg);
 				$('#end_game_form').fadeIn(400);
 
@@ -191,7 +226,7 @@ $(function() {
 				$('#play_all_button').off('click');
 				$('#end_button').off('click');
 
-				var msg = e.data.split(':')[1];
+				var msg = args[0];
 				$('#log').html($('#log').html() + '<span class="error"></span><br>');
 				$('#log > span:last').text(msg);
 				$('#log').scrollTop($('#log')[0].scrollHeight);
@@ -218,204 +253,192 @@ $(function() {
 				});
 				break;
 
+			// a player left during the game and a bot plays on in their seat, the game goes on as before
+			case 'Stand In':
+				$('#log').html($('#log').html() + '<span class="error"></span><br>');
+				$('#log > span:last').text(args[0] + ' has left the game, a bot plays on for them.');
+				$('#log').scrollTop($('#log')[0].scrollHeight);
+				break;
+
 			case 'Public':
-				var public_msg = e.data.split(':')[1];
+				var public_msg = args[0];
 				$('#log').html($('#log').html() + '<span></span><br>');
 				$('#log > span:last').text(public_msg);
 				$('#log').scrollTop($('#log')[0].scrollHeight);
 				break;
 
-			case 'Private':
-				var name = e.data.split(':')[1];
-				var cmd  = e.data.split(':')[2];
-
-				if (name == $('#username').text()) {
-					switch(cmd) {
-						case 'Select':
-							$('#hand > img').off('click');
-							$('#supply_box img').off('click');
-							$('#curses img').off('click');
-							$('#play_all_button').off('click');
-							$('#end_button').off('click');
-
-							var msg = e.data.split(':')[3];
-							if (msg != '(blank)') {
-								$('#log').html($('#log').html() + '<span></span><br>');
-								$('#log > span:last').text(msg);
-								$('#log').scrollTop($('#log')[0].scrollHeight);
-							}
-
-							$('#hand > img').on('click', function() {
-								if ($(this).hasClass('img_selected'))
-									$(this).removeClass('img_selected');
-								else
-									$(this).addClass('img_selected');
-							});
-
-							$('#end_button').hide();
-							$('#play_all_button').hide();
-							$('#done_button').fadeIn(400);
-							$('#done_button').on('click', function() {
-								var resp = '';
-								for (var i = 0; i < $('#hand > img').length; i++) {
-									if ($('#hand > img').eq(i).hasClass('img_selected')) {
-										if (resp == '')
-											resp = i.toString();
-										else
-											resp = resp + ' ' + i.toString();
-									}
-								}
-								conn.send($('#username').text() + ':Play Card:' + resp);
-								$('#done_button').hide();
-								$('#end_button').fadeIn(400);
-								$('#play_all_button').fadeIn(400);
-								$('#done_button').off('click');
-								$('#play_all_button').on('click', play_all_handler)
-								$('#end_button').on('click', end_handler);
-							});
-							break;
-
-						case 'Decision':
-							$('#hand > img').off('click');
-							$('#supply_box img').off('click');
-							$('#curses img').off('click');
-							$('#play_all_button').off('click');
-							$('#end_button').off('click');
-
-							var opt_string = e.data.split(':')[3];
-							var opt1 = e.data.split(':')[4];
-							var opt2 = e.data.split(':')[5];
-							$('#decision_form span').text(opt_string);
-							$('#decision_form input').eq(0).attr('value', opt1);
-							$('#decision_form input').eq(1).attr('value', opt2);
-
-							$('#decision_form').fadeIn(400);
-							$('#decision_form input').on('click', function(e) {
-								e.preventDefault();
-								conn.send($('#username').text() + ':Play Card:' + $('#decision_form input').index($(this)));
-								$('#decision_form input').off('click');
-								$('#decision_form').fadeOut(400);
-								$('#play_all_button').on('click', play_all_handler)
-								$('#end_button').on('click', end_handler);
-							});
-							break;
-
-						case 'Gain':
-							$('#hand > img').off('click');
-							$('#supply_box img').off('click');
-							$('#curses img').off('click');
-							$('#play_all_button').off('click');
-							$('#end_button').off('click');
-
-							var msg = e.data.split(':')[3];
-							if (msg != '(blank)') {
-								$('#log').html($('#log').html() + '<span></span><br>');
-								$('#log > span:last').text(msg);
-								$('#log').scrollTop($('#log')[0].scrollHeight);
-							}
-
-							$('#supply_box img').on('click', function() {
-								conn.send($('#username').text() + ':Play Card:' + $('#supply_box img').index($(this)));
-								$('#supply_box img').off('click');
-								$('#play_all_button').on('click', play_all_handler)
-								$('#end_button').on('click', end_handler);
-							});
-							break;
-
-						case 'Discard':
-							$('#hand > img').off('click');
-							$('#supply_box img').off('click');
-							$('#curses img').off('click');
-							$('#play_all_button').off('click');
-							$('#end_button').off('click');
-
-							var msg = e.data.split(':')[3];
-							if (msg != '(blank)') {
-								$('#log').html($('#log').html() + '<span></span><br>');
-								$('#log > span:last').text(msg);
-								$('#log').scrollTop($('#log')[0].scrollHeight);
-							}
-
-							$('#hand > img').on('click', function() {
-								if ($(this).hasClass('img_selected'))
-									$(this).removeClass('img_selected');
-								else
-									$(this).addClass('img_selected');
-							});
-
-							$('#end_button').hide();
-							$('#play_all_button').hide();
-							$('#done_button').fadeIn(400);
-							$('#done_button').on('click', function() {
-								var resp = '';
-								for (var i = 0; i < $('#hand > img').length; i++) {
-									if ($('#hand > img').eq(i).hasClass('img_selected')) {
-										if (resp == '')
-											resp = i.toString();
-										else
-											resp = resp + ' ' + i.toString();
-									}
-								}
-								conn.send($('#username').text() + ':Play Card:' + resp);
-								$('#done_button').off('click');
-								$('#done_button').hide();
-								$('#end_button').fadeIn(400);
-								$('#play_all_button').fadeIn(400);
-								$('#play_all_button').on('click', play_all_handler)
-								$('#end_button').on('click', end_handler);
-							});
-							break;
-
-						case 'Suspend':
-							$('#hand > img').off('click');
-							$('#supply_box img').off('click');
-							$('#curses img').off('click');
-							$('#play_all_button').off('click');
-							$('#end_button').off('click');
-
-							var msg = e.data.split(':')[3];
-							if (msg != '(blank)') {
-								$('#log').html($('#log').html() + '<span></span><br>');
-								$('#log > span:last').text(msg);
-								$('#log').scrollTop($('#log')[0].scrollHeight);
-							}
-							break;
-
-						case 'Resume':
-							$('#play_all_button').off('click');
-							$('#end_button').off('click');
-							$('#play_all_button').on('click', play_all_handler)
-							$('#end_button').on('click', end_handler);
-							break;
-
-						case 'Error':
-							var msg = e.data.split(':')[3];
-							$('#log').html($('#log').html() + '<span class="error"></span><br>');
-							$('#log > span:last').text(msg);
-							$('#log').scrollTop($('#log')[0].scrollHeight);
-							break;
-
-						default:
-							console.log('Received invalid command.');
-							break;
+			case 'Select':
+				$('#hand > img').off('click');
+				$('#supply_box img').off('click');
+				$('#curses img').off('click');
+				$('#play_all_button').off('click');
+				$('#end_button').off('click');
+
+				var msg = args[0];
+				if (msg != '(blank)') {
+					$('#log').html($('#log').html() + '<span></span><br>');
+					$('#log > span:last').text(msg);
+					$('#log').scrollTop($('#log')[0].scrollHeight);
+				}
+
+				$('#hand > img').on('click', function() {
+					if ($(this).hasClass('img_selected'))
+						$(this).removeClass('img_selected');
+					else
+						$(this).addClass('img_selected');
+				});
+
+				$('#end_button').hide();
+				$('#play_all_button').hide();
+				$('#done_button').fadeIn(400);
+				$('#done_button').on('click', function() {
+					var resp = ['Play Card'];
+					for (var i = 0; i < $('#hand > img').length; i++) {
+						if ($('#hand > img').eq(i).hasClass('img_selected'))
+							resp.push(i);
 					}
+					send.apply(null, resp);
+					$('#done_button').hide();
+					$('#end_button').fadeIn(400);
+					$('#play_all_button').fadeIn(400);
+					$('#done_button').off('click');
+					$('#play_all_button').on('click', play_all_handler)
+					$('#end_button').on('click', end_handler);
+				});
+				break;
+
+			case 'Decision':
+				$('#hand > img').off('click');
+				$('#supply_box img').off('click');
+				$('#curses img').off('click');
+				$('#play_all_button').off('click');
+				$('#end_button').off('click');
+
+				var opt_string = args[0];
+				var opt1 = args[1];
+				var opt2 = args[2];
+				$('#decision_form span').text(opt_string);
+				$('#decision_form input').eq(0).attr('value', opt1);
+				$('#decision_form input').eq(1).attr('value', opt2);
+
+				$('#decision_form').fadeIn(400);
+				$('#decision_form input').on('click', function(e) {
+					e.preventDefault();
+					send('Play Card', $('#decision_form input').index($(this)));
+					$('#decision_form input').off('click');
+					$('#decision_form').fadeOut(400);
+					$('#play_all_button').on('click', play_all_handler)
+					$('#end_button').on('click', end_handler);
+				});
+				break;
+
+			case 'Gain':
+				$('#hand > img').off('click');
+				$('#supply_box img').off('click');
+				$('#curses img').off('click');
+				$('#play_all_button').off('click');
+				$('#end_button').off('click');
+
+				var msg = args[0];
+				if (msg != '(blank)') {
+					$('#log').html($('#log').html() + '<span></span><br>');
+					$('#log > span:last').text(msg);
+					$('#log').scrollTop($('#log')[0].scrollHeight);
 				}
+
+				$('#supply_box img').on('click', function() {
+					send('Play Card', $('#supply_box img').index($(this)));
+					$('#supply_box img').off('click');
+					$('#play_all_button').on('click', play_all_handler)
+					$('#end_button').on('click', end_handler);
+				});
+				break;
+
+			case 'Discard Prompt':
+				$('#hand > img').off('click');
+				$('#supply_box img').off('click');
+				$('#curses img').off('click');
+				$('#play_all_button').off('click');
+				$('#end_button').off('click');
+
+				var msg = args[0];
+				if (msg != '(blank)') {
+					$('#log').html($('#log').html() + '<span></span><br>');
+					$('#log > span:last').text(msg);
+					$('#log').scrollTop($('#log')[0].scrollHeight);
+				}
+
+				$('#hand > img').on('click', function() {
+					if ($(this).hasClass('img_selected'))
+						$(this).removeClass('img_selected');
+					else
+						$(this).addClass('img_selected');
+				});
+
+				$('#end_button').hide();
+				$('#play_all_button').hide();
+				$('#done_button').fadeIn(400);
+				$('#done_button').on('click', function() {
+					var resp = ['Play Card'];
+					for (var i = 0; i < $('#hand > img').length; i++) {
+						if ($('#hand > img').eq(i).hasClass('img_selected'))
+							resp.push(i);
+					}
+					send.apply(null, resp);
+					$('#done_button').off('click');
+					$('#done_button').hide();
+					$('#end_button').fadeIn(400);
+					$('#play_all_button').fadeIn(400);
+					$('#play_all_button').on('click', play_all_handler)
+					$('#end_button').on('click', end_handler);
+				});
+				break;
+
+			case 'Suspend':
+				$('#hand > img').off('click');
+				$('#supply_box img').off('click');
+				$('#curses img').off('click');
+				$('#play_all_button').off('click');
+				$('#end_button').off('click');
+
+				var msg = args[0];
+				if (msg != '(blank)') {
+					$('#log').html($('#log').html() + '<span></span><br>');
+					$('#log > span:last').text(msg);
+					$('#log').scrollTop($('#log')[0].scrollHeight);
+				}
+				break;
+
+			case 'Resume':
+				$('#play_all_button').off('click');
+				$('#end_button').off('click');
+				$('#play_all_button').on('click', play_all_handler)
+				$('#end_button').on('click', end_handler);
+				break;
+
+			case 'Error':
+				var msg = args[0];
+				$('#log').html($('#log').html() + '<span class="error"></span><br>');
+				$('#log > span:last').text(msg);
+				$('#log').scrollTop($('#log')[0].scrollHeight);
+				break;
+
 			default:
 				console.log('Received invalid command.');
 				break;
 		}
-	};
+	}
 
 	function play_all_handler() {
 		if (my_turn)
-			conn.send($('#username').text() + ':Play All Treasures');
+			send('Play All Treasures');
 	}
 
 	$('#play_all_button').on('click', play_all_handler)
 
 	function end_handler() {
 		if (my_turn)
-			conn.send($('#username').text() + ':End Turn');
+			send('End Turn');
 	}
 
 	$('#end_button').on('click', end_handler);
@@ -423,7 +446,7 @@ $(function() {
 	$('#chat_box > form').submit(function(e) {
 		e.preventDefault();
 		if ($('#chat_box input').val() != '') {
-			conn.send('Chat:' + '(' + $('#username').text() + ') ' + $('#chat_box input').val());
+			send('Chat', $('#chat_box input').val());
 			$('#chat_box input').val('');
 		}
 	});
@@ -431,7 +454,7 @@ $(function() {
 	$('#waiting_interface > form').submit(function(e) {
 		e.preventDefault();
 		$('#waiting_interface').fadeOut(400, function() {
-			conn.send('Start: (blank)');
+			send('Start');
 		});
 	});
 });
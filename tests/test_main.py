@@ -0,0 +1,172 @@
+"""Messages from clients that the game cannot handle.
+
+   Usage: python -m unittest discover tests"""
+
+import unittest
+import main
+from benchmarks.rooms import RecordingSession
+
+class GameLoopErrors(unittest.TestCase):
+	"""A game whose game loop raises is ended and can be started again."""
+
+	def setUp(self):
+		self.saved = main.GameConnection.rooms, main.options.bot_seats
+		main.GameConnection.rooms = main.rooms.RoomRegistry()
+		main.options.bot_seats = 0
+		self.conns = []
+		for name in ('alice', 'bob'):
+			conn = main.GameConnection(RecordingSession())
+			conn.on_open(None)
+			conn.on_message('Open:{}:errors:batch'.format(name))
+			self.conns.append(conn)
+
+	def tearDown(self):
+		main.GameConnection.rooms, main.options.bot_seats = self.saved
+
+	def test_failed_game_is_ended(self):
+		alice, bob = self.conns
+		alice.on_message('Start: (blank)')
+		room = alice.room
+		game = room.game
+		def broken(current_player):
+			raise RuntimeError('broken rules')
+		game.play_all_treasures = broken
+		name = game.player_names()[game.turn]
+		with self.assertLogs('tornado.application', 'ERROR'):
+			alice.on_message('{}:Play All Treasures'.format(name))
+		self.assertFalse(room.in_progress())
+		for conn in self.conns:
+			self.assertTrue(conn.session.messages[-1].startswith('End Game:'))
+
+		# the room is not left with a dead game loop, a new game plays as usual
+		alice.on_message('Start: (blank)')
+		name = room.game.player_names()[room.game.turn]
+		alice.on_message('{}:End Turn'.format(name))
+		self.assertTrue(room.in_progress())
+		self.assertEqual(room.game.turns, 1)
+
+class RoomIds(unittest.TestCase):
+	"""An Open with a room id that is not letters and digits is turned down
+	   before a room is made for it."""
+
+	def setUp(self):
+		self.saved = main.GameConnection.rooms, main.options.bot_seats
+		main.GameConnection.rooms = main.rooms.RoomRegistry()
+		main.options.bot_seats = 0
+
+	def tearDown(self):
+		main.GameConnection.rooms, main.options.bot_seats = self.saved
+
+	def test_invalid_room_ids(self):
+		for room_id in ('../x', 'a_b', 'x' * 21, 'ab\n'):
+			conn = main.GameConnection(RecordingSession())
+			conn.on_open(None)
+			conn.on_message('Open:alice:{}:batch'.format(room_id))
+			self.assertEqual(conn.room, None)
+			self.assertNotIn(room_id, main.GameConnection.rooms)
+			self.assertIn('room names have to be', conn.session.messages[-1])
+
+		# a valid id opens as usual
+		conn.on_message('Open:alice:abc123:batch')
+		self.assertEqual(conn.room.room_id, 'abc123')
+
+class RoomSeats(unittest.TestCase):
+	"""An Open into a room that is playing, a full room, or under a name
+	   already in the room is turned down, and Room.join() keeps the same rules."""
+
+	def setUp(self):
+		self.saved = main.GameConnection.rooms, main.options.bot_seats
+		main.GameConnection.rooms = main.rooms.RoomRegistry()
+		main.options.bot_seats = 0
+
+	def tearDown(self):
+		main.GameConnection.rooms, main.options.bot_seats = self.saved
+
+	def open(self, name):
+		conn = main.GameConnection(RecordingSession())
+		conn.on_open(None)
+		conn.on_message('Open:{}:seats:batch'.format(name))
+		return conn
+
+	def test_taken_name(self):
+		self.open('alice')
+		conn = self.open('alice')
+		self.assertEqual(conn.room, None)
+		self.assertIn('the name alice is already taken', conn.session.messages[-1])
+		self.assertEqual(main.GameConnection.rooms.get('seats').names, ['alice'])
+
+	def test_full_room(self):
+		for name in ('alice', 'bob', 'carol', 'dave'):
+			self.open(name)
+		conn = self.open('erin')
+		self.assertEqual(conn.room, None)
+		self.assertIn('room seats is full', conn.session.messages[-1])
+
+	def test_game_in_progress(self):
+		alice, bob = self.open('alice'), self.open('bob')
+		alice.on_message('Start: (blank)')
+		room = alice.room
+		for name in ('carol', 'alice'):
+			conn = self.open(name)
+			self.assertEqual(conn.room, None)
+			self.assertIn('a game is already being played', conn.session.messages[-1])
+		self.assertEqual(room.names, ['alice', 'bob'])
+
+		# the turns of the game go on as before
+		name = room.game.player_names()[room.game.turn]
+		alice.on_message('{}:End Turn'.format(name))
+		self.assertEqual(room.game.turns, 1)
+
+	def test_join(self):
+		room = main.rooms.Room('seats')
+		room.join(None, 'alice')
+		self.assertRaises(ValueError, room.join, None, 'alice')
+		room.join(None, 'bob')
+		room.start_game()
+		self.assertRaises(ValueError, room.join, None, 'carol')
+		self.assertEqual(room.names, ['alice', 'bob'])
+
+class MoveOrder(unittest.TestCase):
+	"""Only the client of the player the game waits on can move, under the
+	   name of its own player whatever name it sends."""
+
+	def setUp(self):
+		self.saved = main.GameConnection.rooms, main.options.bot_seats
+		main.GameConnection.rooms = main.rooms.RoomRegistry()
+		main.options.bot_seats = 0
+		self.conns = []
+		for name in ('alice', 'bob'):
+			conn = main.GameConnection(RecordingSession())
+			conn.on_open(None)
+			conn.on_message('Open:{}:order:batch'.format(name))
+			self.conns.append(conn)
+		self.conns[0].on_message('Start: (blank)')
+		self.room = self.conns[0].room
+		# the inputs the game loop is sent
+		self.sent = []
+		send = self.room.send
+		def record(user_input):
+			self.sent.append(user_input)
+			return send(user_input)
+		self.room.send = record
+
+	def tearDown(self):
+		main.GameConnection.rooms, main.options.bot_seats = self.saved
+
+	def test_out_of_turn(self):
+		alice, bob = self.conns
+		self.assertEqual(self.room.game.player_names()[self.room.game.to_move()], 'alice')
+		for message in ('alice:End Turn', 'bob:End Turn'):
+			bob.on_message(message)
+			self.assertIn('it is not your move', bob.session.messages[-1])
+		self.assertEqual(self.sent, [])
+		self.assertEqual(self.room.game.turns, 0)
+
+	def test_name_of_the_connection(self):
+		alice, bob = self.conns
+		alice.on_message('bob:End Turn')
+		self.assertEqual([user_input.name for user_input in self.sent], ['alice'])
+		self.assertEqual(self.room.game.turns, 1)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,105 @@
+"""Players leaving a room during a game.
+
+   Usage: python -m unittest discover tests"""
+
+import unittest
+import concurrent.futures
+from tornado import gen, ioloop
+import main
+import seats
+from benchmarks.rooms import BenchSession, RecordingSession, big_money_input
+
+class LeaveMidGame(unittest.TestCase):
+	"""A player who leaves during a game hands their seat to a bot, which plays
+	   their turns until the game ends and then leaves the room too."""
+
+	def setUp(self):
+		# bots think on a thread, so the game can be played on in the test's IO loop
+		self.saved = main.GameConnection.rooms, main.GameConnection.seats, main.options.bot_seats
+		self.executor = concurrent.futures.ThreadPoolExecutor(1)
+		# every test has its own loop, so bot moves left waiting by one test are never run by the next
+		self.io_loop  = ioloop.IOLoop()
+		self.io_loop.make_current()
+		main.GameConnection.rooms = main.rooms.RoomRegistry()
+		main.GameConnection.seats = seats.BotSeats(['big_money'], budget=5.0, executor=self.executor)
+
+	def tearDown(self):
+		main.GameConnection.rooms, main.GameConnection.seats, main.options.bot_seats = self.saved
+		self.io_loop.clear_current()
+		self.io_loop.close()
+		self.executor.shutdown()
+
+	def open(self, *names, session=BenchSession):
+		conns = []
+		for name in names:
+			conn = main.GameConnection(session())
+			conn.on_open(None)
+			conn.on_message('Open:{}:leave:batch'.format(name))
+			conns.append(conn)
+		return conns
+
+	def play_out(self, conn, leaver):
+		# starts a game, closes leaver's connection after the first turn and plays conn's turns to the end
+		# returns the room and the number of turns the game lasted
+		room   = conn.room
+		result = []
+
+		@gen.coroutine
+		def play():
+			conn.on_message('Start: (blank)')
+			game = room.game
+			while game.turns < 1:
+				if game.player_names()[game.to_move()] == conn.name:
+					conn.on_message(big_money_input(game, conn.name))
+				yield gen.sleep(0.001)
+			leaver.on_close()
+			self.assertEqual(room.names[room.participants.index(conn)], conn.name)
+			while room.in_progress():
+				if game.player_names()[game.to_move()] == conn.name and game.decision() == None:
+					conn.on_message(big_money_input(game, conn.name))
+				yield gen.sleep(0.001)
+			result.append(game.turns)
+		self.io_loop.run_sync(play, timeout=20)
+		return room, result[0]
+
+	def test_leaver_of_two_players(self):
+		main.options.bot_seats = 0
+		alice, bob = self.open('alice', 'bob')
+		room, turns = self.play_out(alice, bob)
+		self.assertGreater(turns, 2)
+		self.assertEqual(room.names, ['alice'])
+		self.assertEqual(room.stand_ins, [])
+
+	def test_leaver_next_to_a_bot(self):
+		main.options.bot_seats = 3
+		alice, bob = self.open('alice', 'bob')
+		room, turns = self.play_out(alice, bob)
+		self.assertGreater(turns, 3)
+		self.assertEqual(room.names, ['alice', 'bot1'])
+
+	def test_turns_after_a_leave(self):
+		# the client is told a bot plays on, not that the game is over, and its player keeps taking turns
+		main.options.bot_seats = 0
+		alice, bob = self.open('alice', 'bob', session=RecordingSession)
+		room, turns = self.play_out(alice, bob)
+		messages = alice.session.messages
+		stand_in = messages.index('Stand In:bob')
+		self.assertFalse([message for message in messages if message.startswith('Leave:')])
+		self.assertIn('Turn:alice', messages[stand_in:])
+		self.assertIn('Turn:bob', messages[stand_in:])
+
+	def test_to_move_follows_the_game_players(self):
+		# the bot standing in for bob is the one asked to move on bob's turns
+		main.options.bot_seats = 0
+		alice, bob = self.open('alice', 'bob')
+		alice.on_message('Start: (blank)')
+		room = alice.room
+		bob.on_close()
+		while room.game.player_names()[room.game.to_move()] != 'bob':
+			alice.on_message(big_money_input(room.game, 'alice'))
+		env, bot = main.GameConnection.seats.to_move(room)
+		self.assertTrue(bot.is_bot)
+		self.assertEqual(bot.name, 'bob')
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,302 @@
+import numpy
+import cards
+import dominion
+from collections import namedtuple
+
+# numpy is only needed here and by the benchmarks that use this module, the server does not import it
+
+# actions are numbers, so a batch of actions is a single array
+CARD_COUNT     = len(cards.CATALOG)
+PLAY           = 0                  # PLAY + card id plays a copy of the card from hand
+BUY            = CARD_COUNT         # BUY + card id buys a copy of the card from the supply
+PLAY_TREASURES = 2 * CARD_COUNT
+END_TURN       = 2 * CARD_COUNT + 1
+ACTION_COUNT   = 2 * CARD_COUNT + 2
+
+# the kingdom cards that never ask for a decision and never look at the order of a deck
+# a deck can then be kept as the number of copies of each card, drawing a random copy is the same
+# as drawing the top card of a shuffled deck
+SUPPORTED = ('Moat', 'Village', 'Woodcutter', 'Gardens', 'Moneylender', 'Smithy',
+			 'Council Room', 'Festival', 'Laboratory', 'Market', 'Witch', 'Adventurer')
+
+# the cards drawn, actions, buys and gold given by each action card, as in Dominion.play_action
+EFFECTS = {'Moat':         (2, 0, 0, 0),
+		   'Village':      (1, 2, 0, 0),
+		   'Woodcutter':   (0, 0, 1, 2),
+		   'Moneylender':  (0, 0, 0, 0),
+		   'Smithy':       (3, 0, 0, 0),
+		   'Council Room': (4, 0, 1, 0),
+		   'Festival':     (0, 2, 1, 2),
+		   'Laboratory':   (2, 1, 0, 0),
+		   'Market':       (1, 1, 1, 1),
+		   'Witch':        (2, 0, 0, 0),
+		   'Adventurer':   (0, 0, 0, 0)}
+
+def _table(values, dtype=numpy.int32):
+	# returns an array indexed by card id, values maps card names to entries and the rest are 0
+	table = numpy.zeros(CARD_COUNT, dtype)
+	for name, value in values.items():
+		table[cards.CARDS[name].id] = value
+	return table
+
+COST           = numpy.array([card.cost for card in cards.CATALOG], numpy.int32)
+IS_TREASURE    = numpy.array([card.type == 'Treasure' for card in cards.CATALOG])
+IS_ACTION      = numpy.array([card.type == 'Action' for card in cards.CATALOG])
+TREASURE_VALUE = _table({'Copper': 1, 'Silver': 2, 'Gold': 3})
+VICTORY_POINTS = _table({cards.CATALOG[card_id].name: points for card_id, points in cards.VICTORY_POINTS.items()})
+DRAWS          = _table({name: effect[0] for name, effect in EFFECTS.items()})
+PLUS_ACTIONS   = _table({name: effect[1] for name, effect in EFFECTS.items()})
+PLUS_BUYS      = _table({name: effect[2] for name, effect in EFFECTS.items()})
+PLUS_GOLD      = _table({name: effect[3] for name, effect in EFFECTS.items()})
+
+COPPER, PROVINCE, CURSE = cards.CARDS['Copper'].id, cards.CARDS['Province'].id, cards.CARDS['Curse'].id
+MOAT, GARDENS           = cards.CARDS['Moat'].id, cards.CARDS['Gardens'].id
+
+# what the current player of every game can see, one row per game
+#   player:  index of the player whose turn it is
+#   hand:    number of copies of each card in that player's hand, indexed by card id
+#   stats:   actions, gold and buys of that player
+#   supply:  number of cards left in each supply pile, indexed by card id
+#   scores:  score of every player
+#   turns:   number of turns played
+Observations = namedtuple('Observations', 'player hand stats supply scores turns')
+
+class VectorDominion:
+	"""Many independent games of Dominion with the same players and kingdom,
+	   stepped together. Every zone of every player is an array of card counts
+	   indexed by card id, so each step is a handful of numpy operations over
+	   all games at once. Only the kingdom cards in SUPPORTED can be used.
+	   An action that would be refused by Dominion leaves its game unchanged.
+	   Games are started again as soon as they end."""
+
+	def __init__(self, games, player_count=2, kingdom=None, seed=None):
+		# games is the number of games stepped together
+		# kingdom is a list of 10 kingdom card ids, picked at random from SUPPORTED when not given
+		self.games        = games
+		self.player_count = player_count
+		self.rng          = numpy.random.RandomState(seed)
+		if kingdom == None:
+			supported = [cards.CARDS[name].id for name in SUPPORTED]
+			kingdom   = sorted(self.rng.choice(supported, 10, replace=False).tolist())
+		for card_id in kingdom:
+			if cards.CATALOG[card_id].name not in SUPPORTED:
+				raise ValueError('{} is not supported by VectorDominion'.format(cards.CATALOG[card_id].name))
+		self.kingdom = tuple(kingdom)
+
+		# the supply piles and starting decks are the ones of a Dominion game with the same
+		# players and kingdom
+		game = dominion.Dominion(['p{}'.format(num) for num in range(player_count)], 0, kingdom)
+		self._start_supply = numpy.zeros(CARD_COUNT, numpy.int32)
+		for card, count in zip(game.supply_cards(), game.supply_counts()):
+			self._start_supply[card.id] = count
+		self._in_supply  = self._start_supply > 0
+		self._start_deck = numpy.zeros(CARD_COUNT, numpy.int32)
+		state = game[0].state()
+		for card_id in state['hand'] + state['deck']:
+			self._start_deck[card_id] += 1
+
+		shape = (games, player_count, CARD_COUNT)
+		self.hand     = numpy.zeros(shape, numpy.int32)
+		self.deck     = numpy.zeros(shape, numpy.int32)
+		self.discard  = numpy.zeros(shape, numpy.int32)
+		self.in_play  = numpy.zeros(shape, numpy.int32)
+		self.supply   = numpy.zeros((games, CARD_COUNT), numpy.int32)
+		self.trash    = numpy.zeros((games, CARD_COUNT), numpy.int32)
+		self.actions  = numpy.zeros(games, numpy.int32)
+		self.buys     = numpy.zeros(games, numpy.int32)
+		self.gold     = numpy.zeros(games, numpy.int32)
+		self.turn     = numpy.zeros(games, numpy.int32)
+		self.turns    = numpy.zeros(games, numpy.int32)
+		self._all     = numpy.arange(games)
+
+		# the final scores and number of turns of the last game that ended in each slot
+		self.final_scores = numpy.zeros((games, player_count), numpy.int32)
+		self.final_turns  = numpy.zeros(games, numpy.int32)
+		self.reset()
+
+	def reset(self, games=None):
+		# starts the given games again, every game when none are given, and returns the observations
+		if games is None:
+			games = self._all
+		for zone in (self.hand, self.deck, self.discard, self.in_play):
+			zone[games] = 0
+		self.deck[games]   = self._start_deck
+		self.supply[games] = self._start_supply
+		self.trash[games]  = 0
+		for seat in range(self.player_count):
+			self._draw(games, numpy.full(len(games), seat), 5)
+		self.actions[games] = 1
+		self.buys[games]    = 1
+		self.gold[games]    = 0
+		self.turn[games]    = 0
+		self.turns[games]   = 0
+		return self.observe()
+
+	def observe(self):
+		# returns what the current player of every game can see
+		return Observations(self.turn.copy(),
+							self.hand[self._all, self.turn],
+							numpy.stack((self.actions, self.gold, self.buys), 1),
+							self.supply.copy(),
+							self.scores(),
+							self.turns.copy())
+
+	def scores(self):
+		# returns the score of every player of every game, Gardens are worth 1 point for every 10 cards owned
+		owned = self.hand + self.deck + self.discard + self.in_play
+		return owned.dot(VICTORY_POINTS) + owned.sum(2) // 10 * owned[:, :, GARDENS]
+
+	def legal_mask(self):
+		# returns which actions the current player of every game can take without being refused
+		hand = self.hand[self._all, self.turn]
+		mask = numpy.zeros((self.games, ACTION_COUNT), bool)
+		mask[:, PLAY:BUY] = (hand > 0) & (IS_TREASURE | (IS_ACTION & (self.actions > 0)[:, None]))
+		mask[:, BUY:PLAY_TREASURES] = (self.supply > 0) & (COST <= self.gold[:, None])
+		mask[:, PLAY_TREASURES] = (hand[:, IS_TREASURE] > 0).any(1)
+		mask[:, END_TURN] = True
+		return mask
+
+	def step(self, actions):
+		# takes one action for the current player of every game
+		# returns the observations, the rewards of every player and which games ended
+		# a game that ended gives 1 to the players with the highest score and -1 to the others,
+		# every other reward is 0, and the game is started again before the observations are made
+		actions = numpy.asarray(actions)
+		games   = self._all
+		seats   = self.turn
+
+		# playing a single card
+		card     = numpy.where(actions < BUY, actions - PLAY, 0)
+		in_hand  = (actions < BUY) & (self.hand[games, seats, card] > 0)
+		treasure = in_hand & IS_TREASURE[card]
+		action   = in_hand & IS_ACTION[card] & (self.actions > 0)
+		played   = games[treasure | action]
+		self.hand[played, seats[played], card[played]]    -= 1
+		self.in_play[played, seats[played], card[played]] += 1
+		self.gold[treasure]   += TREASURE_VALUE[card[treasure]]
+		self.actions[treasure] = 0
+		if action.any():
+			self._play_actions(games[action], card[action])
+
+		# playing every treasure in hand
+		playing = games[actions == PLAY_TREASURES]
+		if len(playing):
+			treasures = self.hand[playing, seats[playing]] * IS_TREASURE
+			self.gold[playing] += treasures.dot(TREASURE_VALUE)
+			self.actions[playing[treasures.any(1)]] = 0
+			self.hand[playing, seats[playing]]    -= treasures
+			self.in_play[playing, seats[playing]] += treasures
+
+		# buying a card
+		card   = numpy.where((actions >= BUY) & (actions < PLAY_TREASURES), actions - BUY, 0)
+		buying = (actions >= BUY) & (actions < PLAY_TREASURES)
+		bought = games[buying & (self.supply[games, card] > 0) & (COST[card] <= self.gold)]
+		card   = card[bought]
+		self.supply[bought, card] -= 1
+		self.discard[bought, seats[bought], card] += 1
+		self.gold[bought]   -= COST[card]
+		self.buys[bought]   -= 1
+		self.actions[bought] = 0
+
+		# the turn ends when asked to or once there are no buys left
+		rewards = numpy.zeros((self.games, self.player_count), numpy.int32)
+		done    = numpy.zeros(self.games, bool)
+		ended   = self._end_turns(games[(actions == END_TURN) | (self.buys == 0)])
+		if len(ended):
+			scores = self.scores()[ended]
+			rewards[ended] = numpy.where(scores == scores.max(1)[:, None], 1, -1)
+			self.final_scores[ended] = scores
+			self.final_turns[ended]  = self.turns[ended]
+			done[ended]    = True
+			self.reset(ended)
+		return self.observe(), rewards, done
+
+	def _play_actions(self, games, card):
+		# resolves the action cards just played in the given games, one card per game
+		seats = self.turn[games]
+		self.actions[games] += PLUS_ACTIONS[card] - 1
+		self.buys[games]    += PLUS_BUYS[card]
+		self.gold[games]    += PLUS_GOLD[card]
+		self._draw(games, seats, DRAWS[card])
+
+		# the cards that do more than draw and add to the player's stats
+		lender = games[card == cards.CARDS['Moneylender'].id]
+		lender = lender[self.hand[lender, self.turn[lender], COPPER] > 0]
+		self.hand[lender, self.turn[lender], COPPER] -= 1
+		self.trash[lender, COPPER] += 1
+		self.gold[lender] += 3
+
+		council = games[card == cards.CARDS['Council Room'].id]
+		for offset in range(1, self.player_count):
+			self._draw(council, (self.turn[council] + offset) % self.player_count, 1)
+
+		# other players gain a curse in turn order unless they have a moat in hand or the curses run out
+		witch = games[card == cards.CARDS['Witch'].id]
+		for offset in range(1, self.player_count):
+			others  = (self.turn[witch] + offset) % self.player_count
+			cursed  = (self.hand[witch, others, MOAT] == 0) & (self.supply[witch, CURSE] > 0)
+			targets = witch[cursed]
+			self.supply[targets, CURSE] -= 1
+			self.discard[targets, others[cursed], CURSE] += 1
+
+		adventurer = games[card == cards.CARDS['Adventurer'].id]
+		if len(adventurer):
+			self._adventure(adventurer)
+
+	def _adventure(self, games):
+		# reveals cards until 2 treasures are drawn into hand or there is nothing left to reveal,
+		# the other revealed cards are discarded at the end as in Dominion.play_action
+		seats     = self.turn[games]
+		revealed  = numpy.zeros((len(games), CARD_COUNT), numpy.int32)
+		treasures = numpy.zeros(len(games), numpy.int32)
+		active    = numpy.arange(len(games))
+		while len(active):
+			card, drawn = self._reveal(games[active], seats[active])
+			active, card = active[drawn], card[drawn]
+			is_treasure = IS_TREASURE[card]
+			self.hand[games[active[is_treasure]], seats[active[is_treasure]], card[is_treasure]] += 1
+			revealed[active[~is_treasure], card[~is_treasure]] += 1
+			treasures[active] += is_treasure
+			active = active[treasures[active] < 2]
+		self.discard[games, seats] += revealed
+
+	def _reveal(self, games, seats):
+		# removes a random card from the deck of each given player, shuffling their discard pile into
+		# their deck first if it is empty. returns the card ids and which players had a card to reveal
+		refill = (self.deck[games, seats].sum(1) == 0)
+		if refill.any():
+			self.deck[games[refill], seats[refill]]   += self.discard[games[refill], seats[refill]]
+			self.discard[games[refill], seats[refill]] = 0
+		deck  = self.deck[games, seats]
+		total = deck.sum(1)
+		pick  = (self.rng.random_sample(len(games)) * total).astype(numpy.int32)
+		card  = (deck.cumsum(1) <= pick[:, None]).sum(1)
+		drawn = total > 0
+		card  = numpy.where(drawn, card, 0)
+		self.deck[games[drawn], seats[drawn], card[drawn]] -= 1
+		return card, drawn
+
+	def _draw(self, games, seats, amounts):
+		# each given player draws the given number of cards, amounts is a number or one number per player
+		amounts = numpy.broadcast_to(amounts, games.shape)
+		for num in range(amounts.max() if len(games) else 0):
+			active = amounts > num
+			card, drawn = self._reveal(games[active], seats[active])
+			self.hand[games[active][drawn], seats[active][drawn], card[drawn]] += 1
+
+	def _end_turns(self, games):
+		# cleans up the turn of the current player of the given games and passes the turn
+		# returns the games that are over, when the provinces or any 3 supply piles are gone
+		seats = self.turn[games]
+		self.discard[games, seats] += self.hand[games, seats] + self.in_play[games, seats]
+		self.hand[games, seats]     = 0
+		self.in_play[games, seats]  = 0
+		self._draw(games, seats, 5)
+		self.actions[games] = 1
+		self.buys[games]    = 1
+		self.gold[games]    = 0
+		self.turn[games]    = (seats + 1) % self.player_count
+		self.turns[games]  += 1
+		supply = self.supply[games]
+		over   = (supply[:, PROVINCE] == 0) | (((supply == 0) & self._in_supply).sum(1) >= 3)
+		return games[over]
@@ -0,0 +1,181 @@
+import sys
+import time
+import threading
+import traceback
+import collections
+from tornado import ioloop
+from tornado.log import app_log
+
+# the innermost frames kept of a stack sample
+STACK_DEPTH = 40
+# lag measurements kept for the percentiles of report(), a few minutes of them
+LAG_HISTORY = 2000
+
+def context(room, user_input, name=None):
+	# returns what handling a message is about: its command, the player and room, and the card
+	# name is the player of an input that does not name one
+	# the card of a Play Card input is the one waiting for a decision, or else the card in hand it plays
+	# has to be called before the input is handled, while the hand is still as the player saw it
+	handled = {'command': user_input.command, 'player': user_input.name if user_input.name != None else name,
+			   'room': room.room_id if room != None else None, 'card': None}
+	if user_input.command != 'Play Card' or room == None or not room.in_progress():
+		return handled
+	game  = room.game
+	frame = game.decision()
+	if frame != None:
+		handled['card'] = frame['card']
+	elif user_input.args:
+		current_player = game[game.turn]
+		idx = user_input.args[0]
+		if isinstance(idx, int) and 0 <= idx < current_player.length('hand'):
+			handled['card'] = current_player[('hand', idx)].name
+	return handled
+
+def format_stack(frame):
+	# returns the innermost frames of a stack as 'file:line in function' strings, outermost first
+	return ['{}:{} in {}'.format(entry[0], entry[1], entry[2]) for entry in traceback.extract_stack(frame)[-STACK_DEPTH:]]
+
+def _stack_text(stack):
+	# returns a stack sample as lines to append to a log message
+	if stack == None:
+		return ''
+	return '\n  ' + '\n  '.join(stack)
+
+class Watchdog:
+	"""Watches the IO loop of the server for anything that holds it up.
+
+	   The loop is woken every interval seconds and the time it was late by is
+	   its lag. Handlers tell the watchdog what they are handling with begin()
+	   and end(), any that take longer than the threshold is logged and kept in
+	   slow, the most recent last, along with its command and card. With stacks
+	   a thread looks at the loop every interval, or more often for a short
+	   threshold, and takes a sample of its stack once a handler, or anything
+	   else the loop runs, is past the threshold, so the sample shows the code
+	   that was holding the loop up."""
+
+	def __init__(self, threshold=0.1, interval=0.05, stacks=False, keep=50, registry=None):
+		# threshold and interval are in seconds, keep is the number of slow handlers kept
+		# the lag and the slow handlers are recorded as metrics of registry when one is given
+		self.threshold = threshold
+		self.interval  = interval
+		self.stacks    = stacks
+		self.slow      = collections.deque(maxlen=keep)
+		self.lags      = collections.deque(maxlen=LAG_HISTORY)
+		self.max_lag   = 0.0
+		self.lag_metric  = None
+		self.slow_metric = None
+		if registry != None:
+			self.lag_metric  = registry.histogram('dominion_ioloop_lag_seconds',
+				'Time the IO loop was late by when woken by the watchdog')
+			self.slow_metric = registry.counter('dominion_slow_handlers_total',
+				'Messages that took longer than the watchdog threshold to handle, by command', ('command',))
+		# the loop thread and the sampling thread share these, each is replaced rather than changed
+		# _handling is the start time and context of the handler running, _due the time the next tick is due,
+		# _sample the handler or tick a stack was taken for and the stack
+		self._handling    = None
+		self._due         = None
+		self._sample      = None
+		self._last_slow   = 0.0
+		self._loop_thread = None
+		self._io_loop     = None
+
+	def start(self, io_loop=None):
+		# starts measuring the lag of the loop, and the sampling thread if stacks are taken
+		# has to be called on the thread that runs the loop
+		self._io_loop     = io_loop if io_loop != None else ioloop.IOLoop.current()
+		self._loop_thread = threading.get_ident()
+		self._schedule()
+		if self.stacks:
+			thread = threading.Thread(target=self._watch, name='watchdog')
+			thread.daemon = True
+			thread.start()
+
+	def _schedule(self):
+		self._due = time.perf_counter() + self.interval
+		self._io_loop.call_later(self.interval, self._tick)
+
+	def _tick(self):
+		# records how late the loop was, a long lag nobody has already reported is logged
+		now  = time.perf_counter()
+		lag  = max(0.0, now - self._due)
+		self.lags.append(lag)
+		self.max_lag = max(self.max_lag, lag)
+		if self.lag_metric != None:
+			self.lag_metric.observe(lag)
+		if lag > self.threshold and self._last_slow < self._due:
+			stack = self._stack_for(self._due)
+			self.slow.append({'kind': 'loop', 'at': time.time(), 'ms': round(lag * 1000, 1), 'stack': stack})
+			app_log.warning('IO loop was %.0f ms late, without a slow handler%s', lag * 1000, _stack_text(stack))
+		self._schedule()
+
+	def begin(self, handled):
+		# notes the start of a handler, handled is the dict returned by context()
+		self._handling = (time.perf_counter(), handled)
+
+	def handling(self):
+		# returns the context of the handler running on the loop, or None between handlers
+		# can be called from any thread
+		handling = self._handling
+		return handling[1] if handling != None else None
+
+	def end(self):
+		# notes the end of the handler started last and records it if it was slow
+		handling = self._handling
+		self._handling = None
+		if handling == None:
+			return
+		now     = time.perf_counter()
+		elapsed = now - handling[0]
+		if elapsed <= self.threshold:
+			return
+		handled = handling[1]
+		stack   = self._stack_for(handling)
+		self._last_slow = now
+		record = dict(handled, kind='handler', at=time.time(), ms=round(elapsed * 1000, 1), stack=stack)
+		self.slow.append(record)
+		if self.slow_metric != None:
+			self.slow_metric.inc(1, (handled['command'],))
+		app_log.warning('slow handler: %s%s by %s in room %s took %.0f ms%s', handled['command'],
+						' ' + handled['card'] if handled['card'] else '', handled['player'], handled['room'],
+						elapsed * 1000, _stack_text(stack))
+
+	def _stack_for(self, key):
+		# returns the stack sampled while key, a handler or the time a tick was due, held up the loop
+		sample = self._sample
+		if sample != None and sample[0] is key:
+			return sample[1]
+		return None
+
+	def _watch(self):
+		# runs on the sampling thread, takes one stack of the loop thread for each handler or tick that is late
+		# the loop is looked at twice per threshold at least, so handlers just over it are sampled too
+		while True:
+			time.sleep(min(self.interval, self.threshold / 2))
+			now = time.perf_counter()
+			handling, due = self._handling, self._due
+			if handling != None and now - handling[0] > self.threshold:
+				key = handling
+			elif due != None and now - due > self.threshold:
+				key = due
+			else:
+				continue
+			if self._sample != None and self._sample[0] is key:
+				continue
+			frame = sys._current_frames().get(self._loop_thread)
+			if frame != None:
+				self._sample = (key, format_stack(frame))
+
+	def report(self):
+		# returns the settings, the recent lag and the slow handlers, in a form that can be sent as JSON
+		lags = sorted(self.lags)
+		def percentile(fraction):
+			return round(lags[min(len(lags) - 1, int(fraction * len(lags)))] * 1000, 2) if lags else None
+		return {'threshold_ms': round(self.threshold * 1000, 1),
+				'interval_ms':  round(self.interval * 1000, 1),
+				'stacks':       self.stacks,
+				'running':      self._io_loop != None,
+				'lag_ms':       {'last': round(self.lags[-1] * 1000, 2) if lags else None,
+								 'p50':  percentile(0.5),
+								 'p99':  percentile(0.99),
+								 'max':  round(self.max_lag * 1000, 2)},
+				'slow':         list(self.slow)}